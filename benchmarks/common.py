@@ -0,0 +1,50 @@
+"""
+Helpers shared by the benchmark scripts: run metadata and comparison against an earlier run.
+
+Kept free of the engine, the game master and clemcore, so that benchmarks/imports.py can use them without importing
+the modules it measures.
+"""
+import datetime
+import platform
+import subprocess
+from importlib import metadata
+from typing import Dict, List
+
+SEED = 42
+THRESHOLD = 0.2  # Relative slowdown that counts as regression
+
+
+def get_meta() -> Dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    try:
+        numpy_version = metadata.version("numpy")
+    except metadata.PackageNotFoundError:
+        numpy_version = None
+    return {"timestamp": datetime.datetime.now().isoformat(timespec="seconds"), "commit": commit,
+            "python": platform.python_version(), "numpy": numpy_version, "platform": platform.platform(),
+            "processor": platform.processor(), "seed": SEED}
+
+
+def compare(results: Dict, baseline: Dict, threshold: float = THRESHOLD) -> List[Dict]:
+    """
+    Compare the best time per call of every benchmark that is in both runs
+
+    Args:
+        results: Timings keyed by name, {"min_us": ...} per benchmark
+        baseline: Timings keyed by name of an earlier run
+        threshold: Relative slowdown that counts as regression, 0.2 = 20% slower
+
+    Returns:
+        {"name", "baseline_us", "current_us", "ratio", "regression"} per benchmark
+    """
+    rows = []
+    for name, timing in results.items():
+        if name not in baseline:
+            continue
+        ratio = timing["min_us"] / baseline[name]["min_us"]
+        rows.append({"name": name, "baseline_us": baseline[name]["min_us"], "current_us": timing["min_us"],
+                     "ratio": ratio, "regression": ratio > 1 + threshold})
+    return rows
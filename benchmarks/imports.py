@@ -0,0 +1,139 @@
+"""
+Import-time benchmark for the game and engine entry points.
+
+Every benchmark worker process imports the game master, so its import time is paid once per worker. Each module is
+imported in a fresh interpreter with -X importtime, which gives
+    import_us: Cumulative import time of the module itself
+    wall_us: Wall time of the whole process (interpreter start-up + import)
+    heavy: Heavy optional dependencies (rendering, plotting, http) that were imported although the module does not
+        need them - these are imported lazily, where rendering, plotting or fetching is requested
+
+python -m benchmarks.imports
+python -m benchmarks.imports --output benchmarks/results/imports.json
+python -m benchmarks.imports --compare benchmarks/results/imports.json --threshold 0.2
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from benchmarks.common import THRESHOLD, compare, get_meta
+
+REPEAT = 5
+
+RENDERING = ("pygame", "gymnasium", "matplotlib")
+# Module -> heavy modules it must not import
+MODULES = {
+    "escaperoom.master": RENDERING + ("requests",),
+    "escaperoom.instancegenerator": RENDERING,
+    "escaperoom.simulator": RENDERING + ("networkx",),
+    "escaperoom.scorer": RENDERING,
+    "engine.maps": RENDERING,
+    "engine.graphs": RENDERING,
+    "engine.environment": ("pygame", "matplotlib"),
+    # The benchmark itself, it must not import what it measures
+    "benchmarks.imports": ("clemcore", "numpy", "escaperoom.master", "engine.graphs"),
+}
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """
+    Returns:
+        Cumulative import time in microseconds of every module imported, from the -X importtime output
+    """
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # Header
+        times[parts[2].strip()] = int(parts[1])
+    return times
+
+
+def time_import(module: str) -> Tuple[int, int, Dict[str, int]]:
+    """
+    Import module in a fresh interpreter
+
+    Returns:
+        Import time of the module in us, wall time of the process in us, import times of all imported modules
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")])))
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True,
+                             text=True, env=env)
+    wall = int((time.perf_counter() - start) * 1e6)
+    if process.returncode != 0:
+        raise ImportError(f"Importing {module} failed:\n{process.stderr[-2000:]}")
+    times = parse_importtime(process.stderr)
+    return times.get(module, 0), wall, times
+
+
+def measure(module: str, heavy: Tuple[str, ...] = (), repeat: int = REPEAT) -> Dict:
+    """
+    Returns:
+        min/median import and wall times over repeat fresh interpreters, and the heavy modules that were imported
+    """
+    import_us, wall_us, imported = [], [], {}
+    for _ in range(repeat):
+        module_us, process_us, imported = time_import(module)
+        import_us.append(module_us)
+        wall_us.append(process_us)
+    return {"min_us": float(min(import_us)), "median_us": float(statistics.median(import_us)),
+            "wall_min_us": float(min(wall_us)), "repeat": repeat,
+            "heavy": sorted(name for name in heavy if name in imported)}
+
+
+def run(modules: List[str], repeat: int = REPEAT, verbose: bool = True) -> Dict:
+    results = {}
+    for module in modules:
+        results[module] = measure(module, MODULES.get(module, ()), repeat)
+        if verbose:
+            result = results[module]
+            heavy = f"  heavy imports: {', '.join(result['heavy'])}" if result["heavy"] else ""
+            print(f"{module:<32} {result['min_us'] / 1e3:>9.1f} ms  (process {result['wall_min_us'] / 1e3:.1f} ms)"
+                  f"{heavy}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time of the game and engine entry points")
+    parser.add_argument("--modules", nargs="+", default=list(MODULES))
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--output", default=None, help="Write the results to this JSON file")
+    parser.add_argument("--compare", default=None, help="Results JSON of an earlier run")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="Relative slowdown that counts as regression")
+    args = parser.parse_args()
+
+    results = run(args.modules, args.repeat)
+    failed = any(result["heavy"] for result in results.values())
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"meta": get_meta(), "results": results}, f, indent=4)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        rows = compare(results, baseline, args.threshold)
+        print(f"\nCompared to {args.compare} (regression: > {args.threshold:.0%} slower)")
+        for row in rows:
+            flag = "REGRESSION" if row["regression"] else ""
+            print(f"{row['name']:<32} {row['baseline_us'] / 1e3:>9.1f} -> {row['current_us'] / 1e3:>9.1f} ms  "
+                  f"x{row['ratio']:.2f} {flag}")
+        failed = failed or any(row["regression"] for row in rows)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
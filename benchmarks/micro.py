@@ -0,0 +1,314 @@
+"""
+Micro-benchmarks for the hot paths of the engine, the game master and the scorer.
+
+Every benchmark uses fixed seeds and instances, so that timings of two runs (or two commits) can be compared:
+    graphs.<type>[<m>x<n>,<rooms>]: BaseGraph.create_<type>_graph
+    maps.metadata[<experiment>]: BaseMap.metadata with the settings of escaperoom/resources/experiment_config.json
+    assignments.*: assign_room_categories / assign_images on a fixed graph
+    env.*: MapWorldEnv.step / get_next_moves along a scripted episode
+    simulator.*, master.*: EscapeRoom._validate_player_response and full episodes with scripted players
+    scorer.*: EscapeRoomScorer.compute_scores on the interactions of a scripted episode
+
+The game master applies its rules through escaperoom/simulator.py and does not step MapWorldEnv, so both are timed.
+
+python -m benchmarks.micro --output benchmarks/results/baseline.json
+python -m benchmarks.micro --compare benchmarks/results/baseline.json --threshold 0.2
+python -m benchmarks.micro --filter graphs. scorer.
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from functools import partial
+from typing import Any, Callable, Dict, List, Tuple
+
+import networkx as nx
+import numpy as np
+from clemcore.backends.model_registry import CustomResponseModel
+from clemcore.clemgame.recorder import DefaultGameRecorder
+
+from benchmarks.common import SEED, THRESHOLD, compare, get_meta
+from engine.environment import MapWorldEnv
+from engine.graphs import BaseGraph
+from engine.map_assignments import assign_images, assign_room_categories
+from engine.maps import BaseMap
+from escaperoom.instance_format import load_instances
+from escaperoom.master import EscapeRoom
+from escaperoom.scorer import EscapeRoomScorer
+from escaperoom.simulator import EscapeRoomSimulator
+from escaperoom.utils.scripted_baselines import GAME_NAME, GAME_PATH, INSTANCES_PATH, play_episode
+
+GRAPH_TYPES = ("tree", "star", "path", "cycle", "ladder")
+GRID_SIZES = ((5, 5, 8), (10, 10, 8), (10, 10, 16), (20, 20, 32))  # (m, n, rooms)
+EXPERIMENT_CONFIG = os.path.join("escaperoom", "resources", "experiment_config.json")
+METADATA_EXPERIMENTS = ("small", "large", "high_ambiguity", "path", "ladder", "star", "tree")
+EPISODE_EXPERIMENTS = ("small", "large", "far")
+EPISODE_POLICIES = ("dfs", "protocol")  # Explorer, Guide
+MIN_TIME = 0.1  # Seconds per repeat
+REPEAT = 5
+
+# name -> setup, the setup prepares the inputs and returns the callable that is timed
+BENCHMARKS: Dict[str, Callable[[], Callable[[], Any]]] = {}
+
+
+def register(name: str, setup: Callable[[], Callable[[], Any]]):
+    if name in BENCHMARKS:
+        raise ValueError(f"Benchmark {name} is already registered")
+    BENCHMARKS[name] = setup
+
+
+_EPISODES: Dict[str, Tuple[Dict, Dict, Dict]] = {}
+
+
+def get_episode(exp_name: str) -> Tuple[Dict, Dict, Dict]:
+    """
+    Game 0 of an experiment of instances.json, played once with the scripted EPISODE_POLICIES
+
+    Returns:
+        experiment config, game instance, interactions
+    """
+    if exp_name not in _EPISODES:
+        instances = load_instances(INSTANCES_PATH, lazy=False)
+        exp = next(exp for exp in instances["experiments"] if exp["name"] == exp_name)
+        experiment = {k: v for k, v in exp.items() if k != "game_instances"}
+        game_instance = exp["game_instances"][0]
+        np.random.seed(SEED)
+        _EPISODES[exp_name] = experiment, game_instance, play_episode(experiment, game_instance, *EPISODE_POLICIES)
+    return _EPISODES[exp_name]
+
+
+def get_responses(interactions: Dict) -> List[Tuple[str, str]]:
+    """
+    Returns:
+        (role, utterance) of every player response of an episode, role is "explorer" or "guide"
+    """
+    return [("guide" if "Guide" in event["from"] else "explorer", event["action"]["content"])
+            for turn in interactions["turns"] for event in turn
+            if event["action"]["type"] == "get message"]
+
+
+def _setup_graph(graph_type: str, m: int, n: int, rooms: int):
+    create = getattr(BaseGraph, f"create_{graph_type}_graph")
+    return lambda: create(BaseGraph(m, n, rooms, SEED))
+
+
+def _setup_metadata(exp_name: str):
+    with open(EXPERIMENT_CONFIG, "r") as f:
+        config = json.load(f)[exp_name]
+
+    def run():
+        base_map = BaseMap(m=config["size"], n=config["size"], n_rooms=config["rooms"], graph_type=config["type"],
+                           seed=SEED)
+        return base_map.metadata(start_type=config["start_type"], end_type=config["end_type"],
+                                 ambiguity=config["ambiguity"], ambiguity_region=config["ambiguity_region"],
+                                 distance=config["distance"])
+    return run
+
+
+def _fixed_graph() -> nx.Graph:
+    return BaseGraph(10, 10, 8, SEED).create_cycle_graph()
+
+
+def _setup_room_categories():
+    nx_graph = _fixed_graph()
+    return lambda: assign_room_categories(nx_graph=nx_graph, ambiguity=[2], ambiguity_region="indoor",
+                                          rng=np.random.default_rng(SEED))
+
+
+def _setup_images():
+    nx_graph = _fixed_graph()
+    assign_room_categories(nx_graph=nx_graph, ambiguity=[2], ambiguity_region="indoor",
+                           rng=np.random.default_rng(SEED))
+    return lambda: assign_images(nx_graph, rng=np.random.default_rng(SEED))
+
+
+def _episode_moves(exp_name: str) -> Tuple[Dict, List[str]]:
+    _, game_instance, interactions = get_episode(exp_name)
+    moves = [utterance.split(":", 1)[1].strip().lower() for role, utterance in get_responses(interactions)
+             if role == "explorer" and utterance.upper().startswith("MOVE")]
+    return game_instance, moves
+
+
+def _setup_env_step(exp_name: str):
+    game_instance, moves = _episode_moves(exp_name)
+    env = MapWorldEnv(render_mode=None, size=game_instance["m"], map_metadata=game_instance)
+    actions = [env._move_to_action[move] for move in moves]
+
+    def run():
+        env.reset()
+        for action in actions:
+            env.step(action)
+    return run
+
+
+def _setup_env_next_moves(exp_name: str):
+    game_instance, moves = _episode_moves(exp_name)
+    env = MapWorldEnv(render_mode=None, size=game_instance["m"], map_metadata=game_instance)
+    actions = [env._move_to_action[move] for move in moves]
+
+    def run():
+        env.reset()
+        env.get_next_moves()
+        for action in actions:
+            env.step(action)
+            env.get_next_moves()
+    return run
+
+
+def _setup_simulator(exp_name: str):
+    _, game_instance, interactions = get_episode(exp_name)
+    responses = get_responses(interactions)
+
+    def run():
+        simulator = EscapeRoomSimulator(game_instance)
+        for role, utterance in responses:
+            if role == "explorer":
+                simulator.explorer_step(utterance)
+            else:
+                simulator.guide_step(utterance)
+            simulator.next_moves()
+    return run
+
+
+def _setup_validate(exp_name: str):
+    experiment, game_instance, interactions = get_episode(exp_name)
+    responses = get_responses(interactions)
+    # A game master that was set up for the instance, the recorded responses are validated in order
+    game_master = EscapeRoom(GAME_NAME, GAME_PATH,
+                             {**experiment, "explorer_policy": EPISODE_POLICIES[0],
+                              "guide_policy": EPISODE_POLICIES[1]},
+                             [CustomResponseModel(), CustomResponseModel()])
+    game_master.game_recorder = DefaultGameRecorder(GAME_NAME, experiment["name"], game_instance["game_id"],
+                                                    "benchmark")
+    game_master.setup(**game_instance)
+    players = {"explorer": game_master.explorer, "guide": game_master.guide}
+
+    def run():
+        game_master.simulator = EscapeRoomSimulator(game_instance)
+        game_master.game_recorder = DefaultGameRecorder(GAME_NAME, experiment["name"], game_instance["game_id"],
+                                                        "benchmark")
+        for role, utterance in responses:
+            game_master._validate_player_response(players[role], utterance)
+    return run
+
+
+def _setup_play_episode(exp_name: str):
+    experiment, game_instance, _ = get_episode(exp_name)
+    return lambda: play_episode(experiment, game_instance, *EPISODE_POLICIES)
+
+
+def _setup_scorer(exp_name: str):
+    experiment, game_instance, interactions = get_episode(exp_name)
+
+    def run():
+        EscapeRoomScorer(GAME_NAME, experiment, game_instance).compute_scores(interactions)
+    return run
+
+
+for _graph_type in GRAPH_TYPES:
+    for _m, _n, _rooms in GRID_SIZES:
+        register(f"graphs.{_graph_type}[{_m}x{_n},{_rooms}]", partial(_setup_graph, _graph_type, _m, _n, _rooms))
+for _exp_name in METADATA_EXPERIMENTS:
+    register(f"maps.metadata[{_exp_name}]", partial(_setup_metadata, _exp_name))
+register("assignments.room_categories[cycle,10x10,8]", _setup_room_categories)
+register("assignments.images[cycle,10x10,8]", _setup_images)
+for _exp_name in EPISODE_EXPERIMENTS:
+    register(f"env.step[{_exp_name}]", partial(_setup_env_step, _exp_name))
+    register(f"env.get_next_moves[{_exp_name}]", partial(_setup_env_next_moves, _exp_name))
+    register(f"simulator.episode[{_exp_name}]", partial(_setup_simulator, _exp_name))
+    register(f"master.validate_player_response[{_exp_name}]", partial(_setup_validate, _exp_name))
+    register(f"master.play_episode[{_exp_name}]", partial(_setup_play_episode, _exp_name))
+    register(f"scorer.compute_scores[{_exp_name}]", partial(_setup_scorer, _exp_name))
+
+
+def time_callable(fn: Callable[[], Any], min_time: float = MIN_TIME, repeat: int = REPEAT) -> Dict:
+    """
+    Time fn, the number of calls per repeat is doubled until a repeat takes at least min_time
+
+    Returns:
+        {"min_us", "median_us", "max_us": Time per call in microseconds, "number": calls per repeat,
+         "repeat": number of repeats}
+    """
+    def timed(number: int) -> float:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        return time.perf_counter() - start
+
+    number = 1
+    while timed(number) < min_time:
+        number *= 2
+    per_call = [timed(number) / number * 1e6 for _ in range(repeat)]
+    return {"min_us": min(per_call), "median_us": statistics.median(per_call), "max_us": max(per_call),
+            "number": number, "repeat": repeat}
+
+
+def select(filters: List[str] = None) -> List[str]:
+    """
+    Names of the benchmarks that contain any of filters, all benchmarks if no filter is given
+    """
+    return [name for name in BENCHMARKS if not filters or any(f in name for f in filters)]
+
+
+def run(names: List[str], min_time: float = MIN_TIME, repeat: int = REPEAT, verbose: bool = True) -> Dict:
+    """
+    Returns:
+        Timings of the benchmarks, keyed by name
+    """
+    results = {}
+    for name in names:
+        np.random.seed(SEED)
+        fn = BENCHMARKS[name]()
+        results[name] = time_callable(fn, min_time, repeat)
+        if verbose:
+            print(f"{name:<48} {results[name]['min_us']:>12.1f} us  (median {results[name]['median_us']:.1f} us, "
+                  f"{results[name]['number']} x {repeat})")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the engine, game master and scorer")
+    parser.add_argument("--filter", nargs="+", default=None, help="Only run benchmarks whose name contains any of")
+    parser.add_argument("--list", action="store_true", help="List the benchmarks and exit")
+    parser.add_argument("--min_time", type=float, default=MIN_TIME, help="Seconds per repeat")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--output", default=None, help="Write the results to this JSON file")
+    parser.add_argument("--compare", default=None, help="Results JSON of an earlier run")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="Relative slowdown that counts as regression")
+    args = parser.parse_args()
+
+    names = select(args.filter)
+    if args.list:
+        print("\n".join(names))
+        return
+    if not names:
+        parser.error(f"No benchmark matches {args.filter}")
+
+    logging.disable(logging.INFO)
+    results = run(names, args.min_time, args.repeat)
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"meta": get_meta(), "results": results}, f, indent=4)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        rows = compare(results, baseline, args.threshold)
+        print(f"\nCompared to {args.compare} (regression: > {args.threshold:.0%} slower)")
+        for row in rows:
+            flag = "REGRESSION" if row["regression"] else ""
+            print(f"{row['name']:<48} {row['baseline_us']:>12.1f} -> {row['current_us']:>12.1f} us  "
+                  f"x{row['ratio']:.2f} {flag}")
+        if any(row["regression"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
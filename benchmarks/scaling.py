@@ -0,0 +1,462 @@
+"""
+Scaling sweep over grid size and number of rooms, per graph type.
+
+Every (graph type, grid size, rooms) point runs the pipeline stages in order, each is timed (best of --repeat runs)
+and its peak memory is traced with tracemalloc in one extra run:
+    generate: BaseGraph.create_<type>_graph
+    metadata: BaseMap.metadata - room categories, images and start/target placement
+    env: MapWorldEnv.step + get_next_moves along a depth-first walk over all rooms
+    simulate: Scripted episode on the simulation core (escaperoom/simulator.py)
+    play: Scripted episode through the EscapeRoom game master
+    score: EscapeRoomScorer.compute_scores on the interactions of the played episode
+
+BaseMap.metadata needs a distinct room category per non-ambiguous room, so it fails beyond the number of categories
+in engine/resources. The later stages then run on a synthetic instance built from the generated graph (one made-up
+category per room), the records note which instance was used. Points that are infeasible for a graph type
+(e.g. an odd number of rooms for a cycle) are recorded with their error, and a stage that takes longer than
+--max_seconds (or runs out of --timeout/--max_memory_mb) is not run for larger room counts of that graph type and
+grid size.
+
+Outputs in --out_dir: scaling.json (all records), scaling.csv, scaling.md (tables and fitted exponents of
+time ~ rooms^k) and time.png/memory.png (complexity curves, needs matplotlib).
+
+python -m benchmarks.scaling --out_dir benchmarks/results/scaling
+python -m benchmarks.scaling --types tree cycle --sizes 10 50 --rooms 8 64 512 --stages generate env
+"""
+import argparse
+import ast
+import csv
+import json
+import logging
+import os
+import resource
+import signal
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Tuple
+
+import networkx as nx
+import numpy as np
+
+from benchmarks.common import SEED, get_meta
+from engine.environment import MapWorldEnv
+from engine.graphs import BaseGraph
+from engine.maps import BaseMap
+from escaperoom import solver
+from escaperoom.instancegenerator import RESOURCES_DIR
+from escaperoom.policies import get_policy
+from escaperoom.scorer import EscapeRoomScorer
+from escaperoom.simulator import simulate
+from escaperoom.utils.scripted_baselines import GAME_NAME, play_episode
+
+GRAPH_TYPES = ("tree", "star", "path", "cycle", "ladder")
+GRID_SIZES = (10, 20, 50, 100)
+ROOMS = (4, 8, 16, 32, 64, 128, 256, 512, 1000)
+STAGES = ("generate", "metadata", "env", "simulate", "play", "score")
+EXPERIMENT = "large"  # Metadata settings from experiment_config.json
+POLICIES = ("dfs", "protocol")  # Explorer, Guide
+REPEAT = 3
+MAX_SECONDS = 10.0
+TIMEOUT = 120  # Seconds per stage run
+MAX_MEMORY_MB = 8192
+PROMPTS = {
+    "explorer_prompt": os.path.join("initial_prompts", "explorer.template"),
+    "guide_prompt": os.path.join("initial_prompts", "guide.template"),
+    "explorer_reprompt": os.path.join("re_prompts", "explorer_correct_move.template"),
+    "explorer_failed_reprompt": os.path.join("re_prompts", "explorer_incorrect_move.template"),
+}
+
+
+def load_prompts() -> Dict[str, str]:
+    prompts = {}
+    for key, path in PROMPTS.items():
+        with open(os.path.join(RESOURCES_DIR, path), "r", encoding="utf-8") as f:
+            prompts[key] = f.read()
+    return prompts
+
+
+def load_settings(experiment: str = EXPERIMENT) -> Dict:
+    """
+    Returns:
+        Keyword arguments of BaseMap.metadata, from the experiment config
+    """
+    with open(os.path.join(RESOURCES_DIR, "experiment_config.json"), "r") as f:
+        config = json.load(f)[experiment]
+    return {key: config[key] for key in ("start_type", "end_type", "ambiguity", "ambiguity_region", "distance")}
+
+
+def synthetic_metadata(nx_graph: nx.Graph, m: int, n: int) -> Dict:
+    """
+    Map metadata in the format of BaseMap.metadata with one made-up category and image per room. The Explorer
+    starts in the first room and the target is the room farthest from it
+    """
+    nodes = list(nx_graph.nodes())
+    # No space before the number, the solver would read "Room 2" as a numbered (ambiguous) Room
+    categories = {node: f"Room_{i}" for i, node in enumerate(nodes)}
+    images = {node: f"room_{i}.jpg" for i, node in enumerate(nodes)}
+    distances = nx.single_source_shortest_path_length(nx_graph, nodes[0])
+    target = max(distances, key=distances.get)
+    return {
+        "graph_id": "synthetic",
+        "m": int(m),
+        "n": int(n),
+        "named_nodes": [categories[node] for node in nodes],
+        "unnamed_nodes": [str(node) for node in nodes],
+        "named_edges": [(categories[a], categories[b]) for a, b in nx_graph.edges()],
+        "unnamed_edges": [(str(a), str(b)) for a, b in nx_graph.edges()],
+        "node_to_category": {str(node): categories[node] for node in nodes},
+        "category_to_node": {categories[node]: str(node) for node in nodes},
+        "node_to_image": {str(node): images[node] for node in nodes},
+        "category_to_image": {categories[node]: images[node] for node in nodes},
+        "start_node": str(nodes[0]),
+        "target_node": str(target),
+    }
+
+
+def to_instance(map_metadata: Dict, prompts: Dict[str, str]) -> Dict:
+    """
+    Game instance as written by the instance generator - tuples as str/lists, native ints
+    """
+    game_instance = json.loads(json.dumps(map_metadata, default=lambda obj: obj.item()))
+    game_instance.update(prompts)
+    game_instance["game_id"] = 0
+    return game_instance
+
+
+def dfs_walk(game_instance: Dict) -> List[str]:
+    """
+    Moves of a depth-first walk from the start room that visits every room and backtracks over the same edges
+    """
+    graph = nx.Graph([(ast.literal_eval(a), ast.literal_eval(b)) for a, b in game_instance["unnamed_edges"]])
+    start = ast.literal_eval(game_instance["start_node"])
+    moves = []
+    for u, v, kind in nx.dfs_labeled_edges(graph, source=start):
+        if u == v or kind == "nontree":
+            continue
+        a, b = (u, v) if kind == "forward" else (v, u)
+        moves.append(MapWorldEnv._get_direction(a, b))
+    return moves
+
+
+def stage_generate(state: Dict) -> Any:
+    return getattr(BaseGraph(state["m"], state["m"], state["rooms"], SEED), f"create_{state['graph_type']}_graph")()
+
+
+def stage_metadata(state: Dict) -> Any:
+    base_map = BaseMap(state["m"], state["m"], state["rooms"], state["graph_type"], SEED)
+    return base_map.metadata(**state["settings"])
+
+
+def stage_env(state: Dict) -> Any:
+    game_instance = state["instance"]
+    env = MapWorldEnv(render_mode=None, size=game_instance["m"], map_metadata=game_instance)
+    env.reset()
+    env.get_next_moves()
+    for move in state["walk"]:
+        env.step(env._move_to_action[move])
+        env.get_next_moves()
+    return env
+
+
+def stage_simulate(state: Dict) -> Any:
+    game_instance = state["instance"]
+    return simulate(game_instance, get_policy("explorer", POLICIES[0], game_instance),
+                    get_policy("guide", POLICIES[1], game_instance))
+
+
+def stage_play(state: Dict) -> Any:
+    return play_episode({"name": EXPERIMENT}, state["instance"], *POLICIES)
+
+
+def stage_score(state: Dict) -> Any:
+    # Reference moves are cached per map, clear the caches so that every run pays for the solver
+    solver._DISTANCE_CACHE.clear()
+    solver._SOLUTION_CACHE.clear()
+    scorer = EscapeRoomScorer(GAME_NAME, {"name": EXPERIMENT}, state["instance"])
+    scorer.compute_scores(state["interactions"])
+    return scorer.scores
+
+
+STAGE_FUNCTIONS: Dict[str, Callable[[Dict], Any]] = {
+    "generate": stage_generate,
+    "metadata": stage_metadata,
+    "env": stage_env,
+    "simulate": stage_simulate,
+    "play": stage_play,
+    "score": stage_score,
+}
+# Stages that need the output of an earlier stage
+REQUIRES = {"env": "instance", "simulate": "instance", "play": "instance", "score": "interactions"}
+
+
+def _describe(error: Exception) -> str:
+    message = str(error).strip()
+    return f"{type(error).__name__}: {message.splitlines()[0] if message else ''}"
+
+
+def _on_timeout(signum, frame):
+    raise TimeoutError("stage run exceeded --timeout")
+
+
+def _call(fn: Callable[[Dict], Any], state: Dict, timeout: float) -> Any:
+    """
+    fn(state), interrupted with TimeoutError after timeout seconds (0: no limit, Unix only)
+    """
+    if not timeout or not hasattr(signal, "SIGALRM"):
+        return fn(state)
+    previous = signal.signal(signal.SIGALRM, _on_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return fn(state)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def measure(fn: Callable[[Dict], Any], state: Dict, repeat: int = REPEAT,
+            timeout: float = TIMEOUT) -> Tuple[Any, float, float]:
+    """
+    Returns:
+        The output of fn, the best time of `repeat` runs in seconds and the peak traced memory of one run in KiB
+    """
+    times = []
+    for _ in range(repeat):
+        np.random.seed(SEED)
+        start = time.perf_counter()
+        output = _call(fn, state, timeout)
+        times.append(time.perf_counter() - start)
+    np.random.seed(SEED)
+    tracemalloc.start()
+    try:
+        _call(fn, state, timeout)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return output, min(times), peak / 1024
+
+
+def limit_memory(max_memory_mb: int):
+    """
+    Cap the address space of the process, so that a stage that runs out of memory raises MemoryError
+    (recorded like any other error) instead of getting the sweep killed. Unix only
+    """
+    if max_memory_mb:
+        limit = max_memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, resource.getrlimit(resource.RLIMIT_AS)[1]))
+
+
+def run_point(graph_type: str, m: int, rooms: int, stages: List[str], settings: Dict, prompts: Dict,
+              repeat: int = REPEAT, skip: Dict[str, str] = None, timeout: float = TIMEOUT) -> List[Dict]:
+    """
+    Run the stages for one (graph type, grid size, rooms) point
+
+    Args:
+        skip: Stages that are not run, mapped to the reason
+
+    Returns:
+        One record per stage
+    """
+    skip = skip or {}
+    state = {"graph_type": graph_type, "m": m, "rooms": rooms, "settings": settings}
+    records = []
+    for stage in STAGES:
+        if stage not in stages:
+            continue
+        record = {"graph_type": graph_type, "size": m, "rooms": rooms, "stage": stage, "seconds": None,
+                  "peak_kib": None, "instance": None, "error": None}
+        records.append(record)
+        if stage in skip:
+            record["error"] = skip[stage]
+            continue
+        if stage in ("env", "simulate", "play", "score") and "instance" not in state:
+            # The metadata stage failed or did not run, build a synthetic instance from the graph
+            if state.get("graph") is None:
+                try:
+                    state["graph"] = stage_generate(state)
+                except Exception as error:
+                    state["graph"] = False
+                    state["graph_error"] = _describe(error)
+            if state["graph"] is not False:
+                state["instance"] = to_instance(synthetic_metadata(state["graph"], m, m), prompts)
+                state["instance_kind"] = "synthetic"
+        required = REQUIRES.get(stage)
+        if required is not None and required not in state:
+            record["error"] = state.get("graph_error", f"skipped: no {required}")
+            continue
+        if stage == "env" and "walk" not in state:
+            state["walk"] = dfs_walk(state["instance"])
+        record["instance"] = state.get("instance_kind")
+        try:
+            output, record["seconds"], record["peak_kib"] = measure(STAGE_FUNCTIONS[stage], state, repeat,
+                                                                        timeout)
+        except Exception as error:
+            record["error"] = _describe(error)
+            if stage == "generate":
+                state["graph"], state["graph_error"] = False, record["error"]
+            continue
+        if stage == "generate":
+            state["graph"] = output
+        elif stage == "metadata":
+            state["instance"] = to_instance(output, prompts)
+            state["instance_kind"] = "metadata"
+        elif stage == "play":
+            state["interactions"] = output
+    return records
+
+
+def sweep(graph_types: List[str], sizes: List[int], rooms: List[int], stages: List[str], settings: Dict,
+          repeat: int = REPEAT, max_seconds: float = MAX_SECONDS, timeout: float = TIMEOUT,
+          verbose: bool = True) -> List[Dict]:
+    """
+    Returns:
+        Records of all points, see run_point()
+    """
+    prompts = load_prompts()
+    records = []
+    for graph_type in graph_types:
+        for m in sizes:
+            over_budget = {}
+            for n_rooms in sorted(rooms):
+                if n_rooms > m * m:
+                    continue
+                point = run_point(graph_type, m, n_rooms, stages, settings, prompts, repeat, over_budget, timeout)
+                for record in point:
+                    if record["seconds"] is not None and record["seconds"] > max_seconds:
+                        over_budget[record["stage"]] = (f"skipped: took {record['seconds']:.1f}s at "
+                                                        f"{n_rooms} rooms, over --max_seconds")
+                    elif record["error"] and record["error"].startswith(("TimeoutError", "MemoryError")):
+                        over_budget[record["stage"]] = f"skipped: {record['error']} at {n_rooms} rooms"
+                    if verbose:
+                        result = (f"{record['seconds'] * 1e3:10.2f} ms {record['peak_kib']:10.0f} KiB"
+                                  f"{' (synthetic)' if record['instance'] == 'synthetic' else ''}"
+                                  if record["error"] is None else record["error"][:80])
+                        print(f"{graph_type:<7} {m:>4}x{m:<4} {n_rooms:>5} rooms  {record['stage']:<9} {result}")
+                records.extend(point)
+    return records
+
+
+def fit_exponents(records: List[Dict]) -> List[Dict]:
+    """
+    Exponent k of time ~ rooms^k per graph type, grid size and stage (least squares in log-log space),
+    for series with at least 3 successful points
+    """
+    series = defaultdict(list)
+    for record in records:
+        if record["seconds"]:
+            series[(record["graph_type"], record["size"], record["stage"])].append((record["rooms"],
+                                                                                   record["seconds"]))
+    fits = []
+    for (graph_type, size, stage), points in series.items():
+        if len(points) < 3:
+            continue
+        x, y = np.log([p[0] for p in points]), np.log([p[1] for p in points])
+        k = np.polyfit(x, y, 1)[0]
+        fits.append({"graph_type": graph_type, "size": size, "stage": stage, "exponent": float(k),
+                     "max_rooms": max(p[0] for p in points)})
+    return fits
+
+
+def write_tables(records: List[Dict], fits: List[Dict], out_dir: str):
+    with open(os.path.join(out_dir, "scaling.csv"), "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(records[0]))
+        writer.writeheader()
+        writer.writerows(records)
+
+    stages = list(dict.fromkeys(record["stage"] for record in records))
+    table = defaultdict(dict)
+    for record in records:
+        cell = f"{record['seconds'] * 1e3:.2f}" if record["error"] is None else "x"
+        table[(record["graph_type"], record["size"], record["rooms"])][record["stage"]] = cell
+    lines = ["# Scaling sweep", "", "Best time per stage in ms, x: failed or skipped (see scaling.json)", "",
+             "| type | grid | rooms | " + " | ".join(stages) + " |",
+             "|---|---|---|" + "---|" * len(stages)]
+    for (graph_type, size, rooms), cells in table.items():
+        lines.append(f"| {graph_type} | {size}x{size} | {rooms} | "
+                     + " | ".join(cells.get(stage, "") for stage in stages) + " |")
+    lines += ["", "## Fitted exponents, time ~ rooms^k", "", "| type | grid | stage | k | up to rooms |",
+              "|---|---|---|---|---|"]
+    for fit in fits:
+        lines.append(f"| {fit['graph_type']} | {fit['size']}x{fit['size']} | {fit['stage']} | "
+                     f"{fit['exponent']:.2f} | {fit['max_rooms']} |")
+    with open(os.path.join(out_dir, "scaling.md"), "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def plot_curves(records: List[Dict], out_dir: str):
+    """
+    One log-log plot per stage and graph type, one curve per grid size. Skipped without matplotlib
+    """
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib is not installed, no plots written")
+        return
+
+    stages = list(dict.fromkeys(record["stage"] for record in records))
+    graph_types = list(dict.fromkeys(record["graph_type"] for record in records))
+    for metric, label, file_name in (("seconds", "time [s]", "time.png"), ("peak_kib", "peak memory [KiB]",
+                                                                          "memory.png")):
+        fig, axes = plt.subplots(len(stages), len(graph_types), squeeze=False, sharex=True,
+                                 figsize=(3.5 * len(graph_types), 2.8 * len(stages)))
+        for row, stage in enumerate(stages):
+            for col, graph_type in enumerate(graph_types):
+                ax = axes[row][col]
+                curves = defaultdict(list)
+                for record in records:
+                    if record["stage"] == stage and record["graph_type"] == graph_type and record[metric]:
+                        curves[record["size"]].append((record["rooms"], record[metric]))
+                for size, points in sorted(curves.items()):
+                    ax.plot(*zip(*sorted(points)), marker="o", label=f"{size}x{size}")
+                ax.set_xscale("log")
+                ax.set_yscale("log")
+                ax.set_title(f"{graph_type} - {stage}", fontsize=9)
+                if col == 0:
+                    ax.set_ylabel(label)
+                if row == len(stages) - 1:
+                    ax.set_xlabel("rooms")
+                if curves:
+                    ax.legend(fontsize=7)
+        fig.tight_layout()
+        fig.savefig(os.path.join(out_dir, file_name), dpi=100)
+        plt.close(fig)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep grid size and number of rooms per graph type")
+    parser.add_argument("--types", nargs="+", default=list(GRAPH_TYPES), choices=list(GRAPH_TYPES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(GRID_SIZES), help="Grid sizes (m = n)")
+    parser.add_argument("--rooms", nargs="+", type=int, default=list(ROOMS))
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=list(STAGES))
+    parser.add_argument("--experiment", default=EXPERIMENT, help="Metadata settings from experiment_config.json")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--max_seconds", type=float, default=MAX_SECONDS,
+                        help="Stop a stage for larger room counts once it takes longer than this")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT, help="Seconds per stage run, 0: no limit")
+    parser.add_argument("--max_memory_mb", type=int, default=MAX_MEMORY_MB, help="Address space limit, 0: no limit")
+    parser.add_argument("--out_dir", default=os.path.join("benchmarks", "results", "scaling"))
+    parser.add_argument("--no_plots", action="store_true")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    limit_memory(args.max_memory_mb)
+    records = sweep(args.types, args.sizes, args.rooms, args.stages, load_settings(args.experiment), args.repeat,
+                    args.max_seconds, args.timeout)
+    if not records:
+        parser.error("No feasible point, every room count exceeds the grid sizes")
+    fits = fit_exponents(records)
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    with open(os.path.join(args.out_dir, "scaling.json"), "w", encoding="utf-8") as f:
+        json.dump({"meta": {**get_meta(), "experiment": args.experiment, "repeat": args.repeat},
+                   "records": records, "exponents": fits}, f, indent=4)
+    write_tables(records, fits, args.out_dir)
+    if not args.no_plots:
+        plot_curves(records, args.out_dir)
+    print(f"Results written to {args.out_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,379 @@
+"""
+Exhaustive enumeration of the room layouts of a graph type on a grid, up to translation, rotation and reflection.
+
+BaseGraph samples one random layout per seed, this module lists every layout of k rooms exactly once:
+    tree: Every tree of doors between grid neighbours (lattice trees)
+    path: Trees without branches, i.e. self-avoiding walks (BaseGraph.create_path_graph)
+    star: Trees with a room that has 4 doors (BaseGraph.create_star_graph)
+    cycle: Simple cycles, every room has 2 doors (BaseGraph.create_cycle_graph only builds the 2 x k/2 rectangle)
+    ladder: The rooms of a cycle with a door between every pair of neighbouring rooms (BaseGraph.create_ladder_graph)
+
+Trees are grown one door at a time with Redelmeier's algorithm, which visits every connected set of doors once per
+translation: a door is identified by its upper/left room and direction, the smallest door of the layout is fixed at
+the origin, and every door that was tried at a level is excluded from the branches that follow it. Rooms are a
+bitboard (one bit per cell), so the checks for cycles and degrees are bit tests. Doors that close a cycle (or give a
+room a third door, for paths) can never be added later in the branch and are dropped right away.
+A layout is only yielded if it is the smallest of its 8 rotations/reflections, which removes the symmetric copies
+without keeping the layouts seen so far in memory - except for ladders, where different cycles can cover the same
+rooms.
+
+Layouts are streamed, and placed in the orientation that fits the m x n grid. Rooms that would make the bounding box
+too large for the grid in both orientations are pruned while growing, so small grids are fast. With 12 rooms and no
+grid limit there are 60k fixed paths (seconds) and 3.15M fixed trees (about a minute for the 394k free trees); on a
+4 x 4 grid the 17k trees take seconds.
+
+python engine/enumerate_layouts.py --type path --rooms 10 --count
+python engine/enumerate_layouts.py --type cycle --rooms 12 --m 10 --n 10 --output cycles_12.jsonl
+"""
+import argparse
+import json
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+import networkx as nx
+
+from engine.map_hashing import TRANSFORMS
+
+LAYOUT_TYPES = ("tree", "path", "star", "cycle", "ladder")
+
+Node = Tuple[int, int]
+
+
+class Layout(NamedTuple):
+    """
+    Rooms and doors of a layout, in grid coordinates (x < m, y < n as in BaseGraph), sorted
+    """
+    nodes: Tuple[Node, ...]
+    edges: Tuple[Tuple[Node, Node], ...]
+
+    def to_graph(self, offset: Node = (0, 0)) -> nx.Graph:
+        """
+        Returns:
+            The layout as a networkx graph, like BaseGraph.create_*_graph, shifted by offset
+        """
+        dx, dy = offset
+        graph = nx.Graph()
+        graph.add_nodes_from((x + dx, y + dy) for x, y in self.nodes)
+        graph.add_edges_from(((a[0] + dx, a[1] + dy), (b[0] + dx, b[1] + dy)) for a, b in self.edges)
+        return graph
+
+
+def _grow_trees(k: int, max_degree: int = 4, box: Tuple[int, int] = None) -> Iterator[List[Tuple[Node, Node]]]:
+    """
+    Redelmeier's algorithm over doors: every tree of k rooms (k - 1 doors) with at most max_degree doors per room,
+    once per translation
+
+    Args:
+        box: Only trees that fit in a box of this size, in some orientation
+
+    Yields:
+        Doors as ((x, y), (x2, y2)) pairs, the list is reused - copy it to keep it
+    """
+    if k == 1:
+        yield []
+        return
+    # Rooms are bits y * stride + x of the bitboard, the smallest door is anchored at (k, 0), so every room has
+    # 0 <= x < 2k and 0 <= y < k. A door is (anchor room << 1) | direction (0: to x + 1, 1: to y + 1), the order of
+    # the door ids is the order of (y, x, direction)
+    stride = 2 * k + 1
+    steps = (1, stride)
+    degree = [0] * (stride * (k + 1))
+    doors = []
+    state = {"rooms": 0, "seen": 0}
+    short, long = sorted(box) if box is not None else (k, k)
+    bounds = [k, k, 0]  # Bounding box: min x, max x, max y (min y is 0)
+
+    def fits(room: int) -> bool:
+        x, y = room % stride, room // stride
+        width = max(bounds[1], x) - min(bounds[0], x) + 1
+        height = max(bounds[2], y) + 1
+        return max(width, height) <= long and min(width, height) <= short
+
+    def incident(room: int) -> Tuple[int, int, int, int]:
+        return room << 1, (room - 1) << 1, (room << 1) | 1, ((room - stride) << 1) | 1
+
+    def expand(room: int, origin: int) -> List[int]:
+        new = []
+        seen = state["seen"]
+        for door in incident(room):
+            if door > origin and not seen >> door & 1:
+                new.append(door)
+                seen |= 1 << door
+        state["seen"] = seen
+        return new
+
+    def recurse(untried: List[int], origin: int, n_doors: int):
+        while untried:
+            door = untried.pop()
+            a = door >> 1
+            b = a + steps[door & 1]
+            rooms = state["rooms"]
+            has_a, has_b = rooms >> a & 1, rooms >> b & 1
+            if has_a and has_b:
+                continue  # Would close a cycle
+            old, new_room = (a, b) if has_a else (b, a)
+            if degree[old] >= max_degree or not fits(new_room):
+                continue
+            saved_bounds = bounds[:]
+            x, y = new_room % stride, new_room // stride
+            bounds[:] = min(bounds[0], x), max(bounds[1], x), max(bounds[2], y)
+            state["rooms"] = rooms | (1 << new_room)
+            degree[old] += 1
+            degree[new_room] = 1
+            doors.append(door)
+            if n_doors + 1 == k - 1:
+                yield doors
+            else:
+                new = expand(new_room, origin)
+                yield from recurse(untried + new, origin, n_doors + 1)
+                for d in new:
+                    state["seen"] &= ~(1 << d)
+            doors.pop()
+            degree[old] -= 1
+            degree[new_room] = 0
+            state["rooms"] = rooms
+            bounds[:] = saved_bounds
+
+    def decode(door: int) -> Tuple[Node, Node]:
+        a = door >> 1
+        b = a + steps[door & 1]
+        return (a % stride, a // stride), (b % stride, b // stride)
+
+    for direction in (0, 1):
+        origin = (k << 1) | direction
+        a, b = k, k + steps[direction]
+        bounds[:] = k, k, 0
+        if not fits(b):
+            continue
+        bounds[:] = k, k + 1 - direction, direction
+        state["rooms"] = (1 << a) | (1 << b)
+        state["seen"] = 1 << origin
+        degree[a], degree[b] = 1, 1
+        doors.append(origin)
+        if k == 2:
+            yield [decode(origin)]
+        else:
+            untried = expand(a, origin) + expand(b, origin)
+            for fixed in recurse(untried, origin, 1):
+                yield [decode(door) for door in fixed]
+        doors.clear()
+        degree[a], degree[b] = 0, 0
+
+
+def _form(edges: List[Tuple[Node, Node]], transform) -> Tuple:
+    """
+    Layout moved by transform and translated to the origin, as (height, width, rooms, doors) - comparable, the
+    smallest form over the 8 transforms is the canonical one
+    """
+    moved = [(transform(*a), transform(*b)) for a, b in edges]
+    min_x = min(min(a[0], b[0]) for a, b in moved)
+    min_y = min(min(a[1], b[1]) for a, b in moved)
+    moved = [((a[0] - min_x, a[1] - min_y), (b[0] - min_x, b[1] - min_y)) for a, b in moved]
+    moved = [(a, b) if a < b else (b, a) for a, b in moved]
+    nodes = sorted({node for edge in moved for node in edge})
+    width = max(x for x, _ in nodes) + 1
+    height = max(y for _, y in nodes) + 1
+    return height, width, tuple(nodes), tuple(sorted(moved))
+
+
+# TRANSFORMS on the bounding box of a layout, as coefficients of
+#     x' = a * x + b * y + ca * (width - 1) + cb * (height - 1)
+#     y' = d * x + e * y + fa * (width - 1) + fb * (height - 1)
+# (a, b, ca, cb, d, e, fa, fb, swapped), swapped if width and height are swapped
+_BOX_TRANSFORMS = (
+    (1, 0, 0, 0, 0, 1, 0, 0, False),
+    (0, 1, 0, 0, -1, 0, 1, 0, True),
+    (-1, 0, 1, 0, 0, -1, 0, 1, False),
+    (0, -1, 0, 1, 1, 0, 0, 0, True),
+    (-1, 0, 1, 0, 0, 1, 0, 0, False),
+    (1, 0, 0, 0, 0, -1, 0, 1, False),
+    (0, 1, 0, 0, 1, 0, 0, 0, True),
+    (0, -1, 0, 1, -1, 0, 1, 0, True),
+)
+
+
+def _canonical(edges: List[Tuple[Node, Node]]) -> Optional[Tuple]:
+    """
+    Returns:
+        (height, width, rooms, doors) bitboards of the layout if it is the smallest of its 8 rotations/reflections,
+        else None
+    """
+    nodes = {node for edge in edges for node in edge}
+    xs = [x for x, _ in nodes]
+    ys = [y for _, y in nodes]
+    min_x, min_y = min(xs), min(ys)
+    width, height = max(xs) - min_x + 1, max(ys) - min_y + 1
+    if height > width:
+        return None  # A rotation is lower
+    stride = width
+    # Bit of room (x, y) after a transform is p * x + q * y + r, with x and y relative to the bounding box
+    nodes = [(x - min_x, y - min_y) for x, y in nodes]
+
+    def bits(coefficients) -> Tuple[int, int, int]:
+        a, b, ca, cb, d, e, fa, fb, _ = coefficients
+        offset_x = ca * (width - 1) + cb * (height - 1)
+        offset_y = fa * (width - 1) + fb * (height - 1)
+        return d * stride + a, e * stride + b, offset_y * stride + offset_x
+
+    def rooms(coefficients) -> int:
+        p, q, r = bits(coefficients)
+        return sum(1 << (p * x + q * y + r) for x, y in nodes)
+
+    def doors(coefficients) -> int:
+        p, q, r = bits(coefficients)
+        board = 0
+        for (ax, ay), (bx, by) in edges:
+            a = p * (ax - min_x) + q * (ay - min_y) + r
+            b = p * (bx - min_x) + q * (by - min_y) + r
+            # Door bit: 2 * upper/left room + 1 if vertical
+            board |= 1 << (2 * min(a, b) + (abs(a - b) != 1))
+        return board
+
+    identity = _BOX_TRANSFORMS[0]
+    form_rooms = rooms(identity)
+    ties = []
+    # Transforms that swap width and height give a larger bounding box, unless it is a square
+    for coefficients in _BOX_TRANSFORMS[1:]:
+        if coefficients[-1] and width != height:
+            continue
+        moved = rooms(coefficients)
+        if moved < form_rooms:
+            return None
+        if moved == form_rooms:
+            ties.append(coefficients)
+    form_doors = doors(identity)
+    for coefficients in ties:
+        if doors(coefficients) < form_doors:
+            return None
+    return height, width, form_rooms, form_doors
+
+
+def _fit(edges: List[Tuple[Node, Node]], m: int, n: int) -> Optional[Layout]:
+    """
+    Returns:
+        The layout in the first orientation (in TRANSFORMS order) that fits in the m x n grid, None if none fits
+    """
+    for transform in TRANSFORMS:
+        height, width, nodes, doors = _form(edges, transform)
+        if width <= m and height <= n:
+            return Layout(nodes, doors)
+    return None
+
+
+def _closing_door(path: List[Tuple[Node, Node]]) -> Optional[Tuple[Node, Node]]:
+    """
+    Door between the two ends of a path, if they are neighbours
+    """
+    counts = {}
+    for a, b in path:
+        counts[a] = counts.get(a, 0) + 1
+        counts[b] = counts.get(b, 0) + 1
+    ends = sorted(node for node, count in counts.items() if count == 1)
+    (x1, y1), (x2, y2) = ends
+    if abs(x1 - x2) + abs(y1 - y2) != 1:
+        return None
+    return ends[0], ends[1]
+
+
+def _fixed_layouts(layout_type: str, k: int, box: Tuple[int, int] = None) -> Iterator[List[Tuple[Node, Node]]]:
+    """
+    Every layout of the type that fits in box (in some orientation) once per translation (ladders once per covering
+    cycle)
+    """
+    if layout_type in ("tree", "star"):
+        for edges in _grow_trees(k, box=box):
+            if layout_type == "tree" or _has_hub(edges):
+                yield edges
+    elif layout_type == "path":
+        yield from _grow_trees(k, max_degree=2, box=box)
+    else:
+        if k < 4 or k % 2:
+            return  # Cycles on the grid have an even number of rooms
+        for path in _grow_trees(k, max_degree=2, box=box):
+            door = _closing_door(path)
+            # A cycle is the closed version of k paths, keep the one that leaves out its largest door
+            if door is not None and all(door > (a, b) for a, b in path):
+                cycle = path + [door]
+                yield _ladder(cycle) if layout_type == "ladder" else cycle
+
+
+def _has_hub(edges: List[Tuple[Node, Node]]) -> bool:
+    counts = {}
+    for a, b in edges:
+        counts[a] = counts.get(a, 0) + 1
+        counts[b] = counts.get(b, 0) + 1
+    return max(counts.values()) == 4
+
+
+def _ladder(cycle: List[Tuple[Node, Node]]) -> List[Tuple[Node, Node]]:
+    rooms = {node for edge in cycle for node in edge}
+    return [((x, y), (x + dx, y + dy)) for x, y in sorted(rooms) for dx, dy in ((1, 0), (0, 1))
+            if (x + dx, y + dy) in rooms]
+
+
+def enumerate_layouts(layout_type: str, k: int, m: int = None, n: int = None) -> Iterator[Layout]:
+    """
+    Every layout of k rooms of a graph type that fits in an m x n grid, up to translation, rotation and reflection
+
+    Args:
+        layout_type: One of LAYOUT_TYPES
+        k: Number of rooms
+        m, n: Grid size as in BaseGraph, no limit if None
+
+    Yields:
+        Layouts, in the orientation that fits the grid, anchored at (0, 0)
+    """
+    if layout_type not in LAYOUT_TYPES:
+        raise ValueError(f"Unknown layout type {layout_type}, expected one of {LAYOUT_TYPES}")
+    m = m if m is not None else k
+    n = n if n is not None else k
+    if k == 1:
+        if layout_type in ("tree", "path") and m >= 1 and n >= 1:
+            yield Layout(((0, 0),), ())
+        return
+
+    seen = set() if layout_type == "ladder" else None
+    for edges in _fixed_layouts(layout_type, k, (m, n)):
+        form = _canonical(edges)
+        if form is None:
+            continue
+        if seen is not None:
+            if form in seen:
+                continue
+            seen.add(form)
+        layout = _fit(edges, m, n)
+        if layout is not None:
+            yield layout
+
+
+def count_layouts(layout_type: str, k: int, m: int = None, n: int = None) -> int:
+    return sum(1 for _ in enumerate_layouts(layout_type, k, m, n))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Enumerate every layout of a graph type, up to symmetry")
+    parser.add_argument("--type", dest="layout_type", required=True, choices=LAYOUT_TYPES)
+    parser.add_argument("--rooms", type=int, required=True)
+    parser.add_argument("--m", type=int, default=None, help="Grid size, no limit by default")
+    parser.add_argument("--n", type=int, default=None)
+    parser.add_argument("--count", action="store_true", help="Only count the layouts")
+    parser.add_argument("--output", default=None, help="Write one layout per line, {'nodes': ..., 'edges': ...}")
+    args = parser.parse_args()
+
+    layouts = enumerate_layouts(args.layout_type, args.rooms, args.m, args.n)
+    if args.count:
+        print(sum(1 for _ in layouts))
+        return
+    if args.output:
+        total = 0
+        with open(args.output, "w", encoding="utf-8") as f:
+            for layout in layouts:
+                f.write(json.dumps({"nodes": layout.nodes, "edges": layout.edges}) + "\n")
+                total += 1
+        print(f"Wrote {total} layouts to {args.output}")
+        return
+    for layout in layouts:
+        print(json.dumps({"nodes": layout.nodes, "edges": layout.edges}))
+
+
+if __name__ == '__main__':
+    main()
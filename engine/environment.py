@@ -2,7 +2,6 @@
 
 import gymnasium as gym
 from gymnasium import spaces
-import pygame
 import numpy as np
 from typing import Dict, Tuple
 import ast
@@ -13,6 +12,15 @@ import logging
 logger = logging.getLogger(__name__)
 stdout_logger = logging.getLogger("mapworld.environment")
 
+
+def _pygame():
+    """
+    pygame is only imported once a frame is rendered, the game never renders
+    """
+    import pygame
+    return pygame
+
+
 class MapWorldEnv(gym.Env):
     metadata = {"render_modes": ["human", "rgb_array"], "render_fps": 2}
 
@@ -162,6 +170,7 @@ class MapWorldEnv(gym.Env):
             return self._render_frame()
 
     def _draw_rect(self, canvas, color, pos, pix_square_size, room_ratio, label):
+        pygame = _pygame()
 
         # Define rectangle dimensions
         pygame.draw.rect(
@@ -201,9 +210,10 @@ class MapWorldEnv(gym.Env):
             start_pos[1] = start_pos[1] - room_ratio / 2
             end_pos[1] = end_pos[1] + room_ratio / 2
 
-        pygame.draw.line(canvas, color, start_pos, end_pos)
+        _pygame().draw.line(canvas, color, start_pos, end_pos)
 
     def _render_frame(self):
+        pygame = _pygame()
         if self.window is None and self.render_mode == "human":
             pygame.init()
             pygame.display.init()
@@ -332,6 +342,7 @@ class MapWorldEnv(gym.Env):
 
     def close(self):
         if self.window is not None:
+            pygame = _pygame()
             pygame.display.quit()
             pygame.quit()
 
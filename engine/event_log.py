@@ -0,0 +1,197 @@
+"""
+Structured, level-gated event logging for the hot paths of map generation and the game master.
+
+An event is a name and keyword fields - events.info("set_positions", start=start_pos, target=target_pos).
+The message "set_positions start=(1, 2) target=(3, 3)" is only formatted when a handler writes the record, and the
+record is only created when the event passes the level of its subsystem and of the standard library logger.
+
+Levels are set per subsystem, the most specific prefix wins ("engine.maps" before "engine"):
+    MAPWORLD_LOG_LEVELS="engine=INFO,escaperoom.master=DEBUG"
+or set_level("engine", logging.INFO). The generation and game master subsystems default to WARNING, so bulk
+generation and simulation runs do not write every room list and prompt to clembench.log.
+
+Events below the level are not lost: every thread keeps the last RING_SIZE events (references to the fields, not
+copies) in a ring buffer. flush_events() writes them, and capture_failures() does so when the block raises:
+    with capture_failures("metadata"):
+        ...
+The ring size is set with MAPWORLD_LOG_RING, 0 disables the ring buffer.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+ENV_LEVELS = "MAPWORLD_LOG_LEVELS"
+ENV_RING = "MAPWORLD_LOG_RING"
+DEFAULT_LEVELS = {"engine": logging.WARNING, "escaperoom.master": logging.WARNING}
+RING_SIZE = 256
+
+_levels: Dict[str, int] = {}
+_loggers: Dict[str, "EventLogger"] = {}
+_local = threading.local()
+
+
+class Event:
+    """
+    Log message that is formatted on first use
+    """
+    __slots__ = ("event", "fields")
+
+    def __init__(self, event: str, fields: Dict):
+        self.event = event
+        self.fields = fields
+
+    def __str__(self) -> str:
+        if not self.fields:
+            return self.event
+        return self.event + " " + " ".join(f"{key}={value}" for key, value in self.fields.items())
+
+
+def parse_levels(spec: str) -> Dict[str, int]:
+    """
+    Args:
+        spec: Comma separated subsystem=LEVEL pairs, e.g. "engine=INFO,escaperoom.master=DEBUG"
+    """
+    levels = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        subsystem, _, name = item.partition("=")
+        name = name.strip().upper()
+        level = int(name) if name.isdigit() else logging.getLevelName(name)
+        if not isinstance(level, int):
+            raise ValueError(f"Unknown log level {name} for {subsystem} in {ENV_LEVELS}")
+        levels[subsystem.strip()] = level
+    return levels
+
+
+def configure(levels: Dict[str, int] = None, ring_size: int = None):
+    """
+    Reset the subsystem levels to the defaults, MAPWORLD_LOG_LEVELS and levels (in that order), and the ring size
+    """
+    _levels.clear()
+    _levels.update(DEFAULT_LEVELS)
+    _levels.update(parse_levels(os.environ.get(ENV_LEVELS, "")))
+    _levels.update(levels or {})
+    global RING_SIZE
+    if ring_size is None:
+        ring_size = int(os.environ.get(ENV_RING, RING_SIZE))
+    RING_SIZE = ring_size
+    _local.__dict__.clear()  # Ring buffers of the current thread are recreated with the new size
+    for event_logger in _loggers.values():
+        event_logger.level = resolve_level(event_logger.subsystem)
+
+
+def set_level(subsystem: str, level: int):
+    _levels[subsystem] = level
+    for event_logger in _loggers.values():
+        event_logger.level = resolve_level(event_logger.subsystem)
+
+
+def resolve_level(subsystem: str) -> int:
+    """
+    Returns:
+        Level of the most specific configured prefix of subsystem, NOTSET (the standard library level applies)
+        if there is none
+    """
+    parts = subsystem.split(".")
+    for i in range(len(parts), 0, -1):
+        prefix = ".".join(parts[:i])
+        if prefix in _levels:
+            return _levels[prefix]
+    return logging.NOTSET
+
+
+def _ring() -> deque:
+    ring = getattr(_local, "ring", None)
+    if ring is None:
+        ring = _local.ring = deque(maxlen=RING_SIZE)
+    return ring
+
+
+class EventLogger:
+    """
+    Logs events of one subsystem through the standard library logger of the same name
+    """
+
+    def __init__(self, subsystem: str):
+        self.subsystem = subsystem
+        self.logger = logging.getLogger(subsystem)
+        self.level = resolve_level(subsystem)
+
+    def is_enabled_for(self, level: int) -> bool:
+        return level >= self.level and self.logger.isEnabledFor(level)
+
+    def log(self, level: int, event: str, **fields):
+        if RING_SIZE:
+            _ring().append((time.time(), level, self.subsystem, event, fields))
+        if level >= self.level and self.logger.isEnabledFor(level):
+            self.logger.log(level, Event(event, fields), stacklevel=3)
+
+    def debug(self, event: str, **fields):
+        self.log(logging.DEBUG, event, **fields)
+
+    def info(self, event: str, **fields):
+        self.log(logging.INFO, event, **fields)
+
+    def warning(self, event: str, **fields):
+        self.log(logging.WARNING, event, **fields)
+
+    def error(self, event: str, **fields):
+        self.log(logging.ERROR, event, **fields)
+
+
+def get_event_logger(subsystem: str) -> EventLogger:
+    if subsystem not in _loggers:
+        _loggers[subsystem] = EventLogger(subsystem)
+    return _loggers[subsystem]
+
+
+def recent_events() -> List[Tuple[float, int, str, str, Dict]]:
+    """
+    Returns:
+        (time, level, subsystem, event, fields) of the buffered events of the current thread, oldest first
+    """
+    return list(_ring())
+
+
+def clear_events():
+    _ring().clear()
+
+
+def flush_events(reason: str, level: int = logging.WARNING) -> int:
+    """
+    Write the buffered events of the current thread at level, regardless of the subsystem levels, and clear them
+
+    Returns:
+        The number of events written
+    """
+    events = recent_events()
+    clear_events()
+    if not events:
+        return 0
+    logger = logging.getLogger(__name__)
+    logger.log(level, f"{reason}, last {len(events)} events:")
+    for timestamp, event_level, subsystem, event, fields in events:
+        logger.log(level, "%s %s %s: %s", time.strftime("%H:%M:%S", time.localtime(timestamp)),
+                   logging.getLevelName(event_level), subsystem, Event(event, fields))
+    return len(events)
+
+
+@contextmanager
+def capture_failures(name: str) -> Iterator[None]:
+    """
+    Start with an empty ring buffer, and flush it if the block raises
+    """
+    clear_events()
+    try:
+        yield
+    except Exception as error:
+        flush_events(f"{name} failed with {type(error).__name__}: {error}")
+        raise
+
+
+configure()
@@ -1,11 +1,12 @@
 import networkx as nx
 import numpy as np
-import matplotlib.pyplot as plt
-from typing import List, Set
+from typing import List, Set, Tuple
 from collections import deque
-import logging
+from functools import lru_cache
 
-logger = logging.getLogger(__name__)
+from engine.event_log import get_event_logger
+
+events = get_event_logger(__name__)
 
 # NOTE: Terminology - Shift to README
 """
@@ -21,6 +22,33 @@ All graph types can be formed by creating their nx counterparts, but the assignm
 becomes more complex, so create each graph type here
 """
 
+# Order in which neighbors are listed, the random draws of the builders depend on it
+MOVES = ((0, 1), (0, -1), (1, 0), (-1, 0))
+
+
+def cell_bit(node, n: int) -> int:
+    """
+    Bit of a node in an occupancy bitboard of a grid with n columns - cell x * n + y
+    """
+    return 1 << (int(node[0]) * n + int(node[1]))
+
+
+@lru_cache(maxsize=None)
+def neighbor_table(m: int, n: int) -> Tuple[Tuple[Tuple[Tuple[int, int], int], ...], ...]:
+    """
+    Precomputed neighbors of every cell of an m x n grid
+
+    Returns:
+        For cell x * n + y, the ((x2, y2), bit of (x2, y2)) of its neighbors inside the grid, in the order of MOVES
+    """
+    table = []
+    for x in range(m):
+        for y in range(n):
+            table.append(tuple(((x + dx, y + dy), 1 << ((x + dx) * n + y + dy)) for dx, dy in MOVES
+                               if 0 <= x + dx < m and 0 <= y + dy < n))
+    return tuple(table)
+
+
 class BaseGraph:
 
     def __init__(self, m: int = 3, n: int = 3, n_rooms: int = 9, seed: int = None):
@@ -39,7 +67,7 @@ class BaseGraph:
 
         assert n_rooms <= m * n, "Number of rooms cannot exceed grid size"
 
-        logger.info(f"Initializing graph with {n_rooms} rooms, in a {m} x {n} grid")
+        events.info("init_graph", n_rooms=n_rooms, m=m, n=n)
         self.m = m
         self.n = n
         self.n_rooms = n_rooms
@@ -47,7 +75,8 @@ class BaseGraph:
 
 
     @staticmethod
-    def get_valid_neighbors(current_pos: np.array = np.array([0, 0]), visited: List|Set = None, m: int = 3, n: int = 3):
+    def get_valid_neighbors(current_pos: np.array = np.array([0, 0]), visited: int|List|Set = None, m: int = 3,
+                            n: int = 3):
         """
         Get a list of all 'Valid' neighboring nodes.
         Valid neighboring room is defined as a node in the grid that has not been set as a room.
@@ -55,22 +84,16 @@ class BaseGraph:
 
         Args:
             current_pos: Position of the current/given room.
-            visited: List of visited rooms.
+            visited: Occupancy bitboard of the visited rooms (see cell_bit), or a list/set of visited rooms.
             m: Number of rows in the graph.
             n: Number of columns in the graph
         """
-
-        if visited is None:
-            visited = []
-        possible_moves = [[0, 1], [0, -1], [1, 0], [-1, 0]]
-        valid_neighbors = []
-        for move in possible_moves:
-            next_pos = (current_pos[0] + move[0], current_pos[1] + move[1])
-
-            if 0 <= next_pos[0] < m and 0 <= next_pos[1] < n and tuple(next_pos) not in visited:
-                valid_neighbors.append(next_pos)
-
-        return valid_neighbors
+        neighbors = neighbor_table(m, n)[int(current_pos[0]) * n + int(current_pos[1])]
+        if not visited:
+            return [node for node, _ in neighbors]
+        if isinstance(visited, int):
+            return [node for node, bit in neighbors if not visited & bit]
+        return [node for node, _ in neighbors if node not in visited]
 
     def create_tree_graph(self):
         """
@@ -78,28 +101,29 @@ class BaseGraph:
             tree_graph: nx.Graph of Tree type created using basic BFS
 
         """
-        logger.info(f"Creating tree graph with {self.m} x {self.n} rooms")
+        events.info("create_graph", graph_type="tree", m=self.m, n=self.n)
         tree_graph = nx.Graph()
-        visited = set()
 
         # Start node
-        start_node = (self.graph_rng.integers(0, self.m), self.graph_rng.integers(0, self.n))
+        start_node = (int(self.graph_rng.integers(0, self.m)), int(self.graph_rng.integers(0, self.n)))
         queue = deque()
         queue.append(start_node)
-        visited.add(start_node)
+        occupied = cell_bit(start_node, self.n)
+        n_visited = 1
         tree_graph.add_node(start_node)
 
-        while len(visited) < self.n_rooms and queue:
+        while n_visited < self.n_rooms and queue:
             current_node = queue.popleft()
-            neighbors = self.get_valid_neighbors(current_node, visited, self.m, self.n)
+            neighbors = self.get_valid_neighbors(current_node, occupied, self.m, self.n)
 
             self.graph_rng.shuffle(neighbors)
 
             for next_node in neighbors:
-                if len(visited) >= self.n_rooms:
+                if n_visited >= self.n_rooms:
                     break
 
-                visited.add(next_node)
+                occupied |= cell_bit(next_node, self.n)
+                n_visited += 1
                 tree_graph.add_node(next_node)
                 tree_graph.add_edge(current_node, next_node)
                 queue.append(next_node)
@@ -124,33 +148,32 @@ class BaseGraph:
         if self.n_rooms < 5:
             raise ValueError(f"Need at least 5 rooms for a star (got {self.n_rooms}).")
 
-        logger.info(f"Creating star graph with {self.m} x {self.n} rooms")
+        events.info("create_graph", graph_type="star", m=self.m, n=self.n)
 
         star_graph = nx.Graph()
-        visited = set()
 
         # Pick a random room with padding of 1 on the borders
-        center = (self.graph_rng.integers(1, self.m-1), self.graph_rng.integers(1, self.n-1))
+        center = (int(self.graph_rng.integers(1, self.m-1)), int(self.graph_rng.integers(1, self.n-1)))
         star_graph.add_node(center)
-        visited.add(center)
+        occupied = cell_bit(center, self.n)
+        n_visited = 1
 
         # Add the 4 orthogonal neighbors/arms
         arms = []
-        for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-            nb = (center[0] + dx, center[1] + dy)
-            if 0 <= nb[0] < self.m and 0 <= nb[1] < self.n:
-                star_graph.add_node(nb)
-                star_graph.add_edge(center, nb)
-                visited.add(nb)
-                arms.append(nb)
+        for nb, bit in neighbor_table(self.m, self.n)[center[0] * self.n + center[1]]:
+            star_graph.add_node(nb)
+            star_graph.add_edge(center, nb)
+            occupied |= bit
+            n_visited += 1
+            arms.append(nb)
         assert len(arms) == 4, "Check the configuration for arms/central room"
 
         # If more n_rooms remain, attach them one by one to a random arm
-        while len(visited) < self.n_rooms:
-            # pick a random endpoint from the current arms
-            endpoint =tuple(self.graph_rng.choice(arms))
+        while n_visited < self.n_rooms:
+            # pick a random endpoint from the current arms (same draw as choice(arms), without the array copy)
+            endpoint = arms[self.graph_rng.choice(len(arms))]
             # find its valid unvisited neighbors
-            vn = [tuple(p) for p in self.get_valid_neighbors(endpoint, visited, self.m, self.n)]
+            vn = self.get_valid_neighbors(endpoint, occupied, self.m, self.n)
             if not vn:
                 # if this arm is stuck, remove it from arms and continue
                 arms.remove(endpoint)
@@ -159,10 +182,11 @@ class BaseGraph:
                                      f"For the given {self.n_rooms}, try increasing the grid size")
                 continue
 
-            new_room = tuple(self.graph_rng.choice(vn))
+            new_room = vn[self.graph_rng.choice(len(vn))]
             star_graph.add_node(new_room)
             star_graph.add_edge(endpoint, new_room)
-            visited.add(new_room)
+            occupied |= cell_bit(new_room, self.n)
+            n_visited += 1
             arms.append(new_room)
 
         return star_graph
@@ -184,19 +208,21 @@ class BaseGraph:
         # start = (random.randrange(self.m), random.randrange(self.n))
         start = (int(self.m/2), int(self.n/2)) # Hardcode start pos for more flexible walk, more space to explore
         visited.append(start)
+        occupied = cell_bit(start, self.n)
         path_graph.add_node(start)
 
         while len(visited) < self.n_rooms:
             curr = visited[-1]
-            nbrs = [tuple(nb) for nb in self.get_valid_neighbors(curr, visited, self.m, self.n)]
+            nbrs = self.get_valid_neighbors(curr, occupied, self.m, self.n)
             if not nbrs:
                 raise ValueError(
                     f"Stuck at {curr} after {len(visited)} nodes; Likely due to a spiral config "
                     f"\nVisited the following nodes - {visited}"
                     f"\nCannot extend to {self.n_rooms}. Try another random seed"
                 )
-            nxt = tuple(self.graph_rng.choice(nbrs))
+            nxt = nbrs[self.graph_rng.choice(len(nbrs))]
             visited.append(nxt)
+            occupied |= cell_bit(nxt, self.n)
             path_graph.add_node(nxt)
             path_graph.add_edge(curr, nxt)
 
@@ -211,16 +237,16 @@ class BaseGraph:
             RuntimeError: If all attempts fail.
         """
         max_attempts = 20
-        logger.info(f"Creating path graph with {self.m} x {self.n} rooms, with max_attempts {max_attempts}")
+        events.info("create_graph", graph_type="path", m=self.m, n=self.n, max_attempts=max_attempts)
 
         for attempt in range(max_attempts):
             try:
-                logger.info(f"Attempt {attempt+1}...")
+                events.debug("path_attempt", attempt=attempt + 1)
                 path_graph = self._create_path_graph()
-                logger.info(f"Success on attempt {attempt+1}")
+                events.info("path_success", attempt=attempt + 1)
                 return path_graph
             except ValueError as e:
-                logger.info(f"Attempt {attempt+1} failed: {e}")
+                events.info("path_attempt_failed", attempt=attempt + 1, error=e)
 
         raise RuntimeError(
             f"Failed to create a path graph after {max_attempts} attempts. "
@@ -292,11 +318,13 @@ class BaseGraph:
 
     @staticmethod
     def plot_graph(nx_graph):
+        import matplotlib.pyplot as plt  # Deferred, only plotting needs matplotlib
         nx.draw_networkx(nx_graph, pos={n: n for n in nx_graph.nodes()})
         plt.show()
 
     @staticmethod
     def save_graph(nx_graph, path: str):
+        import matplotlib.pyplot as plt
         nx.draw_networkx(nx_graph, pos={n: n for n in nx_graph.nodes()})
         plt.savefig(path, bbox_inches='tight')
         plt.close()
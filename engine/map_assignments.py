@@ -3,14 +3,14 @@
 import json
 import os
 from typing import Tuple, Dict, List
-import logging
 
 import numpy as np
 import networkx as nx
 
 import engine.map_utils as map_utils
+from engine.event_log import get_event_logger
 
-logger = logging.getLogger(__name__)
+events = get_event_logger(__name__)
 # Categories.json/images.json Paths
 RESOURCES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources")
 CATEGORIES_PATH = os.path.join(RESOURCES_DIR, "categories.json")
@@ -75,8 +75,7 @@ def _set_categories_and_nodes(nx_graph: nx.Graph, ambiguity: List, ambiguity_are
         _, outdoor_nodes = _split_nodes(nx_graph)
         nodes_available = outdoor_nodes
 
-    logger.info(f"Categories available: {category_list} \n for nodes {nodes_available} \n for the chosen ambiguity "
-                f"region: {ambiguity_area}")
+    events.info("categories", categories=category_list, nodes=nodes_available, ambiguity_region=ambiguity_area)
 
     if len(nodes_available) < sum(ambiguity):
         raise map_utils.NodesExhaustedError(nodes_available, ambiguity, ambiguity_area)
@@ -113,7 +112,7 @@ def _assign_non_ambiguous_room_categories(
         nx_graph.nodes[node]['base_type'] = degree_category
         nx_graph.nodes[node]['room_type'] = random_room_type
         nx_graph.nodes[node]['ambiguous'] = False
-        logger.info(f"Assigned node - {node} with degree {degree_category} as {random_room_type} (non-ambiguous)")
+        events.debug("assigned", node=node, degree=degree_category, room_type=random_room_type, ambiguous=False)
 
 def _assign_ambiguous_room_categories(
     nx_graph: nx.Graph,
@@ -150,7 +149,8 @@ def _assign_ambiguous_room_categories(
             nx_graph.nodes[node_picked]['room_type'] = random_room_type
             nx_graph.nodes[node_picked]['base_type'] = node_degree
             nx_graph.nodes[node_picked]['ambiguous'] = True
-            logger.info(f"Assigned node - {node_picked} with degree {node_degree} as {random_room_type} (ambiguous)")
+            events.debug("assigned", node=node_picked, degree=node_degree, room_type=random_room_type,
+                         ambiguous=True)
 
 
 
@@ -195,14 +195,12 @@ def _assign_room_categories(
                                  ambiguity=ambiguity)
 
     nodes_available = list(set(nx_graph.nodes()) - set(nodes_assigned))
-    logger.info(f"Nodes available after setting ambiguous nodes: {nodes_available}")
+    events.info("non_ambiguous_nodes", nodes=nodes_available)
 
     if use_outdoor_categories:
-        logger.info(f"Assigning rooms with degree==1 from {CATEGORY_OUTDOORS} category from given "
-                    f"{CATEGORIES_PATH} file. The graph can be a ladder or cycle with no nodes having degree==1.\n"
-                    f"For such cases it will assign remaining available nodes with degree>1, with room types "
-                    f"from {CATEGORY_OUTDOORS} category.\n"
-                    f"To avoid this behaviour set use_outdoor_categories to False.")
+        # The graph can be a ladder or cycle with no nodes having degree==1, the remaining nodes with degree>1 are
+        # assigned room types from the outdoors category as well. Set use_outdoor_categories to False to avoid this
+        events.info("outdoor_categories", category=CATEGORY_OUTDOORS, path=CATEGORIES_PATH)
         category_list = categories[CATEGORY_OUTDOORS]
     else:
         category_list = categories[CATEGORY_TARGETS]+categories[CATEGORY_DISTRACTORS]
@@ -249,7 +247,7 @@ def assign_room_categories(
         ValueError: if total number of rooms < sum of ambiguity
     """
 
-    logger.info(f"Assigning room categories for ambiguity = {ambiguity}, ambiguity_region = {ambiguity_region}")
+    events.info("assign_room_categories", ambiguity=ambiguity, ambiguity_region=ambiguity_region)
 
     # Fixes ambiguity = None case
     if not ambiguity:
@@ -280,7 +278,7 @@ def assign_room_categories(
                        use_outdoor_categories=use_outdoor_categories,
                        rng=rng)
 
-    logger.info(f"Successfully assigned room categories for the required config")
+    events.info("assigned_room_categories")
 
 
 def assign_images(nx_graph, json_path: str = IMAGES_PATH, rng: np.random.default_rng = None):
@@ -0,0 +1,181 @@
+"""
+Canonical hashing of map structure, for duplicate detection across generated maps.
+
+graph_id concatenates the positions and the first letter of the category of every room, so the same map shifted on
+the grid gets another id, and two maps that only differ in their doors get the same one. The canonical form of a map
+(BaseMap.metadata) is its structure:
+    layout: Rooms and doors, translated so that the smallest x and y are 0
+    start / target: Positions of the start and target room
+    ambiguity pattern: Which rooms share a category - rooms are numbered by their first appearance in the sorted
+        layout, rooms with the same category get the same number (or the category itself, with categories=True)
+With symmetries=True the smallest form over the 8 rotations/reflections of the grid is used, so rotated and mirrored
+maps are duplicates as well. Moves are named by their direction (north, east, ...), so these are different games
+and symmetries are off by default.
+
+MapIndex keeps the hashes of the maps seen so far, duplicates are detected in O(1) per map.
+
+Report the duplicates in an instances file:
+python engine/map_hashing.py escaperoom/in/instances.json --symmetries
+"""
+import argparse
+import hashlib
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Node = Tuple[int, int]
+
+# The 8 symmetries of the square grid
+TRANSFORMS: Tuple[Callable[[int, int], Node], ...] = (
+    lambda x, y: (x, y),
+    lambda x, y: (y, -x),
+    lambda x, y: (-x, -y),
+    lambda x, y: (-y, x),
+    lambda x, y: (-x, y),
+    lambda x, y: (x, -y),
+    lambda x, y: (y, x),
+    lambda x, y: (-y, -x),
+)
+
+
+def parse_node(node) -> Node:
+    """
+    Args:
+        node: Node as in the metadata ("(1, 2)"), or a tuple/list
+    """
+    if isinstance(node, str):
+        x, y = node.strip("()").split(",")
+        return int(x), int(y)
+    return int(node[0]), int(node[1])
+
+
+def _canonical(nodes: List[Node], labels: List, edges: List[Tuple[int, int]], start: int, target: int,
+               transform: Callable[[int, int], Node], categories: bool) -> Tuple:
+    moved = [transform(x, y) for x, y in nodes]
+    min_x = min(x for x, _ in moved)
+    min_y = min(y for _, y in moved)
+    moved = [(x - min_x, y - min_y) for x, y in moved]
+
+    order = sorted(range(len(moved)), key=moved.__getitem__)
+    if categories:
+        room_labels = labels
+    else:
+        groups = {}
+        room_labels = [None] * len(labels)
+        for i in order:
+            room_labels[i] = groups.setdefault(labels[i], len(groups))
+    rooms = tuple((moved[i], room_labels[i]) for i in order)
+    doors = tuple(sorted(tuple(sorted((moved[a], moved[b]))) for a, b in edges))
+    return rooms, doors, moved[start], moved[target]
+
+
+def canonical_form(metadata: Dict, symmetries: bool = False, categories: bool = False) -> Tuple:
+    """
+    Args:
+        metadata: Map metadata (BaseMap.metadata) or a game instance
+        symmetries: Also normalise rotations and reflections
+        categories: Keep the category names instead of the ambiguity pattern only
+
+    Returns:
+        (rooms, doors, start, target), with rooms as ((x, y), label) in sorted order
+    """
+    node_index = {node: i for i, node in enumerate(metadata["unnamed_nodes"])}
+    nodes = [parse_node(node) for node in metadata["unnamed_nodes"]]
+    labels = [metadata["node_to_category"][node] for node in metadata["unnamed_nodes"]]
+    edges = [(node_index[a], node_index[b]) for a, b in metadata["unnamed_edges"]]
+    start = node_index[metadata["start_node"]]
+    target = node_index[metadata["target_node"]]
+
+    transforms = TRANSFORMS if symmetries else TRANSFORMS[:1]
+    return min(_canonical(nodes, labels, edges, start, target, transform, categories) for transform in transforms)
+
+
+def map_hash(metadata: Dict, symmetries: bool = False, categories: bool = False) -> str:
+    """
+    Returns:
+        Hex digest of the canonical form, equal for maps that only differ by a translation (and by a
+        rotation/reflection, with symmetries)
+    """
+    form = canonical_form(metadata, symmetries, categories)
+    return hashlib.blake2b(repr(form).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class MapIndex:
+    """
+    Hashes of the maps seen so far
+    """
+
+    def __init__(self, symmetries: bool = False, categories: bool = False):
+        self.symmetries = symmetries
+        self.categories = categories
+        self._keys: Dict[str, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, metadata: Dict) -> bool:
+        return self.hash(metadata) in self._keys
+
+    def hash(self, metadata: Dict) -> str:
+        return map_hash(metadata, self.symmetries, self.categories)
+
+    def duplicate_of(self, metadata: Dict) -> Optional[Any]:
+        """
+        Returns:
+            Key of the map added earlier with the same hash, None if the map is new
+        """
+        return self._keys.get(self.hash(metadata))
+
+    def add(self, metadata: Dict, key: Any = None) -> bool:
+        """
+        Add a map, unless it is a duplicate
+
+        Args:
+            metadata: Map metadata
+            key: Stored with the hash, e.g. (experiment, game_id), returned by duplicate_of
+
+        Returns:
+            True if the map was added, False if it is a duplicate of a map added earlier
+        """
+        digest = self.hash(metadata)
+        if digest in self._keys:
+            return False
+        self._keys[digest] = key
+        return True
+
+
+def find_duplicates(instances: Dict, symmetries: bool = False, categories: bool = False) -> List[Tuple]:
+    """
+    Args:
+        instances: Instances in the legacy structure {"experiments": [{"name": ..., "game_instances": [...]}]}
+
+    Returns:
+        ((experiment, game_id), (experiment, game_id) of the first instance with the same map) for every duplicate
+    """
+    index = MapIndex(symmetries, categories)
+    duplicates = []
+    for experiment in instances["experiments"]:
+        for game_instance in experiment["game_instances"]:
+            key = (experiment["name"], game_instance["game_id"])
+            if not index.add(game_instance, key):
+                duplicates.append((key, index.duplicate_of(game_instance)))
+    return duplicates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report instances whose maps are duplicates of an earlier instance")
+    parser.add_argument("instances", help="Instances file (legacy format)")
+    parser.add_argument("--symmetries", action="store_true", help="Rotated and mirrored maps are duplicates")
+    parser.add_argument("--categories", action="store_true", help="Only rooms with the same categories match")
+    args = parser.parse_args()
+
+    with open(args.instances, "r", encoding="utf-8") as f:
+        instances = json.load(f)
+    duplicates = find_duplicates(instances, args.symmetries, args.categories)
+    n_instances = sum(len(experiment["game_instances"]) for experiment in instances["experiments"])
+    print(f"{len(duplicates)} duplicates in {n_instances} instances")
+    for key, first in duplicates:
+        print(f"{key[0]} game {key[1]} duplicates {first[0]} game {first[1]}")
+
+
+if __name__ == '__main__':
+    main()
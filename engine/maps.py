@@ -1,13 +1,13 @@
 from typing import Any
-import logging
 
 import numpy as np
 
+from engine.event_log import capture_failures, get_event_logger
 from engine.graphs import BaseGraph
 from engine.map_assignments import assign_images, assign_room_categories
 from engine.map_utils import select_random_room, find_distance
 
-logger = logging.getLogger(__name__)
+events = get_event_logger(__name__)
 
 class BaseMap(BaseGraph):
 
@@ -60,9 +60,7 @@ class BaseMap(BaseGraph):
         
         all_rooms = ambiguous_rooms + indoor_rooms + outdoor_rooms
         start_pos = None
-        logging.info(f"Ambiguous Rooms: {ambiguous_rooms}"
-                     f"\nIndoor Rooms: {indoor_rooms}"
-                     f"\nOutdoor Rooms: {outdoor_rooms}")
+        events.info("rooms", ambiguous=ambiguous_rooms, indoor=indoor_rooms, outdoor=outdoor_rooms)
 
         if end_type == "random":
             available_rooms = all_rooms
@@ -71,30 +69,26 @@ class BaseMap(BaseGraph):
             if ambiguous_rooms:
                 available_rooms = ambiguous_rooms
             else:
-                logging.info(f"No ambiguous rooms available! Setting a random room as target position. "
-                             f"Check graph configuration!!")
+                events.warning("no_target_rooms", end_type=end_type, fallback="indoor+outdoor")
                 available_rooms = indoor_rooms+outdoor_rooms
 
         elif end_type == "indoor":
             if indoor_rooms:
                 available_rooms = indoor_rooms
             else:
-                logging.info(f"No indoor rooms available! Setting a random room as target position. "
-                             f"Check graph configuration!!")
+                events.warning("no_target_rooms", end_type=end_type, fallback="ambiguous+outdoor")
                 available_rooms = ambiguous_rooms + outdoor_rooms
         else:
             if end_type == "outdoor":
                 available_rooms = outdoor_rooms
             else:
-                logging.info(f"No outdoor rooms available! Setting a random room as target position. "
-                             f"Check graph configuration!!")
-
+                events.warning("no_target_rooms", end_type=end_type, fallback="ambiguous+indoor")
                 available_rooms = ambiguous_rooms + indoor_rooms
 
         target_pos = select_random_room(available_rooms=available_rooms, occupied=None, rng=self.graph_rng)
 
         node_distances = find_distance(edges, all_rooms)[target_pos]
-        logging.info(f"Node distances from target position: {node_distances}")
+        events.info("target_distances", target=target_pos, distances=node_distances)
 
         ## Next, find nodes at `distance` from target_pos and then look if expected start_type is available
         exact_nodes = []
@@ -117,30 +111,28 @@ class BaseMap(BaseGraph):
                     if node in ambiguous_rooms:
                         start_pos = node
                 if not start_pos:
-                    logging.info(f"No ambiguous room found at distance {distance} from selected target_node type! "
-                                 f"Setting a random room as start position at distance {distance}! ")
+                    events.info("no_start_rooms", start_type=start_type, distance=distance, fallback="random")
                     start_pos = exact_nodes[self.graph_rng.integers(len(exact_nodes))]
             elif start_type == "indoor":
                 for node in exact_nodes:
                     if node in indoor_rooms:
                         start_pos = node
                 if not start_pos:
-                    logging.info(f"No indoor room found at distance {distance} from selected target_node type! "
-                                 f"Setting a random room as start position at distance {distance}! ")
+                    events.info("no_start_rooms", start_type=start_type, distance=distance, fallback="random")
                     start_pos = exact_nodes[self.graph_rng.integers(len(exact_nodes))]
             else:
                 for node in exact_nodes:
                     if node in outdoor_rooms:
                         start_pos = node
                 if not start_pos:
-                    logging.info(f"No outdoor room found at distance {distance} from selected target_node type! "
-                                 f"Setting a random room as start position at distance {distance}! ")
+                    events.info("no_start_rooms", start_type=start_type, distance=distance, fallback="random")
                     start_pos = exact_nodes[self.graph_rng.integers(len(exact_nodes))]
 
-        logging.info(f"Selected start node: {start_pos}, end node: {target_pos} at distance {distance}")
+        events.info("positions", start=start_pos, target=target_pos, distance=distance)
         return start_pos, target_pos
 
 
+    @capture_failures("BaseMap.metadata")
     def metadata(
         self,
         start_type: str = "outdoor",
@@ -0,0 +1,68 @@
+import unittest
+
+import networkx as nx
+
+from engine.enumerate_layouts import count_layouts, enumerate_layouts
+from engine.map_hashing import canonical_form
+
+
+def layout_form(layout):
+    """
+    Canonical form of a layout up to symmetries, as map_hashing computes it for maps
+    """
+    nodes = [str(node) for node in layout.nodes]
+    metadata = {
+        "unnamed_nodes": nodes,
+        "unnamed_edges": [(str(a), str(b)) for a, b in layout.edges],
+        "node_to_category": {node: "Room" for node in nodes},
+        "start_node": nodes[0],
+        "target_node": nodes[0],
+    }
+    rooms, doors, _, _ = canonical_form(metadata, symmetries=True)
+    return rooms, doors
+
+
+class TestEnumerateLayouts(unittest.TestCase):
+    def test_free_counts(self):
+        # Free lattice trees (OEIS A066158) and free self-avoiding walks on the square lattice
+        self.assertEqual([count_layouts("tree", k) for k in range(1, 9)], [1, 1, 2, 5, 15, 54, 212, 908])
+        self.assertEqual([count_layouts("path", k) for k in range(1, 9)], [1, 1, 2, 4, 9, 22, 56, 147])
+        self.assertEqual([count_layouts("star", k) for k in range(4, 8)], [0, 1, 2, 15])
+        self.assertEqual([count_layouts("cycle", k) for k in range(3, 9)], [0, 1, 0, 1, 0, 3])
+
+    def test_grid_limit(self):
+        self.assertEqual([count_layouts("tree", k, 3, 3) for k in range(1, 10)], [1, 1, 2, 4, 11, 21, 37, 38, 28])
+        self.assertEqual([count_layouts("path", k, 3, 3) for k in range(1, 10)], [1, 1, 2, 3, 6, 7, 9, 7, 3])
+        self.assertEqual(count_layouts("tree", 6, 2, 4), count_layouts("tree", 6, 4, 2))
+        for layout in enumerate_layouts("tree", 6, 2, 4):
+            self.assertTrue(all(0 <= x < 2 and 0 <= y < 4 for x, y in layout.nodes))
+
+    def test_layout_graphs(self):
+        for layout_type, k in (("tree", 7), ("path", 7), ("star", 7), ("cycle", 8), ("ladder", 8)):
+            forms = set()
+            for layout in enumerate_layouts(layout_type, k, 4, 4):
+                graph = layout.to_graph()
+                self.assertEqual(graph.number_of_nodes(), k)
+                self.assertTrue(nx.is_connected(graph))
+                degrees = [d for _, d in graph.degree()]
+                if layout_type in ("tree", "path", "star"):
+                    self.assertTrue(nx.is_tree(graph))
+                if layout_type == "path":
+                    self.assertLessEqual(max(degrees), 2)
+                if layout_type == "star":
+                    self.assertEqual(max(degrees), 4)
+                if layout_type == "cycle":
+                    self.assertEqual(set(degrees), {2})
+                # Every layout once, up to rotation and reflection
+                form = layout_form(layout)
+                self.assertNotIn(form, forms)
+                forms.add(form)
+            self.assertGreater(len(forms), 0)
+
+    def test_unknown_type(self):
+        with self.assertRaises(ValueError):
+            list(enumerate_layouts("grid", 4))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import logging
+import unittest
+from unittest.mock import patch
+
+from engine import event_log
+from engine.event_log import (capture_failures, configure, get_event_logger, parse_levels, recent_events,
+                              resolve_level, set_level)
+from engine.maps import BaseMap
+
+
+class Unprintable:
+    def __str__(self):
+        raise AssertionError("Formatted although the level is off")
+
+
+class TestEventLog(unittest.TestCase):
+    def setUp(self):
+        configure(ring_size=8)
+        self.events = get_event_logger("engine.test_event_log")
+
+    def tearDown(self):
+        configure()
+
+    def test_parse_levels(self):
+        self.assertEqual(parse_levels("engine=info, escaperoom.master=10"),
+                         {"engine": logging.INFO, "escaperoom.master": logging.DEBUG})
+        with self.assertRaises(ValueError):
+            parse_levels("engine=LOUD")
+
+    def test_most_specific_level(self):
+        set_level("engine.test_event_log", logging.DEBUG)
+        self.assertEqual(resolve_level("engine.maps"), logging.WARNING)
+        self.assertEqual(resolve_level("engine.test_event_log.sub"), logging.DEBUG)
+        self.assertEqual(resolve_level("other"), logging.NOTSET)
+        self.assertEqual(self.events.level, logging.DEBUG)
+
+    def test_env_levels(self):
+        with patch.dict("os.environ", {event_log.ENV_LEVELS: "engine=ERROR"}):
+            configure()
+        self.assertEqual(self.events.level, logging.ERROR)
+
+    def test_lazy_formatting(self):
+        with self.assertNoLogs("engine.test_event_log", level=logging.DEBUG):
+            self.events.info("below_level", value=Unprintable())
+        set_level("engine", logging.INFO)
+        with self.assertLogs("engine.test_event_log", level=logging.INFO) as logs:
+            self.events.info("rooms", indoor=[(1, 2)], n=3)
+        self.assertEqual(logs.output, ["INFO:engine.test_event_log:rooms indoor=[(1, 2)] n=3"])
+
+    def test_ring_buffer(self):
+        for i in range(10):
+            self.events.debug("step", i=i)
+        buffered = recent_events()
+        self.assertEqual(len(buffered), 8)
+        self.assertEqual([fields["i"] for _, _, _, _, fields in buffered], list(range(2, 10)))
+
+    def test_flush_on_failure(self):
+        self.events.info("before")
+        with self.assertLogs("engine.event_log", level=logging.WARNING) as logs:
+            with self.assertRaises(RuntimeError):
+                with capture_failures("test"):
+                    self.events.info("inside", node=(0, 1))
+                    raise RuntimeError("boom")
+        self.assertIn("test failed with RuntimeError: boom, last 1 events", logs.output[0])
+        self.assertIn("engine.test_event_log: inside node=(0, 1)", logs.output[1])
+        self.assertEqual(recent_events(), [])
+
+    def test_metadata_failure_flushes_events(self):
+        base_map = BaseMap(4, 4, 4, "path", 42)
+        with self.assertLogs("engine.event_log", level=logging.WARNING) as logs:
+            with self.assertRaises(ValueError):
+                base_map.metadata(ambiguity=[5])
+        self.assertTrue(any("assign_room_categories ambiguity=[5]" in line for line in logs.output))
+
+
+if __name__ == '__main__':
+    unittest.main()
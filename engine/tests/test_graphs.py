@@ -3,7 +3,7 @@ import os
 import logging
 import networkx as nx
 
-from engine.graphs import BaseGraph
+from engine.graphs import BaseGraph, cell_bit, neighbor_table
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO,
@@ -80,6 +80,27 @@ class GraphGenerationTest(unittest.TestCase):
                 connected_comps = nx.number_connected_components(ladder_graph)
                 assert connected_comps == 1
 
+    def test_neighbor_table(self):
+        m, n = 4, 3
+        table = neighbor_table(m, n)
+        assert len(table) == m * n
+        for x in range(m):
+            for y in range(n):
+                expected = [(x + dx, y + dy) for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]
+                            if 0 <= x + dx < m and 0 <= y + dy < n]
+                assert [node for node, _ in table[x * n + y]] == expected
+                assert all(bit == cell_bit(node, n) for node, bit in table[x * n + y])
+
+    def test_valid_neighbors_occupancy(self):
+        # A bitboard, a set and a list of visited rooms give the same neighbors, in the same order
+        visited = [(1, 1), (1, 2), (2, 1)]
+        occupied = 0
+        for node in visited:
+            occupied |= cell_bit(node, 3)
+        for visited_rooms in (occupied, set(visited), visited):
+            assert BaseGraph.get_valid_neighbors((1, 1), visited_rooms, 3, 3) == [(1, 0), (0, 1)]
+        assert BaseGraph.get_valid_neighbors((0, 0), None, 3, 3) == [(0, 1), (1, 0)]
+
 if __name__ == '__main__':
     unittest.main()
 
@@ -0,0 +1,70 @@
+import unittest
+
+from engine.map_hashing import MapIndex, find_duplicates, map_hash, parse_node
+from engine.maps import BaseMap
+
+
+def move_map(metadata, transform):
+    """
+    Copy of the map metadata with every node moved by transform
+    """
+    def move(node):
+        return str(transform(*parse_node(node)))
+
+    moved = dict(metadata)
+    moved["unnamed_nodes"] = [move(node) for node in metadata["unnamed_nodes"]]
+    moved["unnamed_edges"] = [(move(a), move(b)) for a, b in metadata["unnamed_edges"]]
+    moved["node_to_category"] = {move(node): category for node, category in metadata["node_to_category"].items()}
+    moved["start_node"] = move(metadata["start_node"])
+    moved["target_node"] = move(metadata["target_node"])
+    return moved
+
+
+class TestMapHashing(unittest.TestCase):
+    def setUp(self):
+        self.metadata = BaseMap(6, 6, 8, "cycle", 42).metadata(start_type="indoor", end_type="ambiguous",
+                                                               ambiguity=[2], ambiguity_region="indoor")
+
+    def test_translation(self):
+        shifted = move_map(self.metadata, lambda x, y: (x + 3, y + 1))
+        self.assertNotEqual(shifted["unnamed_nodes"], self.metadata["unnamed_nodes"])
+        self.assertEqual(map_hash(shifted), map_hash(self.metadata))
+
+    def test_rotation_and_reflection(self):
+        for transform in (lambda x, y: (y, 10 - x), lambda x, y: (10 - x, y)):
+            moved = move_map(self.metadata, transform)
+            self.assertNotEqual(map_hash(moved), map_hash(self.metadata))
+            self.assertEqual(map_hash(moved, symmetries=True), map_hash(self.metadata, symmetries=True))
+
+    def test_start_target_and_ambiguity(self):
+        swapped = dict(self.metadata, start_node=self.metadata["target_node"],
+                       target_node=self.metadata["start_node"])
+        self.assertNotEqual(map_hash(swapped), map_hash(self.metadata))
+
+        # Renaming the categories keeps the ambiguity pattern, merging two categories changes it
+        renamed = dict(self.metadata, node_to_category={node: category + "x" for node, category
+                                                        in self.metadata["node_to_category"].items()})
+        self.assertEqual(map_hash(renamed), map_hash(self.metadata))
+        self.assertNotEqual(map_hash(renamed, categories=True), map_hash(self.metadata, categories=True))
+        categories = list(self.metadata["node_to_category"].values())
+        first, other = categories[0], next(c for c in categories if c != categories[0])
+        merged = dict(self.metadata, node_to_category={node: first if category == other else category for
+                                                       node, category in self.metadata["node_to_category"].items()})
+        self.assertNotEqual(map_hash(merged), map_hash(self.metadata))
+
+    def test_index(self):
+        index = MapIndex()
+        self.assertTrue(index.add(self.metadata, ("large", 0)))
+        shifted = move_map(self.metadata, lambda x, y: (x + 1, y))
+        self.assertIn(shifted, index)
+        self.assertFalse(index.add(shifted, ("large", 1)))
+        self.assertEqual(index.duplicate_of(shifted), ("large", 0))
+        self.assertEqual(len(index), 1)
+
+        instances = {"experiments": [{"name": "large", "game_instances": [dict(self.metadata, game_id=0),
+                                                                          dict(shifted, game_id=1)]}]}
+        self.assertEqual(find_duplicates(instances), [(("large", 1), ("large", 0))])
+
+
+if __name__ == '__main__':
+    unittest.main()
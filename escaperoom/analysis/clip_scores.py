@@ -7,6 +7,7 @@ from escaperoom.analysis.aborts import get_reason, load_json
 from escaperoom.analysis.loops import get_moves, count_loops
 from escaperoom.scorer import get_efficient_moves
 from escaperoom.analysis.questions import analyse
+from escaperoom.serialization import INTERACTIONS_FILES
 
 instance_file = os.path.join("escaperoom", "in", "instances.json")
 with open(instance_file, "r") as f:
@@ -17,7 +18,7 @@ base_dir = "results"
 interaction_files = []
 for dirname, _, filenames in os.walk(base_dir):
     for filename in filenames:
-        if filename.endswith("interactions.json"):
+        if filename.endswith(INTERACTIONS_FILES):
             interaction_files.append(os.path.join(dirname, filename))
 
 
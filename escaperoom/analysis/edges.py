@@ -1,10 +1,10 @@
-import json
 import os
 
+from escaperoom.instance_shards import open_instances
+
 instances_path = os.path.join("escaperoom", "in", "instances.json")
 
-with open(instances_path) as f:
-    instances = json.load(f)
+instances = open_instances(instances_path)
 
 edges = []
 for exps in instances["experiments"]:
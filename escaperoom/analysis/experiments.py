@@ -1,23 +1,23 @@
 import os
-import json
 import plotly.graph_objs as go
 import plotly.io as pio
 
+from escaperoom.instance_shards import open_instances
 from escaperoom.analysis.aborts import get_reason, load_json
 from escaperoom.analysis.loops import get_moves, count_loops
 from escaperoom.scorer import get_efficient_moves
 from escaperoom.analysis.questions import analyse
+from escaperoom.serialization import INTERACTIONS_FILES
 
 instance_file = os.path.join("escaperoom", "in", "instances.json")
-with open(instance_file, "r") as f:
-    instances = json.load(f)
+instances = open_instances(instance_file)
 
 base_dir = "results"
 
 interaction_files = []
 for dirname, _, filenames in os.walk(base_dir):
     for filename in filenames:
-        if filename.endswith("interactions.json"):
+        if filename.endswith(INTERACTIONS_FILES):
             interaction_files.append(os.path.join(dirname, filename))
 
 
@@ -3,11 +3,12 @@ import plotly.graph_objs as go
 import plotly.io as pio
 
 import pandas as pd
-import json
+
+from escaperoom import serialization
+from escaperoom.serialization import INTERACTIONS_FILES
 
 def load_json(path):
-    with open(path) as json_file:
-        return json.load(json_file)
+    return serialization.load(path)
 
 def get_escape_val(int_data):
     turns = int_data['turns']
@@ -43,7 +44,7 @@ base_dir = "results"
 interaction_files = []
 for dirname, _, filenames in os.walk(base_dir):
     for filename in filenames:
-        if filename.endswith("interactions.json"):
+        if filename.endswith(INTERACTIONS_FILES):
             interaction_files.append(os.path.join(dirname, filename))
 
 
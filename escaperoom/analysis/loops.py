@@ -1,8 +1,10 @@
 import os
-import json
 import plotly.graph_objs as go
 import plotly.io as pio
 
+from escaperoom import serialization
+from escaperoom.serialization import INTERACTIONS_FILES
+
 # --- Move utilities ---
 MOVE_MAP = {
     "north": (0, 1),
@@ -12,8 +14,7 @@ MOVE_MAP = {
 }
 
 def load_json(path):
-    with open(path) as f:
-        return json.load(f)
+    return serialization.load(path)
 
 def get_moves(int_data):
     moves = []
@@ -175,7 +176,7 @@ if __name__ == '__main__':
     interaction_files = []
     for dirname, _, filenames in os.walk(base_dir):
         for filename in filenames:
-            if filename.endswith("interactions.json"):
+            if filename.endswith(INTERACTIONS_FILES):
                 interaction_files.append(os.path.join(dirname, filename))
 
     # Dict: model_name -> exp_name -> [num_loops, ...]
@@ -1,7 +1,9 @@
-import json
 import pandas as pd
 import os
 
+from escaperoom import serialization
+from escaperoom.serialization import INTERACTIONS_FILES
+
 def analyse(episode_interactions):
 
     moves_made = 0
@@ -36,13 +38,12 @@ def walk_results():
     for dirname, _, filenames in os.walk(base_dir):
         for filename in filenames:
             filepath = os.path.join(dirname, filename)
-            if filename.endswith("interactions.json"):
+            if filename.endswith(INTERACTIONS_FILES):
                 interaction_files.append(filepath)
 
     ints = 0
     for file in interaction_files:
-        with open(file, 'r') as f:
-            episode_interactions = json.load(f)
+        episode_interactions = serialization.load(file)
 
         qa, mm, em, fe, se = analyse(episode_interactions)
         if qa:
@@ -0,0 +1,306 @@
+"""
+Concurrent episode runner for API-bound players.
+
+GameBenchmark.run plays the episodes of all experiments one after another, and each episode waits for every
+(blocking) model call. Runs are dominated by model latency, so this runner schedules many episodes concurrently:
+    - Each episode runs the unchanged, synchronous game master in a worker thread, with its own game master, players
+      and recorder. The interactions are the same as with GameBenchmark.run, and the records are stored in the same
+      results structure
+    - At most max_episodes episodes run at the same time, on a pool of max_episodes threads (the default executor of
+      asyncio has at most min(32, cpu + 4) threads, which would cap the episodes in flight)
+    - Model calls go through a RateLimitedModel proxy - at most max_concurrent calls per backend, optionally limited
+      to requests_per_minute, and retried with exponential backoff when the backend reports a rate limit
+Programmatic (CustomResponseModel) and human players are not wrapped.
+
+NOTE: Local backends (huggingface, llamacpp, vllm) are not thread-safe, set max_concurrent to 1 for them.
+
+python escaperoom/async_runner.py -m gpt-4.1 --max_episodes 16 --max_concurrent openai=8 --requests_per_minute openai=500
+"""
+import argparse
+import asyncio
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Any, Dict, List, Tuple
+
+from clemcore.backends import Model, CustomResponseModel, HumanModel
+from clemcore.clemgame import GameBenchmark
+from clemcore.clemgame.recorder import DefaultGameRecorder
+from clemcore.clemgame.resources import store_results_file
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_EPISODES = 8
+DEFAULT_MAX_CONCURRENT = 4
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF = 2.0  # seconds, doubled after every retry
+
+
+class RateLimitError(Exception):
+    """Raised by backends (or stand-in backends) to signal a rate limit, retried by RateLimitedModel"""
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """
+    Rate limit errors differ between the API clients (openai.RateLimitError, anthropic.RateLimitError, HTTP 429 ...)
+
+    Returns:
+        True if the error signals a rate limit
+    """
+    if isinstance(error, RateLimitError) or "RateLimit" in type(error).__name__:
+        return True
+    return getattr(error, "status_code", None) == 429 or getattr(error, "code", None) == 429
+
+
+class RequestRateLimiter:
+    """
+    Spaces requests evenly, at most requests_per_minute. Thread-safe, acquire() blocks the calling worker thread
+    """
+
+    def __init__(self, requests_per_minute: float = None):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class BackendLimits:
+    """
+    Shared limits for all models of one backend
+    """
+
+    def __init__(self, max_concurrent: int = DEFAULT_MAX_CONCURRENT, requests_per_minute: float = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES, backoff: float = DEFAULT_BACKOFF):
+        self.semaphore = threading.BoundedSemaphore(max_concurrent)
+        self.rate_limiter = RequestRateLimiter(requests_per_minute)
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+
+class RateLimitedModel(Model):
+    """
+    Proxy for a model that applies the limits of its backend to generate_response. Name and generation arguments
+    are taken from the wrapped model, so records are the same as for the wrapped model
+    """
+
+    def __init__(self, model: Model, limits: BackendLimits):
+        super().__init__(model.model_spec)
+        self.model = model
+        self.limits = limits
+
+    def set_gen_args(self, **gen_args):
+        self.model.set_gen_args(**gen_args)
+
+    def set_gen_arg(self, arg_name, arg_value):
+        self.model.set_gen_arg(arg_name, arg_value)
+
+    def get_gen_arg(self, arg_name):
+        return self.model.get_gen_arg(arg_name)
+
+    def generate_response(self, messages: List[Dict]) -> Tuple[Any, Any, str]:
+        for attempt in range(self.limits.max_retries + 1):
+            with self.limits.semaphore:
+                self.limits.rate_limiter.acquire()
+                try:
+                    return self.model.generate_response(messages)
+                except Exception as error:
+                    if not is_rate_limit_error(error) or attempt == self.limits.max_retries:
+                        raise
+            delay = self.limits.backoff * 2 ** attempt * (1 + random.random())
+            logger.warning(f"Rate limit for {self.get_name()}, retry {attempt + 1} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def get_backend_name(model: Model) -> str:
+    if model.model_spec.has_attr("backend"):
+        return model.model_spec.backend
+    return model.get_name()
+
+
+def wrap_models(player_models: List[Model], max_concurrent: Dict[str, int] = None,
+                requests_per_minute: Dict[str, float] = None, **kwargs) -> List[Model]:
+    """
+    Wrap API-bound models with RateLimitedModel, models of the same backend share one BackendLimits
+
+    Args:
+        player_models: Models of the players
+        max_concurrent: Maximum concurrent calls per backend name, DEFAULT_MAX_CONCURRENT if not given
+        requests_per_minute: Request limit per backend name, not limited if not given
+        kwargs: max_retries, backoff for BackendLimits
+
+    Returns:
+        List of models, in the same order
+    """
+    max_concurrent = max_concurrent or {}
+    requests_per_minute = requests_per_minute or {}
+    limits: Dict[str, BackendLimits] = {}
+    wrapped = []
+    for model in player_models:
+        if isinstance(model, (CustomResponseModel, HumanModel, RateLimitedModel)):
+            wrapped.append(model)
+            continue
+        backend = get_backend_name(model)
+        if backend not in limits:
+            limits[backend] = BackendLimits(max_concurrent.get(backend, DEFAULT_MAX_CONCURRENT),
+                                            requests_per_minute.get(backend), **kwargs)
+        wrapped.append(RateLimitedModel(model, limits[backend]))
+    return wrapped
+
+
+def play_episode(game_benchmark: GameBenchmark, experiment_config: Dict, game_instance: Dict,
+                 player_models: List[Model], dialogue_pair_desc: str, episode_dir: str, results_dir: str) -> bool:
+    """
+    Play and store a single episode, same as an iteration of GameBenchmark.run
+
+    Returns:
+        True if the episode was played without an exception
+    """
+    store_results_file(game_benchmark.game_name, game_instance, "instance.json", dialogue_pair_desc,
+                       sub_dir=episode_dir, results_dir=results_dir)
+    game_recorder = DefaultGameRecorder(game_benchmark.game_name, experiment_config["name"],
+                                        game_instance["game_id"], dialogue_pair_desc)
+    try:
+        game_master = game_benchmark.create_game_master(experiment_config, player_models)
+        game_master.game_recorder = game_recorder
+        game_master.setup(**game_instance)
+        game_master.play()
+        game_master.store_records(results_dir, dialogue_pair_desc, episode_dir)
+    except Exception:  # continue with other episodes if something goes wrong
+        logger.exception(f"{game_benchmark.game_name}: Exception for episode {game_instance['game_id']} "
+                         f"(but continue)")
+        return False
+    return True
+
+
+async def run_async(game_benchmark: GameBenchmark, player_models: List[Model], results_dir: str = "results",
+                    max_episodes: int = DEFAULT_MAX_EPISODES, **limits) -> int:
+    """
+    Play all experiments of a benchmark with concurrent episodes
+
+    Args:
+        game_benchmark: A GameBenchmark with loaded instances
+        player_models: Models of the players
+        results_dir: Path to the results directory
+        max_episodes: Maximum number of episodes played at the same time
+        limits: Per backend limits, see wrap_models
+
+    Returns:
+        Number of episodes that raised an exception
+    """
+    if not player_models:
+        raise ValueError(f"{game_benchmark.game_name}: No player models given")
+    dialogue_pair_desc = game_benchmark.get_dialogue_pair_descriptor(player_models)
+    models = wrap_models(player_models, **limits)
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=max_episodes, thread_name_prefix="episode")
+
+    async def run_episode(*args) -> bool:
+        return await loop.run_in_executor(executor, partial(play_episode, game_benchmark, *args))
+
+    async def run_experiment(experiment_idx: int, experiment: Dict) -> int:
+        experiment_name = experiment["name"]
+        experiment_record_dir = f"{experiment_idx}_{experiment_name}"
+        experiment_config = {k: experiment[k] for k in experiment if k != "game_instances"}
+        experiment_config["timestamp"] = datetime.now().isoformat()
+        experiment_config["dialogue_partners"] = dialogue_pair_desc
+        store_results_file(game_benchmark.game_name, experiment_config, f"experiment_{experiment_name}.json",
+                           dialogue_pair_desc, sub_dir=experiment_record_dir, results_dir=results_dir)
+
+        time_experiment_start = datetime.now()
+        played = await asyncio.gather(*[
+            run_episode(experiment_config, game_instance, models, dialogue_pair_desc,
+                        f"{experiment_record_dir}/episode_{episode_counter}", results_dir)
+            for episode_counter, game_instance in enumerate(experiment["game_instances"])
+        ])
+        experiment_config["duration"] = str(datetime.now() - time_experiment_start)
+        store_results_file(game_benchmark.game_name, experiment_config, f"experiment_{experiment_name}.json",
+                           dialogue_pair_desc, sub_dir=experiment_record_dir, results_dir=results_dir)
+        logger.info(f"Finished experiment {experiment_name} in {experiment_config['duration']}")
+        return played.count(False)
+
+    experiments = [(idx, exp) for idx, exp in enumerate(game_benchmark.instances["experiments"])
+                   if not game_benchmark.filter_experiment or exp["name"] in game_benchmark.filter_experiment]
+    try:
+        error_counts = await asyncio.gather(*[run_experiment(idx, exp) for idx, exp in experiments])
+    finally:
+        executor.shutdown(wait=True)
+    error_count = sum(error_counts)
+    if error_count:
+        logger.error(f"{game_benchmark.game_name}: '{error_count}' exceptions occurred: "
+                     f"See clembench.log for details.")
+    return error_count
+
+
+def run(game_benchmark: GameBenchmark, player_models: List[Model], results_dir: str = "results",
+        max_episodes: int = DEFAULT_MAX_EPISODES, **limits) -> int:
+    """
+    Synchronous entry point for run_async
+    """
+    return asyncio.run(run_async(game_benchmark, player_models, results_dir, max_episodes, **limits))
+
+
+def _parse_backend_values(values: List[str], value_type) -> Dict:
+    """
+    ["openai=8", "anthropic=4"] -> {"openai": 8, "anthropic": 4}
+    """
+    parsed = {}
+    for value in values or []:
+        backend, limit = value.split("=")
+        parsed[backend] = value_type(limit)
+    return parsed
+
+
+def main():
+    from clemcore.backends import ModelSpec, ModelRegistry, BackendRegistry
+    from clemcore.clemgame import GameRegistry
+    from clemcore.clemgame.benchmark import load_from_spec
+
+    parser = argparse.ArgumentParser(description="Run EscapeRoom with concurrent episodes")
+    parser.add_argument("-g", "--game", default="escape_room")
+    parser.add_argument("-m", "--models", nargs="+", required=True)
+    parser.add_argument("-e", "--experiment_name", default=None)
+    parser.add_argument("-i", "--instances_name", default=None)
+    parser.add_argument("-r", "--results_dir", default="results")
+    parser.add_argument("-t", "--temperature", type=float, default=0.0)
+    parser.add_argument("-l", "--max_tokens", type=int, default=300)
+    parser.add_argument("--max_episodes", type=int, default=DEFAULT_MAX_EPISODES)
+    parser.add_argument("--max_concurrent", nargs="*", help="Per backend, e.g. openai=8")
+    parser.add_argument("--requests_per_minute", nargs="*", help="Per backend, e.g. openai=500")
+    args = parser.parse_args()
+
+    model_registry = ModelRegistry.from_packaged_and_cwd_files()
+    backend_registry = BackendRegistry.from_packaged_and_cwd_files()
+    player_models = []
+    for model_selector in ModelSpec.from_strings(args.models):
+        model_spec = model_registry.get_first_model_spec_that_unify_with(model_selector)
+        model = backend_registry.get_backend_for(model_spec.backend).get_model_for(model_spec)
+        model.set_gen_args(temperature=args.temperature, max_tokens=args.max_tokens)
+        player_models.append(model)
+
+    game_specs = GameRegistry.from_directories_and_cwd_files().get_game_specs_that_unify_with(args.game)
+    for game_spec in game_specs:
+        with load_from_spec(game_spec, instances_name=args.instances_name) as game_benchmark:
+            if args.experiment_name:
+                game_benchmark.filter_experiment.append(args.experiment_name)
+            start = time.perf_counter()
+            run(game_benchmark, player_models, args.results_dir, args.max_episodes,
+                max_concurrent=_parse_backend_values(args.max_concurrent, int),
+                requests_per_minute=_parse_backend_values(args.requests_per_minute, float))
+            logger.info(f"Played {game_spec['game_name']} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,287 @@
+"""
+Precomputed difficulty index of instances, and stratified sampling of instances by difficulty.
+
+build computes structural features of every instance once and stores them column-wise:
+    experiment, game_id, map_hash: Key of the instance, and its map hash (engine/map_hashing.py)
+    rooms, doors, diameter: Size of the map, longest shortest path between two rooms
+    mean_degree, max_degree, dead_ends: Branching - doors per room, rooms with a single door
+    optimal_moves: Shortest path from start to target
+    ambiguous_rooms: Rooms that share their category with another room
+    num_candidates: Rooms of the target category, the Explorer may have to visit all of them (escaperoom/solver.py)
+    decoy_start_distance: Mean distance from the start to the candidates other than the target
+    decoy_target_distance: Distance from the target to the closest other candidate
+    expected_moves, worst_case_moves, reference_moves: Optimal exploration costs (escaperoom/solver.py)
+Features that do not apply (no other candidate) are None.
+
+sample draws instances from the index so that every stratum - combination of feature bins (quantiles, or the values
+themselves for features with few distinct values) - is represented equally, and writes them as one experiment.
+
+python escaperoom/difficulty.py build escaperoom/in/instances.json --output escaperoom/in/difficulty.json
+python escaperoom/difficulty.py sample escaperoom/in/difficulty.json escaperoom/in/instances.json --n 30 \
+    --by optimal_moves num_candidates --where rooms=8:8 --output escaperoom/in/instances_balanced.json
+"""
+import argparse
+import copy
+import os
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from engine.map_hashing import map_hash
+from escaperoom import serialization
+from escaperoom.instance_shards import open_instances
+from escaperoom.solver import _base_category, get_candidate_rooms, get_distances, solve_instance
+
+FORMAT = "escaperoom-difficulty"
+VERSION = 1
+KEY_COLUMNS = ("experiment", "game_id", "map_hash")
+FEATURES = ("rooms", "doors", "diameter", "mean_degree", "max_degree", "dead_ends", "optimal_moves",
+            "ambiguous_rooms", "num_candidates", "decoy_start_distance", "decoy_target_distance", "expected_moves",
+            "worst_case_moves", "reference_moves")
+DEFAULT_BINS = 3
+
+
+def instance_features(game_instance: Dict) -> Dict:
+    """
+    Returns:
+        The FEATURES of one instance
+    """
+    distances = get_distances(game_instance)
+    solution = solve_instance(game_instance)
+    start, target = game_instance["start_node"], game_instance["target_node"]
+    nodes = list(game_instance["node_to_category"])
+
+    degrees = defaultdict(int)
+    for u, v in game_instance["unnamed_edges"]:
+        degrees[str(u)] += 1
+        degrees[str(v)] += 1
+    category_sizes = defaultdict(int)
+    for category in game_instance["node_to_category"].values():
+        category_sizes[_base_category(category)] += 1
+    decoys = [node for node in get_candidate_rooms(game_instance) if node != target]
+
+    return {
+        "rooms": len(nodes),
+        "doors": len(game_instance["unnamed_edges"]),
+        "diameter": max(max(row.values()) for row in distances.values()),
+        "mean_degree": sum(degrees[node] for node in nodes) / len(nodes),
+        "max_degree": max(degrees[node] for node in nodes),
+        "dead_ends": sum(degrees[node] == 1 for node in nodes),
+        "optimal_moves": solution["optimal_moves"],
+        "ambiguous_rooms": sum(size for size in category_sizes.values() if size > 1),
+        "num_candidates": solution["num_candidates"],
+        "decoy_start_distance": (sum(distances[start][node] for node in decoys) / len(decoys)) if decoys else None,
+        "decoy_target_distance": min(distances[target][node] for node in decoys) if decoys else None,
+        "expected_moves": solution["expected_moves"],
+        "worst_case_moves": solution["worst_case_moves"],
+        "reference_moves": solution["reference_moves"],
+    }
+
+
+def build_index(instances: Dict) -> Dict:
+    """
+    Args:
+        instances: Instances in the legacy structure (see escaperoom/instance_shards.py - open_instances)
+
+    Returns:
+        The index, {"format": ..., "version": ..., "columns": {column: [value per instance]}}
+    """
+    columns = {column: [] for column in KEY_COLUMNS + FEATURES}
+    for experiment in instances["experiments"]:
+        for game_instance in experiment["game_instances"]:
+            columns["experiment"].append(experiment["name"])
+            columns["game_id"].append(game_instance["game_id"])
+            columns["map_hash"].append(game_instance.get("map_hash") or map_hash(game_instance))
+            for feature, value in instance_features(game_instance).items():
+                columns[feature].append(value)
+    return {"format": FORMAT, "version": VERSION, "columns": columns}
+
+
+class DifficultyIndex:
+    """
+    Columns of a difficulty index as numpy arrays, features are float arrays with NaN for None
+    """
+
+    def __init__(self, index: Dict):
+        if index.get("format") != FORMAT or index.get("version", 0) > VERSION:
+            raise ValueError(f"Not a supported {FORMAT} index")
+        columns = index["columns"]
+        self.keys = list(zip(columns["experiment"], columns["game_id"]))
+        self.columns = {column: np.array(columns[column], dtype=object) for column in KEY_COLUMNS}
+        for feature in FEATURES:
+            self.columns[feature] = np.array([np.nan if v is None else v for v in columns[feature]], dtype=float)
+
+    @classmethod
+    def load(cls, path: str) -> "DifficultyIndex":
+        return cls(serialization.load(path))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    def select(self, where: Dict[str, Tuple[float, float]] = None) -> np.ndarray:
+        """
+        Args:
+            where: feature -> (min, max), inclusive
+
+        Returns:
+            Indices of the instances within all ranges
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for feature, (low, high) in (where or {}).items():
+            mask &= (self.columns[feature] >= low) & (self.columns[feature] <= high)
+        return np.flatnonzero(mask)
+
+    def bins(self, feature: str, n_bins: int = DEFAULT_BINS, rows: np.ndarray = None) -> np.ndarray:
+        """
+        Bin of every row, by quantiles of the feature - or by value, if it has at most n_bins distinct values.
+        Rows with NaN get bin -1
+
+        Args:
+            rows: Indices of the rows to bin (default all), the quantiles are computed over these rows
+        """
+        values = self.columns[feature] if rows is None else self.columns[feature][rows]
+        finite = values[~np.isnan(values)]
+        distinct = np.unique(finite)
+        if len(distinct) <= n_bins:
+            edges = distinct[1:]
+        else:
+            edges = np.unique(np.quantile(finite, np.linspace(0, 1, n_bins + 1)[1:-1]))
+        bins = np.searchsorted(edges, values, side="right")
+        bins[np.isnan(values)] = -1
+        return bins
+
+    def strata(self, by: List[str], n_bins: int = DEFAULT_BINS, rows: np.ndarray = None) -> Dict[Tuple, List[int]]:
+        """
+        Returns:
+            Stratum (bin per feature in by) -> row indices
+        """
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows)
+        bins = [self.bins(feature, n_bins, rows) for feature in by]
+        strata = defaultdict(list)
+        for i, row in enumerate(rows):
+            strata[tuple(int(b[i]) for b in bins)].append(int(row))
+        return dict(sorted(strata.items()))
+
+    def stratified_sample(self, n: int, by: List[str], n_bins: int = DEFAULT_BINS,
+                          where: Dict[str, Tuple[float, float]] = None, seed: int = 0) -> List[Tuple[str, int]]:
+        """
+        Draw n instances without replacement, equally many per stratum - strata with fewer instances are used up and
+        the rest is drawn from the others
+
+        Returns:
+            (experiment, game_id) of the drawn instances, grouped by stratum
+        """
+        rng = np.random.default_rng(seed)
+        strata = self.strata(by, n_bins, self.select(where))
+        pools = {stratum: list(rng.permutation(rows)) for stratum, rows in strata.items()}
+        drawn = defaultdict(list)
+        remaining = min(n, sum(len(rows) for rows in pools.values()))
+        while remaining > 0:
+            active = [stratum for stratum, rows in pools.items() if rows]
+            per_stratum = max(1, remaining // len(active))
+            for k in rng.permutation(len(active)):
+                take = min(per_stratum, len(pools[active[k]]), remaining)
+                drawn[active[k]].extend(pools[active[k]][:take])
+                pools[active[k]] = pools[active[k]][take:]
+                remaining -= take
+                if remaining == 0:
+                    break
+        return [self.keys[row] for stratum in sorted(drawn) for row in drawn[stratum]]
+
+
+def make_experiment(instances: Dict, keys: List[Tuple[str, int]], name: str) -> Dict:
+    """
+    Args:
+        instances: Pool of instances, legacy structure
+        keys: (experiment, game_id) of the instances to use, in order
+
+    Returns:
+        An instances file with a single experiment, the game ids are renumbered and the source of every instance is
+        kept in source_experiment / source_game_id
+    """
+    wanted = set(keys)
+    found = {}
+    for experiment in instances["experiments"]:
+        for game_instance in experiment["game_instances"]:
+            key = (experiment["name"], game_instance["game_id"])
+            if key in wanted:
+                found[key] = dict(game_instance)
+    missing = wanted - set(found)
+    if missing:
+        raise KeyError(f"Instances not in the pool: {sorted(missing)[:5]}")
+
+    game_instances = []
+    for game_id, key in enumerate(keys):
+        game_instance = copy.deepcopy(found[key])
+        game_instance.update({"game_id": game_id, "source_experiment": key[0], "source_game_id": key[1]})
+        game_instances.append(game_instance)
+    return {"experiments": [{"name": name, "game_instances": game_instances}]}
+
+
+def parse_where(items: List[str]) -> Dict[str, Tuple[float, float]]:
+    """
+    Args:
+        items: feature=min:max, either bound may be left out
+    """
+    where = {}
+    for item in items or []:
+        feature, _, bounds = item.partition("=")
+        if feature not in FEATURES:
+            raise ValueError(f"Unknown feature {feature}, expected one of {FEATURES}")
+        low, _, high = bounds.partition(":")
+        where[feature] = (float(low) if low else -np.inf, float(high) if high else np.inf)
+    return where
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Difficulty index of instances and stratified sampling")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Compute the features of every instance")
+    build_parser.add_argument("instances", help="Instances file or shards directory")
+    build_parser.add_argument("--output", required=True)
+
+    sample_parser = subparsers.add_parser("sample", help="Draw instances stratified by features")
+    sample_parser.add_argument("index")
+    sample_parser.add_argument("instances", help="Instances file or shards directory the index was built from")
+    sample_parser.add_argument("--n", type=int, required=True)
+    sample_parser.add_argument("--by", nargs="+", default=["optimal_moves", "num_candidates"], choices=FEATURES)
+    sample_parser.add_argument("--bins", type=int, default=DEFAULT_BINS)
+    sample_parser.add_argument("--where", nargs="*", default=None, help="feature=min:max")
+    sample_parser.add_argument("--seed", type=int, default=0)
+    sample_parser.add_argument("--name", default="stratified", help="Experiment name")
+    sample_parser.add_argument("--output", default=None, help="Write the drawn instances to this file")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        index = build_index(open_instances(args.instances))
+        path = serialization.dump(index, args.output)
+        print(f"Indexed {len(index['columns']['game_id'])} instances in {path}")
+        return
+
+    index = DifficultyIndex.load(args.index)
+    where = parse_where(args.where)
+    rows = index.select(where)
+    keys = index.stratified_sample(args.n, args.by, args.bins, where, args.seed)
+    drawn = set(keys)
+    print(f"Drew {len(keys)} of {len(rows)} instances")
+    for stratum_rows in index.strata(args.by, args.bins, rows).values():
+        n_drawn = sum(index.keys[row] in drawn for row in stratum_rows)
+        ranges = []
+        for feature in args.by:
+            low, high = np.min(index[feature][stratum_rows]), np.max(index[feature][stratum_rows])
+            ranges.append(f"{feature} {low:g}" + (f"-{high:g}" if high > low else ""))
+        print(f"{', '.join(ranges):<56} {n_drawn:>4} of {len(stratum_rows)}")
+
+    if args.output:
+        instances = make_experiment(open_instances(args.instances), keys, args.name)
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        print(f"Written to {serialization.dump(instances, args.output)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""
+Cache of pre-fetched, resized and JPEG-encoded room images, shared across turns, episodes and models.
+
+Instances reference the ADE20K images by URL, and the backends fetch (http) or read and base64-encode (local path)
+the image on every request it is part of. The cache stores every image once per target resolution, keyed by
+sha256(url + resolution), as a downscaled JPEG file in the cache directory. The game master passes the cached file
+to the players instead of the URL, so backends only read and encode a small local file. Logs keep the original URLs.
+
+Set via the experiment config - {"image_cache": true, "image_size": 768}
+The cache directory defaults to ~/.cache/escaperoom/images and can be set with ESCAPEROOM_IMAGE_CACHE.
+
+Populate the cache ahead of a run:
+python escaperoom/image_cache.py --size 768
+"""
+import argparse
+import hashlib
+import io
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable
+
+from PIL import Image
+
+from escaperoom.instance_format import load_instances
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.environ.get("ESCAPEROOM_IMAGE_CACHE",
+                                   os.path.join(os.path.expanduser("~"), ".cache", "escaperoom", "images"))
+DEFAULT_IMAGE_SIZE = 768  # Longest side of the cached images, in pixels
+JPEG_QUALITY = 90
+
+
+def _load_source(source: str, timeout: float = 30) -> bytes:
+    if source.startswith("http"):
+        import requests  # Deferred, only fetching needs it
+        response = requests.get(source, timeout=timeout)
+        response.raise_for_status()
+        return response.content
+    with open(source, "rb") as f:
+        return f.read()
+
+
+def encode_jpeg(image_bytes: bytes, size: int) -> bytes:
+    """
+    Downscale an image to at most size x size (keeps the aspect ratio, never upscales) and encode it as JPEG
+    """
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        image = image.convert("RGB")
+        image.thumbnail((size, size))
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=JPEG_QUALITY)
+    return buffer.getvalue()
+
+
+class ImageCache:
+    """
+    Disk cache of resized images, with an in-memory index of the cached paths
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, size: int = DEFAULT_IMAGE_SIZE):
+        self.cache_dir = cache_dir
+        self.size = size
+        self._paths: Dict[str, str] = {}
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, source: str) -> str:
+        return hashlib.sha256(f"{source}|{self.size}".encode("utf-8")).hexdigest()
+
+    def path_for(self, source: str) -> str:
+        key = self.key(source)
+        return os.path.join(self.cache_dir, key[:2], f"{key}.jpg")
+
+    def fetch(self, source: str) -> str:
+        """
+        Cache a single image, if it is not cached yet
+
+        Args:
+            source: URL or local path of the image
+
+        Returns:
+            Path of the cached image
+        """
+        path = self.path_for(source)
+        if not os.path.exists(path):
+            data = encode_jpeg(_load_source(source), self.size)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary file first, so that concurrent runs never read a partial image
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            logger.info(f"Cached {source} -> {path}")
+        self._paths[source] = path
+        return path
+
+    def get(self, source: str) -> str:
+        """
+        Path of the cached image, fetched on a miss. Falls back to source if the image cannot be cached,
+        so that the game can still be played
+
+        Args:
+            source: URL or local path of the image
+        """
+        path = self._paths.get(source)
+        if path is not None:
+            return path
+        try:
+            return self.fetch(source)
+        except Exception as error:
+            logger.warning(f"Could not cache image {source}, using the original: {error}")
+            return source
+
+    def prefetch(self, sources: Iterable[str], max_workers: int = 8) -> Dict[str, str]:
+        """
+        Cache all images concurrently
+
+        Returns:
+            A dict mapping each source to its cached path (or to itself if it could not be cached)
+        """
+        sources = list(dict.fromkeys(sources))
+        if all(source in self._paths for source in sources):
+            return {source: self._paths[source] for source in sources}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return dict(zip(sources, executor.map(self.get, sources)))
+
+
+_CACHES: Dict[tuple, ImageCache] = {}
+
+
+def get_image_cache(size: int = DEFAULT_IMAGE_SIZE, cache_dir: str = DEFAULT_CACHE_DIR) -> ImageCache:
+    """
+    Shared cache per (cache_dir, size), so that the in-memory index is reused across episodes
+    """
+    key = (cache_dir, size)
+    if key not in _CACHES:
+        _CACHES[key] = ImageCache(cache_dir, size)
+    return _CACHES[key]
+
+
+def get_instance_images(instances: Dict) -> list:
+    images = []
+    for experiment in instances["experiments"]:
+        for game_instance in experiment["game_instances"]:
+            images.extend(game_instance["node_to_image"].values())
+    return list(dict.fromkeys(images))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Populate the image cache for all images of an instances file")
+    parser.add_argument("--instances", default=os.path.join("escaperoom", "in", "instances.json"))
+    parser.add_argument("--size", type=int, default=DEFAULT_IMAGE_SIZE)
+    parser.add_argument("--cache_dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    instances = load_instances(args.instances)
+    images = get_instance_images(instances)
+    cache = get_image_cache(args.size, args.cache_dir)
+    cached = cache.prefetch(images, max_workers=args.workers)
+    failed = [source for source, path in cached.items() if source == path]
+    print(f"Cached {len(cached) - len(failed)}/{len(images)} images in {args.cache_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Image history policies for the player contexts.
+
+Every context set by the EscapeRoom game master carries the image of the current room, and the players keep all
+previous contexts in their message history - so every request sends all images seen so far. The image history
+policy drops images from older messages before the next request:
+    all: Keep all images (default)
+    last_k: Keep the last k images
+    first_last: Keep the first image and the image of the current context
+    dedupe: Keep only the latest occurrence of each image (Explorer revisiting a room, Guide image on every question)
+
+Set via the experiment config - {"image_history": "last_k", "image_history_k": 2}
+The text of the messages is never changed.
+"""
+from typing import Dict, List
+
+IMAGE_HISTORY_POLICIES = ("all", "last_k", "first_last", "dedupe")
+DEFAULT_IMAGE_HISTORY = "all"
+DEFAULT_IMAGE_HISTORY_K = 2
+
+
+def validate_image_history(policy: str, k: int = DEFAULT_IMAGE_HISTORY_K):
+    """
+    Raises:
+        ValueError: For an unknown policy, or k < 1 with last_k - it would drop every image, even the current one
+    """
+    if policy not in IMAGE_HISTORY_POLICIES:
+        raise ValueError(f"Unknown image history policy {policy}, expected one of {IMAGE_HISTORY_POLICIES}")
+    if policy == "last_k" and (not isinstance(k, int) or k < 1):
+        raise ValueError(f"image_history_k must be an integer of at least 1 for last_k (got {k})")
+
+
+def _keep_flags(images: List[str], policy: str, k: int) -> List[bool]:
+    """
+    Args:
+        images: All images in the order they are sent, the last one belongs to the current context
+
+    Returns:
+        A flag for each image, True if the image is kept
+    """
+    if policy == "all":
+        return [True] * len(images)
+    if policy == "last_k":
+        return [i >= len(images) - k for i in range(len(images))]
+    if policy == "first_last":
+        return [i == 0 or i == len(images) - 1 for i in range(len(images))]
+    # dedupe
+    last_occurrence = {image: i for i, image in enumerate(images)}
+    return [last_occurrence[image] == i for i, image in enumerate(images)]
+
+
+def apply_image_history(messages: List[Dict], context: Dict, policy: str = DEFAULT_IMAGE_HISTORY,
+                        k: int = DEFAULT_IMAGE_HISTORY_K) -> int:
+    """
+    Drop images from the message history of a player (in place), the images of the context are always kept
+
+    Args:
+        messages: Message history of a player
+        context: Context for the next request
+        policy: One of IMAGE_HISTORY_POLICIES
+        k: Number of images to keep for last_k
+
+    Returns:
+        Number of images sent with the next request (history + context)
+
+    Raises:
+        ValueError: For an unknown policy, or k < 1 with last_k
+    """
+    validate_image_history(policy, k)
+
+    history = [message for message in messages if message.get("image")]
+    images = [image for message in history for image in message["image"]]
+    context_images = context.get("image") or []
+    keep = _keep_flags(images + list(context_images), policy, k)
+
+    idx = 0
+    for message in history:
+        kept = [image for image, flag in zip(message["image"], keep[idx:idx + len(message["image"])]) if flag]
+        idx += len(message["image"])
+        if kept:
+            message["image"] = kept
+        else:
+            del message["image"]
+
+    return sum(len(message["image"]) for message in history if "image" in message) + len(context_images)
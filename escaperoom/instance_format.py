@@ -0,0 +1,256 @@
+"""
+Compact instance file format.
+
+Every instance in instances.json repeats the prompt templates, and stores each map four ways (named/unnamed nodes
+and edges, node_to_*/category_to_* dicts) keyed by stringified tuples. The compact format stores each map once:
+    strings: All strings (templates, image URLs, categories, graph ids) interned once per file
+    nodes: Grid coordinates [[x, y], ...], in the order of unnamed_nodes
+    categories / images: String ids per node
+    edges: Node index pairs, in the order of unnamed_edges
+    start / target: Node indices
+    interned: Other string fields as string ids (explorer_prompt, graph_id, ...)
+    fields: Other fields verbatim (game_id, m, n, ...) and any legacy field that cannot be derived exactly
+
+LazyInstance is a read-only Mapping with the legacy keys, each legacy field is materialised on first access.
+The encoder checks that every derived field matches the original, so the conversion is lossless.
+
+python escaperoom/instance_format.py escaperoom/in/instances.json escaperoom/in/instances_compact.json
+"""
+import argparse
+import ast
+import json
+import os
+from collections.abc import Mapping
+from typing import Any, Dict, List
+
+from escaperoom import serialization
+
+FORMAT = "escaperoom-compact"
+VERSION = 1
+
+# Legacy fields derived from the compact map
+DERIVED_KEYS = ("named_nodes", "unnamed_nodes", "named_edges", "unnamed_edges", "node_to_category",
+                "category_to_node", "node_to_image", "category_to_image", "start_node", "target_node")
+
+
+def _node_str(node) -> str:
+    return str(tuple(node))
+
+
+class _Decoder:
+    """
+    Derives the legacy fields from a compact record
+    """
+
+    def __init__(self, record: Dict, strings: List[str]):
+        self.record = record
+        self.strings = strings
+        self._nodes = None
+
+    @property
+    def nodes(self) -> List[str]:
+        if self._nodes is None:
+            self._nodes = [_node_str(node) for node in self.record["nodes"]]
+        return self._nodes
+
+    def categories(self) -> List[str]:
+        return [self.strings[i] for i in self.record["categories"]]
+
+    def images(self) -> List[str]:
+        return [self.strings[i] for i in self.record["images"]]
+
+    def decode(self, key: str) -> Any:
+        if key == "unnamed_nodes":
+            return list(self.nodes)
+        if key == "named_nodes":
+            return self.categories()
+        if key == "unnamed_edges":
+            return [[self.nodes[a], self.nodes[b]] for a, b in self.record["edges"]]
+        if key == "named_edges":
+            categories = self.categories()
+            return [[categories[a], categories[b]] for a, b in self.record["edges"]]
+        if key == "node_to_category":
+            return dict(zip(self.nodes, self.categories()))
+        if key == "node_to_image":
+            return dict(zip(self.nodes, self.images()))
+        if key == "category_to_node":
+            # The last node of a category wins, as in BaseMap.metadata
+            return dict(zip(self.categories(), self.nodes))
+        if key == "category_to_image":
+            return dict(zip(self.categories(), self.images()))
+        if key == "start_node":
+            return self.nodes[self.record["start"]]
+        if key == "target_node":
+            return self.nodes[self.record["target"]]
+        raise KeyError(key)
+
+
+class LazyInstance(Mapping):
+    """
+    Read-only legacy view of a compact instance, fields are materialised on first access and cached
+    """
+
+    def __init__(self, record: Dict, strings: List[str], keys: List[str]):
+        self._record = record
+        self._strings = strings
+        self._keys = record.get("keys", keys)
+        self._decoder = _Decoder(record, strings) if "nodes" in record else None
+        self._cache: Dict[str, Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._cache:
+            if key in self._record["fields"]:
+                value = self._record["fields"][key]
+            elif key in self._record["interned"]:
+                value = self._strings[self._record["interned"][key]]
+            elif key in self._keys and self._decoder is not None:
+                value = self._decoder.decode(key)
+            else:
+                raise KeyError(key)
+            self._cache[key] = value
+        return self._cache[key]
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def to_dict(self) -> Dict:
+        return {key: self[key] for key in self._keys}
+
+
+class _StringTable:
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+    def intern(self, value: str) -> int:
+        if value not in self._ids:
+            self._ids[value] = len(self.strings)
+            self.strings.append(value)
+        return self._ids[value]
+
+
+def _encode_map(game_instance: Dict, table: _StringTable) -> Dict:
+    """
+    Compact map of an instance, raises KeyError/ValueError for instances without a complete map
+    """
+    nodes = game_instance["unnamed_nodes"]
+    index = {node: i for i, node in enumerate(nodes)}
+    coords = [list(ast.literal_eval(node)) for node in nodes]
+    if [_node_str(coord) for coord in coords] != nodes:
+        raise ValueError("Node names are not formatted as tuples")
+    return {
+        "nodes": coords,
+        "categories": [table.intern(game_instance["node_to_category"][node]) for node in nodes],
+        "images": [table.intern(game_instance["node_to_image"][node]) for node in nodes],
+        "edges": [[index[a], index[b]] for a, b in game_instance["unnamed_edges"]],
+        "start": index[game_instance["start_node"]],
+        "target": index[game_instance["target_node"]],
+    }
+
+
+def encode_instance(game_instance: Dict, table: _StringTable, keys: List[str]) -> Dict:
+    """
+    Args:
+        game_instance: Legacy instance
+        table: String table of the file
+        keys: Default key order of the file
+
+    Returns:
+        Compact record of the instance
+    """
+    record = {"interned": {}, "fields": {}}
+    try:
+        record.update(_encode_map(game_instance, table))
+        decoder = _Decoder(record, table.strings)
+    except (KeyError, ValueError, SyntaxError):
+        decoder = None
+
+    for key, value in game_instance.items():
+        if key in DERIVED_KEYS and decoder is not None and decoder.decode(key) == value:
+            continue
+        if isinstance(value, str):
+            record["interned"][key] = table.intern(value)
+        else:
+            record["fields"][key] = value
+    if list(game_instance) != keys:
+        record["keys"] = list(game_instance)
+    return record
+
+
+def to_compact(instances: Dict) -> Dict:
+    """
+    Convert a legacy instances dict to the compact format
+    """
+    table = _StringTable()
+    first = next((inst for exp in instances["experiments"] for inst in exp["game_instances"]), {})
+    keys = list(first)
+    experiments = []
+    for experiment in instances["experiments"]:
+        compact = {key: value for key, value in experiment.items() if key != "game_instances"}
+        compact["game_instances"] = [encode_instance(inst, table, keys) for inst in experiment["game_instances"]]
+        experiments.append(compact)
+    return {"format": FORMAT, "version": VERSION, "keys": keys, "strings": table.strings,
+            "experiments": experiments}
+
+
+def is_compact(instances: Dict) -> bool:
+    return instances.get("format") == FORMAT
+
+
+def from_compact(instances: Dict, lazy: bool = True) -> Dict:
+    """
+    Legacy view of compact instances, legacy instances are returned unchanged
+
+    Args:
+        instances: Parsed instances file
+        lazy: Return LazyInstance views, otherwise plain dicts
+
+    Raises:
+        ValueError: For an unsupported version of the compact format
+    """
+    if not is_compact(instances):
+        return instances
+    if instances["version"] > VERSION:
+        raise ValueError(f"Unsupported {FORMAT} version {instances['version']}, expected at most {VERSION}")
+    strings, keys = instances["strings"], instances["keys"]
+    experiments = []
+    for experiment in instances["experiments"]:
+        legacy = {key: value for key, value in experiment.items() if key != "game_instances"}
+        views = [LazyInstance(record, strings, keys) for record in experiment["game_instances"]]
+        legacy["game_instances"] = views if lazy else [view.to_dict() for view in views]
+        experiments.append(legacy)
+    return {"experiments": experiments}
+
+
+def load_instances(path: str, lazy: bool = True) -> Dict:
+    """
+    Load an instances file in the legacy or the compact format, as .json or .msgpack file
+
+    Returns:
+        Instances in the legacy structure, {"experiments": [{"name": ..., "game_instances": [...]}, ...]}
+    """
+    return from_compact(serialization.load(path), lazy=lazy)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert an instances file to the compact format")
+    parser.add_argument("input", help="Legacy instances file")
+    parser.add_argument("output", help="Compact instances file")
+    args = parser.parse_args()
+
+    instances = serialization.load(args.input)
+    compact = to_compact(instances)
+    if from_compact(compact, lazy=False) != instances:
+        raise ValueError(f"{args.input} does not round-trip through the compact format")
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(compact, f, separators=(",", ":"), ensure_ascii=False)
+    print(f"{args.input} ({os.path.getsize(args.input) / 1e3:.0f} kB) -> "
+          f"{args.output} ({os.path.getsize(args.output) / 1e3:.0f} kB)")
+
+
+if __name__ == '__main__':
+    main()
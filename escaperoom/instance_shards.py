@@ -0,0 +1,161 @@
+"""
+Sharded instance storage with streaming reads and random access.
+
+A shards directory holds one JSON Lines file per experiment (one legacy instance per line) and an index:
+    index.json: {"format": "escaperoom-shards", "version": 1, "experiments": [
+                    {"name": ..., "config": {<other experiment keys>}, "file": "00_small.jsonl",
+                     "game_ids": [0, 1, ...], "offsets": [0, 10342, ..., <file size>]}, ...]}
+
+Instances are read one line at a time - iterating an experiment streams its file, and (experiment, game_id) lookups
+seek to the byte offset of the line - so memory use does not grow with the number of instances.
+
+ShardedInstances.as_instances() returns the legacy structure {"experiments": [{"name": ..., "game_instances": ...}]}
+with InstanceShard sequences in place of the instance lists, which is what GameBenchmark.run iterates over.
+
+python escaperoom/instance_shards.py escaperoom/in/instances.json escaperoom/in/instances_shards
+"""
+import argparse
+import json
+import os
+from collections.abc import Sequence
+from typing import Dict, Iterator, List, Tuple
+
+from escaperoom import serialization
+from escaperoom.instance_format import load_instances
+
+FORMAT = "escaperoom-shards"
+VERSION = 1
+INDEX_NAME = "index.json"
+
+
+class InstanceShard(Sequence):
+    """
+    Instances of one experiment, read from a JSON Lines file on access
+    """
+
+    def __init__(self, path: str, game_ids: List, offsets: List[int]):
+        self.path = path
+        self.game_ids = game_ids
+        self.offsets = offsets
+        self._positions = {game_id: i for i, game_id in enumerate(game_ids)}
+
+    def __len__(self) -> int:
+        return len(self.game_ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        with open(self.path, "rb") as f:
+            f.seek(self.offsets[i])
+            return serialization.loads(f.read(self.offsets[i + 1] - self.offsets[i]))
+
+    def __iter__(self) -> Iterator[Dict]:
+        with open(self.path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    yield serialization.loads(line)
+
+    def get(self, game_id) -> Dict:
+        """
+        Raises:
+            KeyError: If there is no instance with game_id
+        """
+        return self[self._positions[game_id]]
+
+
+class ShardedInstances:
+    """
+    Reader for a shards directory, only the index is loaded on construction
+    """
+
+    def __init__(self, shards_dir: str):
+        self.shards_dir = shards_dir
+        with open(os.path.join(shards_dir, INDEX_NAME), "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("format") != FORMAT or index.get("version", 0) > VERSION:
+            raise ValueError(f"{shards_dir} is not a supported {FORMAT} directory")
+        self.experiments = index["experiments"]
+        self._shards = {exp["name"]: InstanceShard(os.path.join(shards_dir, exp["file"]), exp["game_ids"],
+                                                   exp["offsets"]) for exp in self.experiments}
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards.values())
+
+    def shard(self, exp_name: str) -> InstanceShard:
+        return self._shards[exp_name]
+
+    def get(self, exp_name: str, game_id) -> Dict:
+        return self._shards[exp_name].get(game_id)
+
+    def iter_instances(self) -> Iterator[Tuple[Dict, Dict]]:
+        """
+        Yields:
+            (experiment config, instance) for every instance, in file order
+        """
+        for exp in self.experiments:
+            config = {"name": exp["name"], **exp["config"]}
+            for game_instance in self._shards[exp["name"]]:
+                yield config, game_instance
+
+    def as_instances(self) -> Dict:
+        return {"experiments": [{"name": exp["name"], **exp["config"], "game_instances": self._shards[exp["name"]]}
+                                for exp in self.experiments]}
+
+
+def write_shards(instances: Dict, shards_dir: str) -> Dict:
+    """
+    Write instances (legacy structure) as shards
+
+    Returns:
+        The index
+    """
+    os.makedirs(shards_dir, exist_ok=True)
+    experiments = []
+    for idx, experiment in enumerate(instances["experiments"]):
+        file_name = f"{idx:02d}_{experiment['name']}.jsonl"
+        game_ids, offsets = [], [0]
+        with open(os.path.join(shards_dir, file_name), "wb") as f:
+            for game_instance in experiment["game_instances"]:
+                line = json.dumps(dict(game_instance), ensure_ascii=False).encode("utf-8") + b"\n"
+                f.write(line)
+                game_ids.append(game_instance["game_id"])
+                offsets.append(offsets[-1] + len(line))
+        experiments.append({"name": experiment["name"],
+                            "config": {k: v for k, v in experiment.items() if k not in ("name", "game_instances")},
+                            "file": file_name, "game_ids": game_ids, "offsets": offsets})
+    index = {"format": FORMAT, "version": VERSION, "experiments": experiments}
+    with open(os.path.join(shards_dir, INDEX_NAME), "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    return index
+
+
+def is_shards_dir(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, INDEX_NAME))
+
+
+def open_instances(path: str) -> Dict:
+    """
+    Instances in the legacy structure from a shards directory (streamed), or a legacy/compact instances file
+    """
+    if is_shards_dir(path):
+        return ShardedInstances(path).as_instances()
+    return load_instances(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Split an instances file into one JSON Lines shard per experiment")
+    parser.add_argument("input", help="Instances file, legacy or compact format")
+    parser.add_argument("output", help="Shards directory")
+    args = parser.parse_args()
+
+    index = write_shards(load_instances(args.input), args.output)
+    n_instances = sum(len(exp["game_ids"]) for exp in index["experiments"])
+    print(f"Wrote {n_instances} instances in {len(index['experiments'])} shards to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
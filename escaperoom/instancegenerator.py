@@ -1,15 +1,22 @@
+import logging
 import os
 
 import numpy as np
 from clemcore.clemgame import GameInstanceGenerator
 
+from engine.map_hashing import MapIndex
 from engine.maps import BaseMap
+from escaperoom import serialization
+from escaperoom.profiling import profiled
 
 # CONFIG
 N = 10 # Number of instances per experiment
 np_rng = np.random.default_rng(seed=12)
 random_seeds = [np_rng.integers(1,1000) for i in range(N)]
 RESOURCES_DIR = os.path.join(os.path.dirname(__file__), "resources")
+MAX_DEDUP_ATTEMPTS = 20 # Seeds tried per instance before a duplicate map is accepted
+
+logger = logging.getLogger(__name__)
 
 
 def _make_native(obj):
@@ -31,7 +38,23 @@ class EscapeRoomInstanceGenerator(GameInstanceGenerator):
         super().__init__(os.path.dirname(os.path.abspath(__file__)))
 
 
-    def on_generate(self, seed=None, **kwargs):
+    @profiled("generate", label=lambda self, filename="instances.json", *args, **kwargs: filename)
+    def generate(self, filename="instances.json", serializer=None, **kwargs):
+        """
+        Generate the instances and store them in in/ with the given serializer (json, orjson or msgpack,
+        see escaperoom/serialization.py)
+        """
+        self.on_generate(**kwargs)
+        serialization.dump(self.instances, os.path.join(self.game_path, "in", filename), serializer)
+
+    def on_generate(self, seed=None, dedup=False, symmetries=False, **kwargs):
+        """
+        Args:
+            dedup: Reject maps that are duplicates (engine/map_hashing.py) of a map generated earlier in this run,
+                   and generate the instance again with another seed. Off by default, so that the seeds reproduce
+                   the published in/instances.json
+            symmetries: Rotated and mirrored maps are duplicates as well
+        """
         explorer_prompt = self.load_template(os.path.join(RESOURCES_DIR, "initial_prompts", "explorer.template"))
         guide_prompt = self.load_template(os.path.join(RESOURCES_DIR, "initial_prompts", "guide.template"))
         explorer_reprompt = self.load_template(
@@ -42,6 +65,7 @@ class EscapeRoomInstanceGenerator(GameInstanceGenerator):
         )
 
         experiments = self.load_json(os.path.join(RESOURCES_DIR, "experiment_config.json"))
+        map_index = MapIndex(symmetries=symmetries)
 
         for exp in experiments.keys():
 
@@ -57,12 +81,22 @@ class EscapeRoomInstanceGenerator(GameInstanceGenerator):
             end_type = experiments[exp]["end_type"]
 
             for i in range(N):
-                base_map = BaseMap(m=size, n=size, n_rooms=rooms, graph_type=graph_type, seed=random_seeds[i])
-                map_metadata = base_map.metadata(start_type=start_type,
-                                             end_type=end_type,
-                                             ambiguity=ambiguity,
-                                             ambiguity_region=ambiguity_region,
-                                             distance=distance)
+                for attempt in range(MAX_DEDUP_ATTEMPTS if dedup else 1):
+                    base_map = BaseMap(m=size, n=size, n_rooms=rooms, graph_type=graph_type,
+                                       seed=random_seeds[i] + 1000 * attempt)
+                    map_metadata = base_map.metadata(start_type=start_type,
+                                                 end_type=end_type,
+                                                 ambiguity=ambiguity,
+                                                 ambiguity_region=ambiguity_region,
+                                                 distance=distance)
+                    if not dedup or map_index.add(map_metadata, (exp, game_id)):
+                        break
+                else:
+                    first = map_index.duplicate_of(map_metadata)
+                    logger.warning(f"No distinct map for {exp} game {game_id} in {MAX_DEDUP_ATTEMPTS} attempts, "
+                                   f"keeping a duplicate of {first[0]} game {first[1]}")
+                if dedup:
+                    map_metadata["map_hash"] = map_index.hash(map_metadata)
                 map_metadata["explorer_prompt"] = explorer_prompt
                 map_metadata["guide_prompt"] = guide_prompt
                 map_metadata["explorer_reprompt"] = explorer_reprompt
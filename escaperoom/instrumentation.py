@@ -0,0 +1,210 @@
+"""
+Per-turn latency and payload instrumentation for the EscapeRoom game master.
+
+Every turn (one player call) records:
+    player, model: Tag of the player and name of its model
+    phases: Wall time in seconds of
+        player: The player call - model backend latency, or the scripted policy
+        step: The whole game master step() after the call, i.e. the game master overhead of the turn, split into
+            validate: Game rules (escaperoom/simulator.py) and event logging
+            parse: Response parsing
+            update: Setting the next contexts
+            context: Building contexts - image cache lookups and image history (part of update)
+    prompt_chars: Characters of the context, history_chars: Characters of all messages sent with the request
+    images: Images sent with the request (history + context, after the image history policy was applied)
+    response_chars: Characters of the response
+
+Time spent in the game master before the first turn (setup, first contexts) is recorded as setup phases.
+The metrics of an episode are stored as metrics.json (metrics.msgpack with ESCAPEROOM_SERIALIZER=msgpack, see
+escaperoom/serialization.py) next to interactions.json, they are not part of the interactions, so the scorer is not
+affected.
+
+Aggregate the metrics of all episodes in a results directory, per model pair and experiment:
+python escaperoom/instrumentation.py --results results --output metrics.csv
+"""
+import argparse
+import csv
+import functools
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+from escaperoom import serialization
+
+METRICS_FILE = "metrics.json"
+TURN_PHASES = ("player", "step", "validate", "parse", "update", "context")
+
+
+def count_images(messages: List[Dict]) -> int:
+    return sum(len(message.get("image", [])) for message in messages)
+
+
+def count_chars(messages: List[Dict]) -> int:
+    return sum(len(message.get("content", "")) for message in messages)
+
+
+def _stats(values: List[float]) -> Dict:
+    if not values:
+        return {"n": 0}
+    return {"n": len(values), "total": float(np.sum(values)), "mean": float(np.mean(values)),
+            "p50": float(np.percentile(values, 50)), "p95": float(np.percentile(values, 95)),
+            "max": float(np.max(values))}
+
+
+class EpisodeMetrics:
+    """
+    Collects the phase timings and payload sizes of the turns of one episode
+    """
+
+    def __init__(self, experiment: str = None, game_id: int = None):
+        self.experiment = experiment
+        self.game_id = game_id
+        self.turns: List[Dict] = []
+        self.setup: Dict[str, float] = defaultdict(float)
+        self._turn = None
+        self._start = time.perf_counter()
+        self._end = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Add the wall time of the block to phase `name` of the current turn (or of the setup, outside of turns)
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            phases = self._turn["phases"] if self._turn is not None else self.setup
+            phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+
+    def start_turn(self, round_idx: int, player, context: Dict, history: List[Dict]):
+        """
+        Args:
+            round_idx: Current round of the game master
+            player: The player that is called next
+            context: Context of the call
+            history: Message history of the player, sent with the context (see master.py - player_history)
+        """
+        messages = history + [context]
+        self._turn = {"round": round_idx, "player": player.tag, "model": player.model.get_name(),
+                      "phases": {}, "prompt_chars": len(context.get("content", "")),
+                      "history_chars": count_chars(messages), "images": count_images(messages)}
+
+    def end_turn(self, response: str):
+        self._turn["response_chars"] = len(response)
+        self.turns.append(self._turn)
+        self._turn = None
+        self._end = time.perf_counter()
+
+    def summary(self) -> Dict:
+        """
+        Returns:
+            Totals of the episode, and latency/payload statistics per player
+        """
+        wall = (self._end or time.perf_counter()) - self._start
+        phase_totals = {name: float(sum(turn["phases"].get(name, 0.0) for turn in self.turns))
+                        for name in TURN_PHASES}
+        setup_total = float(sum(value for name, value in self.setup.items() if name != "context"))
+        players = {}
+        for tag in dict.fromkeys(turn["player"] for turn in self.turns):
+            turns = [turn for turn in self.turns if turn["player"] == tag]
+            players[tag] = {"model": turns[0]["model"],
+                            "latency": _stats([turn["phases"].get("player", 0.0) for turn in turns]),
+                            "images": _stats([turn["images"] for turn in turns]),
+                            "history_chars": _stats([turn["history_chars"] for turn in turns])}
+        return {"turns": len(self.turns), "wall_seconds": wall, "setup_seconds": setup_total,
+                "player_seconds": phase_totals["player"],
+                "game_master_seconds": setup_total + phase_totals["step"],
+                "phase_seconds": phase_totals, "images": int(sum(turn["images"] for turn in self.turns)),
+                "players": players}
+
+    def to_dict(self, dialogue_pair: str = None) -> Dict:
+        return {"meta": {"experiment": self.experiment, "game_id": self.game_id, "dialogue_pair": dialogue_pair},
+                "summary": self.summary(), "setup": dict(self.setup), "turns": self.turns}
+
+
+def timed_phase(name: str):
+    """
+    Decorator for game master methods, the time spent in the method is added to phase `name` of self.metrics
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.phase(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def find_metrics(results_dir: str) -> Iterator[str]:
+    msgpack_file = os.path.splitext(METRICS_FILE)[0] + serialization.MSGPACK_EXTENSION
+    for root, _, files in os.walk(results_dir):
+        if METRICS_FILE in files or msgpack_file in files:
+            yield serialization.resolve(os.path.join(root, METRICS_FILE))
+
+
+def aggregate(metrics: List[Dict]) -> List[Dict]:
+    """
+    Aggregate episode metrics per model pair and experiment
+
+    Returns:
+        One row per (dialogue pair, experiment, player) with latency, game master overhead and payload statistics
+    """
+    groups = defaultdict(list)
+    for episode in metrics:
+        groups[(episode["meta"]["dialogue_pair"], episode["meta"]["experiment"])].append(episode)
+
+    rows = []
+    for (dialogue_pair, experiment), episodes in sorted(groups.items(), key=lambda item: str(item[0])):
+        turns = [turn for episode in episodes for turn in episode["turns"]]
+        step = [turn["phases"].get("step", 0.0) for turn in turns]
+        wall = sum(episode["summary"]["wall_seconds"] for episode in episodes)
+        player_seconds = sum(episode["summary"]["player_seconds"] for episode in episodes)
+        for tag in dict.fromkeys(turn["player"] for turn in turns):
+            player_turns = [turn for turn in turns if turn["player"] == tag]
+            latency = _stats([turn["phases"].get("player", 0.0) for turn in player_turns])
+            rows.append({"dialogue_pair": dialogue_pair, "experiment": experiment, "player": tag,
+                         "model": player_turns[0]["model"], "episodes": len(episodes), "calls": len(player_turns),
+                         "latency_mean": latency["mean"], "latency_p50": latency["p50"],
+                         "latency_p95": latency["p95"], "latency_max": latency["max"],
+                         "step_mean": float(np.mean(step)),
+                         "setup_mean": float(np.mean([e["summary"]["setup_seconds"] for e in episodes])),
+                         "player_share": player_seconds / wall if wall else 0.0,
+                         "images_mean": float(np.mean([turn["images"] for turn in player_turns])),
+                         "history_chars_mean": float(np.mean([turn["history_chars"] for turn in player_turns]))})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate the per-turn metrics of all episodes in a results dir")
+    parser.add_argument("--results", default="results")
+    parser.add_argument("--output", default=None, help="Write the aggregated rows to this CSV file")
+    args = parser.parse_args()
+
+    paths = list(find_metrics(args.results))
+    if not paths:
+        parser.error(f"No {METRICS_FILE} files in {args.results}")
+    rows = aggregate([serialization.load(path) for path in paths])
+
+    print(f"{len(paths)} episodes\n")
+    print(f"{'dialogue pair':<40} {'experiment':<22} {'player':<9} {'calls':>6} {'p50 [s]':>9} {'p95 [s]':>9} "
+          f"{'GM/turn [ms]':>12} {'player share':>12} {'images':>7}")
+    for row in rows:
+        print(f"{str(row['dialogue_pair'])[:40]:<40} {str(row['experiment'])[:22]:<22} {row['player']:<9} "
+              f"{row['calls']:>6} {row['latency_p50']:>9.3f} {row['latency_p95']:>9.3f} "
+              f"{row['step_mean'] * 1e3:>12.2f} {row['player_share']:>12.1%} {row['images_mean']:>7.1f}")
+
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"\nWritten to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
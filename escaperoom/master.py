@@ -2,54 +2,75 @@
 Game Master for Escape Room
 Implementing a base variant for now...2-player game only
 """
-import ast
-# TODO : Add max number of images - If it reaches limit remove images from beginning
-# TODO : Add this value as a variable.
-
 from typing import List, Dict, Union
 import logging
 import os
 import json
-import re
 
 from clemcore.clemgame import Player, GameMaster, GameBenchmark, DialogueGameMaster, GameScorer, GameSpec
 from clemcore.backends import Model
-import numpy as np
 
-from engine.environment import MapWorldEnv
-from engine.utils import get_next_node
-from escaperoom.scorer import EscapeRoomScorer,is_efficient_move, get_neighbors_str
+from engine.event_log import capture_failures, get_event_logger
+
+from escaperoom import serialization
+from escaperoom.scorer import EscapeRoomScorer
+from escaperoom.simulator import EscapeRoomSimulator, clean_agent_response
+from escaperoom.image_history import (apply_image_history, validate_image_history, DEFAULT_IMAGE_HISTORY,
+                                      DEFAULT_IMAGE_HISTORY_K)
+from escaperoom.image_cache import get_image_cache, DEFAULT_IMAGE_SIZE
+from escaperoom.instance_format import from_compact
+from escaperoom.instance_shards import ShardedInstances, is_shards_dir
+from escaperoom.instrumentation import EpisodeMetrics, METRICS_FILE, timed_phase
+from escaperoom.profiling import profiled
+from escaperoom.policies import ScriptedPolicy, RandomExplorer, FixedGuide, get_policy
 
 logger = logging.getLogger(__name__)
-stdout_logger = logging.getLogger("escaperoom.master")
+events = get_event_logger(__name__)
 logging.getLogger("huggingface.multimodal.api").disabled = True
 
 lang_config_path = os.path.join(os.path.dirname(__file__), "resources", "language_config.json")
 with open(lang_config_path) as f:
     LANG_CFG = json.load(f)
 
+
+def player_history(player: Player) -> List[Dict]:
+    """
+    Message history of player, the list that is sent with its next model call. Edits are applied in place
+
+    NOTE: clemcore has no public access to the history. This is the only place that reads the private
+    Player._messages, as of clemcore 2.1.0 (requirements.txt) - check it when upgrading clemcore
+
+    Raises:
+        RuntimeError: If the player has no _messages list, so that the image history policy and the metrics do not
+                      silently stop working
+    """
+    messages = getattr(player, "_messages", None)
+    if not isinstance(messages, list):
+        raise RuntimeError(f"{type(player).__name__} has no _messages list, the player history of clemcore changed "
+                           f"(expected clemcore 2.1.0)")
+    return messages
+
+
 class Explorer(Player):
-    def __init__(self, model: Model):
+    def __init__(self, model: Model, policy: ScriptedPolicy = None):
         super().__init__(model)
         self.response: str = ""
         self.tag: str = "Explorer"
+        self.policy = policy if policy is not None else RandomExplorer()
 
     def _custom_response(self, context: Dict) -> str:
-        random_move = np.random.choice(["north", "south", "east", "west", "escape"])
-        if random_move == "escape":
-            return "ESCAPE"
-        else:
-            return f"MOVE: {random_move}"
+        return self.policy(context)
     
 class Guide(Player):
-    def __init__(self, model: Model):
+    def __init__(self, model: Model, policy: ScriptedPolicy = None):
         super().__init__(model)
         self.response: str = ""
         self.tag: str = "Guide"
+        self.policy = policy if policy is not None else FixedGuide()
 
 
     def _custom_response(self, context: Dict) -> str:
-        return "DESCRIPTION: This is a sample description"
+        return self.policy(context)
 
 class EscapeRoom(DialogueGameMaster):
 
@@ -58,22 +79,57 @@ class EscapeRoom(DialogueGameMaster):
 
         # Initialize Experiment/Prompts/Scorer flags
         self.experiment: str = experiment["name"]
-
-        # Scorers
-        self.aborted = False
-        self.fail = False  # Set when Explorer returns any invalid move
-        self.success = False  # Set when Explorer returns - ESCAPE and explorer location == target location
-        self.reprompt_fail = False  # Set when Explorer returns a move to an invalid room
-
-        # Pass Turn
-        self.pass_turn = True
+        # Scripted policies for programmatic players, see escaperoom/policies.py
+        self.explorer_policy: str = experiment.get("explorer_policy", "random")
+        self.guide_policy: str = experiment.get("guide_policy", "fixed")
+        # Images kept in the players' history, see escaperoom/image_history.py
+        self.image_history: str = experiment.get("image_history", DEFAULT_IMAGE_HISTORY)
+        self.image_history_k: int = experiment.get("image_history_k", DEFAULT_IMAGE_HISTORY_K)
+        validate_image_history(self.image_history, self.image_history_k)
+        self.retained_images = 0  # Images sent with the next request of the player whose context was set last
+        # Pass cached, resized images to the players instead of the URLs, see escaperoom/image_cache.py
+        self.image_cache = None
+        if experiment.get("image_cache", False):
+            self.image_cache = get_image_cache(experiment.get("image_size", DEFAULT_IMAGE_SIZE))
+        # Per-turn timings and payload sizes, stored as metrics.json, see escaperoom/instrumentation.py
+        self.metrics = EpisodeMetrics(self.experiment)
+
+    def setup(self, **game_instance):
+        self.metrics = EpisodeMetrics(self.experiment, game_instance.get("game_id"))
+        with self.metrics.phase("setup"):
+            super().setup(**game_instance)
+
+    @profiled("play", label=lambda self: f"{self.experiment}-{self.game_instance['game_id']}")
+    @capture_failures("EscapeRoom.play")
+    def play(self) -> None:
+        """
+        Same loop as DialogueGameMaster.play, the player calls and the game master steps are timed
+        """
+        done = False
+        while not done:
+            context = self.get_context_for(self.current_player)
+            self.metrics.start_turn(self.current_round, self.current_player, context,
+                                    player_history(self.current_player))
+            with self.metrics.phase("player"):
+                response = self.current_player(context)
+            with self.metrics.phase("step"):
+                done, _ = self.step(response)
+            self.metrics.end_turn(response)
+
+    def store_records(self, results_root, dialogue_pair_desc, game_record_dir):
+        super().store_records(results_root, dialogue_pair_desc, game_record_dir)
+        # Game owned, written with ESCAPEROOM_SERIALIZER (escaperoom/serialization.py)
+        serialization.dump(self.metrics.to_dict(dialogue_pair_desc),
+                           os.path.join(results_root or "results", dialogue_pair_desc, self.game_name,
+                                        game_record_dir, METRICS_FILE))
 
     def _on_setup(self, **game_instance):
 
         # Initialize Game Instance
         self.game_instance = game_instance
         self.m = game_instance["m"]
-        self.game_map = MapWorldEnv(render_mode="rgb_array", size=self.m, map_metadata=self.game_instance)
+        # Game rules and state - Explorer room, move/retry counters, question flag, success/fail/abort flags
+        self.simulator = EscapeRoomSimulator(self.game_instance)
 
         # Prompts
         self.explorer_base_prompt: str = self.game_instance["explorer_prompt"]
@@ -81,22 +137,19 @@ class EscapeRoom(DialogueGameMaster):
         self.explorer_base_failed_reprompt: str = self.game_instance["explorer_failed_reprompt"]
         self.guide_prompt: str = self.game_instance["guide_prompt"]
 
+        if self.image_cache is not None:
+            self.image_cache.prefetch(self.game_instance["node_to_image"].values())
+
         # Initialize Players
         # Player 1 (Explorer) is in the mapworld
         # Player 2 (Guide) is outside the world
-        self.explorer = Explorer(self.player_models[0])
-        self.guide = Guide(self.player_models[1])
+        self.explorer = Explorer(self.player_models[0],
+                                 policy=get_policy("explorer", self.explorer_policy, self.game_instance))
+        self.guide = Guide(self.player_models[1], policy=get_policy("guide", self.guide_policy, self.game_instance))
 
         # Setup for Explorer/Player1
         self.explorer_pos = self.game_instance["start_node"]
         self.explorer_image = self.game_instance["node_to_image"][self.explorer_pos]
-        # Keep the nodes and edges as str in master (straightforward mapping) but pass as Tuples to the mapworld engine
-
-        self.max_explorer_retries = 1 # At max, Let the explorer make 1 wrong move continuously from the same room
-        self.current_explorer_try = 0 # reset try after every explorer move (to another room)
-        self.total_explorer_moves = 0 # log all explorer moves valid+invalid here.
-        # Check against a max value for aborting
-
 
         # Name of the room category - bedroom, for example
         self.explorer_room = self.game_instance["node_to_category"][self.explorer_pos]
@@ -115,9 +168,6 @@ class EscapeRoom(DialogueGameMaster):
         self.add_player(self.guide)
         self.add_player(self.explorer)
 
-        # Question Flag to keep track of - when explorer asks the questions, and if guide responds with answer
-        self.question_flag = 0
-
     def _on_before_game(self):
         """
         Pass initial message - first player (Guide), first turn
@@ -125,210 +175,83 @@ class EscapeRoom(DialogueGameMaster):
 
         # Add initial prompt to Explorer in (Explorer's) history
         self.set_context_for(self.guide, self.guide_prompt, image=[self.guide_image])
-        self.log_to_self("image", {"image": [self.guide_image]})
-        stdout_logger.info(f"First message for Guide: {self.guide_prompt}")
-        stdout_logger.info(f"First Room image path for Guide: {self.guide_image}")
+        self.log_image(self.guide_image)
+        events.info("guide_prompt", prompt=self.guide_prompt, image=self.guide_image)
+
+    @timed_phase("context")
+    def set_context_for(self, player: Player, content: str, **extras):
+        """
+        Set the context for the next turn of player, and drop images from the player's history according to the
+        image history policy. Images are replaced by their cached version, if the image cache is used
+        """
+        if self.image_cache is not None and "image" in extras:
+            extras["image"] = [self.image_cache.get(image) for image in extras["image"]]
+        super().set_context_for(player, content, **extras)
+        if player is not None:
+            self.retained_images = apply_image_history(player_history(player), self.context_for_player[player.name],
+                                                       self.image_history, self.image_history_k)
+
+    def log_image(self, image: str):
+        """
+        Log the image passed with the last context, and the number of images sent with the next request
+        """
+        self.log_to_self("image", {"image": [image], "retained_images": self.retained_images})
 
     def _does_game_proceed(self) -> bool:
         """
-        Fail cases for each turn, use init_flags/scorers etc...
+        Fail cases for each turn, see EscapeRoomSimulator.is_over
         """
-        if self.aborted or self.current_round==25 or self.success or self.fail:
-            return False
-        else:
-            return True
+        return not self.simulator.is_over(self.current_round)
 
     def _should_pass_turn(self):
-        return self.pass_turn
+        return self.simulator.pass_turn
 
     @staticmethod
     def clean_agent_response(response: str) -> str:
         """
         Remove leading and trailing markdown wrappers from response
         """
-        response = response.strip()
-        response = response.replace("```json", "")
-        response = response.replace("```", "")
-        if response.endswith("."):
-            response = response[:-1]
-        return response.lower()
+        return clean_agent_response(response)
 
+    @timed_phase("validate")
     def _validate_player_response(self, player, utterance: str) -> bool:
         """
-        Check Correct format/ tag etc... in each Player's response
+        Check Correct format/ tag etc... in each Player's response. The rules are applied by the simulator,
+        the events are logged here
         Args:
             player: Player object - Explorer or Guide type
             utterance: str - response from Player
         Returns:
             True if response format is valid, False otherwise
         """
-        stdout_logger.info(f"Generated player response: {utterance}")
-        utterance = self.clean_agent_response(utterance)
-        stdout_logger.info(f"Cleaned Player response {player.tag}: {utterance}")
-
-        if not utterance:
-            self.aborted = True
-            stdout_logger.info(f"Aborting the Game. Could not parse response from Player.")
-            stdout_logger.info(f"Invalid utterance: {utterance}")
-            self.log_to_self("invalid value", "abort game: explorer")
-            return False
-
-
+        events.info("response", player=player.tag, utterance=utterance)
         if type(player) == Explorer:
             """
             Explorer should respond only in one of the following format
             1) MOVE: North
             2) ESCAPE
             3) QUESTION: 
-            Check for each tag
-            
             Abort - If explorer responds in invalid format, or invalid keys
             """
-            valid_tags = ["move", "escape", "question"]
-            valid_directions = ["north", "east", "south", "west"]
-            utterance = utterance.lower()
-            splits = utterance.split(":")
-            tag = splits[0]
-            invalid_move = False
-            self.question_flag = 0
-
-            if tag not in valid_tags:
-                self.aborted = True
-                stdout_logger.info(f"Aborting the Game. Explorer generated invalid tag {tag}")
-                stdout_logger.info(f"Invalid utterance: {utterance}")
-                self.log_to_self("invalid value", "abort game: explorer")
-                return False
-
-
-            if tag == "move":
-                self.total_explorer_moves += 1
-                stdout_logger.info(f"Current explorer move: {self.total_explorer_moves}")
-                if self.total_explorer_moves >= 14:
-                    self.fail = True
-                    self.log_to_self("turns exceeded", "failed game: explorer")
-
-                stdout_logger.info(f"Move made from location - {self.game_map._agent_location}")
-                move = splits[1]
-                move = move.lower().strip()
-                self.pass_turn = False
-
-                if move not in valid_directions:
-                    self.aborted = True
-                    stdout_logger.info(f"Aborting the Game. Explorer generated invalid move {move}")
-                    stdout_logger.info(f"Invalid utterance: {utterance}")
-                    self.log_to_self("invalid value", "abort game: explorer")
-                    return False
-
-                next_node = get_next_node(tuple(self.game_map._agent_location), move)
-                next_node = tuple(next_node)
-
-                stdout_logger.info(f"Move: {move}")
-                stdout_logger.info(f"Next node: {next_node}")
-                # FIXME: add str/tuple typecheck
-                current_node = str(tuple(self.game_map._agent_location))
-                next_node_str = str(next_node)
-                edge = [current_node, next_node_str]
-                reverse_edge = [next_node_str, current_node]
-
-                if edge not in self.game_map.map_metadata["unnamed_edges"] and reverse_edge not in \
-                        self.game_map.map_metadata["unnamed_edges"]:
-                    stdout_logger.info(f"Invalid move from {current_node} to {next_node_str}")
-                    self.log_to_self("move", "invalid")
-                    self.reprompt_fail = True
-                    self.current_explorer_try += 1
-                    invalid_move = True
-                    if self.current_explorer_try == self.max_explorer_retries:
-                        self.fail = True
-                        self.log_to_self("turns exceeded", "failed game: explorer")
-                else:
-                    stdout_logger.info(f"Valid move: {move}")
-                    # self.log_to_self("move", "valid")
-                    self.current_explorer_try = 0 # Reset explorer tries
-
-                edges = self.game_map.map_metadata["unnamed_edges"]
-                tuple_edges = []
-                for edge in edges:
-                    tuple_edges.append((tuple(ast.literal_eval(edge[0])), tuple(ast.literal_eval(edge[1]))))
-
-                # neighbors = get_neighbors_str(next_node, tuple_edges)
-                # efficient_move = is_efficient_move(next_room=next_node, neighbors=neighbors, visited_rooms=self.game_map.visited,
-                #                                    target_observed=self.game_map.reached_target, map_edges=tuple_edges)
-
-                # if not invalid_move:
-                #     if efficient_move:
-                #         stdout_logger.info(f" Efficient Move : {move}")
-                #         self.log_to_self("move", "efficient")
-                #     else:
-                #         stdout_logger.info(f" Inefficient Move : {move}")
-                #         self.log_to_self("move", "inefficient")
-                return True
-
-            # Episodic Success case
-            elif tag == "escape":
-                stdout_logger.info(f"Agent Location - {str(tuple(self.game_map._agent_location))}")
-                stdout_logger.info(f"Target Location - {self.game_instance['target_node']}")
-                if str(tuple(self.game_map._agent_location)) == self.game_instance["target_node"]:
-                    stdout_logger.info(f"Escape room {self.escape_room} - Reached, Explorer successfully escaped!")
-                    self.log_to_self("escape", "success")
-                    self.success = True
-                    return True
-                else:
-                    stdout_logger.info(f"Explorer tried to Escape from a wrong room!")
-                    self.log_to_self("escape", "failed")
-                    self.fail = True
-                    return True
-
-            # tag == "question"
-            else:
-                self.question_flag = 1
-                self.pass_turn = True
-                stdout_logger.info(f"Explorer asked Question - {utterance}")
-                self.log_to_self("question", "explorer")
-                return True
-
+            events.debug("explorer_location", node=self.simulator.node)
+            valid = self.simulator.explorer_step(utterance)
         else:
             """
             Guide should respond only in one of the following format
             1) DESCRIPTION: 
             2) ANSWER:
             """
-            utterance = utterance.lower()
-            splits = utterance.split(":")
-            tag = splits[0]
-            valid_tags = ["description", "answer"]
-
-            if "description:" in utterance and "answer:" in utterance:
-                self.aborted = True
-                stdout_logger.info(f"Invalid Response for Guide: Expected DESCRIPTION/ANSWER tag, got both - {utterance}")
-                self.log_to_self("invalid value", "abort game: guide")  # Violated request count
-                return False
-
-            if tag not in valid_tags:
-                self.aborted = True
-                stdout_logger.info(f"Invalid Response for Guide: Expected DESCRIPTION/ANSWER tag, got {splits[0]}")
-                self.log_to_self("invalid value", "abort game: guide") # Violated request count
-                return False
-
-            if tag == "description":
-                if self.question_flag == 1:
-                    self.fail = True
-                    self.log_to_self("description", "wrong response")
-                    stdout_logger.info(f"Description by Guide, but Explorer asked a Question: {utterance}")
-                else:
-                    stdout_logger.info(f"Description by Guide: {utterance}")
-                    self.log_to_self("description", "guide")
-                return True
-            else:
-                if not self.question_flag == 1:
-                    self.fail = True
-                    self.log_to_self("answer", "wrong response")
-                    stdout_logger.info(f"Answer by Guide, but Explorer didn't asked a Question: {utterance}")
-                else:
-                    stdout_logger.info(f"Answer by Guide: {utterance}")
-                    self.log_to_self("answer", "guide")
-                return True
+            valid = self.simulator.guide_step(utterance)
 
+        for action_type, value in self.simulator.events:
+            self.log_to_self(action_type, value)
+        self.simulator.events.clear()
 
+        if not valid:
+            events.info("abort", player=player.tag, utterance=utterance)
+        return valid
+
+    @timed_phase("parse")
     def _parse_response(self, player: Union[Explorer, Guide], utterance: str) -> str:
         """
         Modify the response from Guide and send it to the Explorer
@@ -353,6 +276,7 @@ class EscapeRoom(DialogueGameMaster):
         #     self.explorer_reprompt = self.explorer_reprompt.replace("$ROOMS", next_moves)
         return utterance
 
+    @timed_phase("update")
     def _on_valid_player_response(self, player: Union[Explorer, Guide], utterance: str):
         """
         Send Explorer's response to Guide and vice versa
@@ -365,64 +289,55 @@ class EscapeRoom(DialogueGameMaster):
         # First explorer turn is done, the response from explorer always goes into guide, unchanged
         # The guide response never goes into the Explorer, rather the reprompt of explorer is fixed
         # and the next possible moves are interpreted based on the guide's response
-        stdout_logger.info(f"Current Round index: {self.current_round}. Current player: {player}")
+        events.debug("turn", round=self.current_round, player=player.tag)
         utterance = self.clean_agent_response(utterance)
 
         if type(player) == Guide:
             if self.current_round==0: # First prompt to Explorer from Guide.
-                moves = self.game_map.get_next_moves()
+                moves = self.simulator.next_moves()
                 self.explorer_prompt = self.explorer_base_prompt.replace(self.initial_description_tag, utterance)
                 self.explorer_prompt = self.explorer_prompt.replace(self.directions_tag, moves)
-                stdout_logger.info(f"First prompt for Explorer: {self.explorer_prompt}")
-                stdout_logger.info(f"Image for Explorer: {self.explorer_image}")
+                events.info("explorer_prompt", prompt=self.explorer_prompt, image=self.explorer_image)
                 # Pass the response from Guide to Explorer
                 self.set_context_for(self.explorer, self.explorer_prompt, image=[self.explorer_image])
-                self.log_to_self("image", {"image": [self.explorer_image]})
+                self.log_image(self.explorer_image)
             else:
                 # Pass the response from Guide as is, This should only contain "ANSWER:...."
                 # DESCRIPTION: ... is only for the first turn
-                stdout_logger.info(f"Set Prompt for Explorer: {utterance}")
-                stdout_logger.info(f"Image for Explorer: {self.explorer_image}")
+                events.info("explorer_prompt", prompt=utterance, image=self.explorer_image)
                 self.set_context_for(self.explorer, utterance, image=[self.explorer_image])
-                self.log_to_self("image", {"image": [self.explorer_image]})
+                self.log_image(self.explorer_image)
         else:
             utterance = utterance.lower()
             splits = utterance.split(":")
             tag = splits[0]
 
-            if tag == "move" and not self.fail:
-                if self.reprompt_fail:
-                    # Skip updating environment, pass same image,moves, but different reprompt
-                    next_moves = self.game_map.get_next_moves()  # Update next possible moves
-                    stdout_logger.info(f"Next Moves: {next_moves}")
+            if tag == "move" and not self.simulator.fail:
+                if self.simulator.reprompt_fail:
+                    # Same room, pass same image,moves, but different reprompt
+                    next_moves = self.simulator.next_moves()
+                    events.debug("next_moves", moves=next_moves)
                     self.explorer_failed_reprompt = self.explorer_base_failed_reprompt.replace(self.directions_tag,
                                                                                           next_moves)
                     self.set_context_for(self.explorer, self.explorer_failed_reprompt,
                                          image=[self.explorer_image])  # Pass the updated str
-                    self.log_to_self("image", {"image": [self.explorer_image]})
-                    stdout_logger.info(f"Reprompt Explorer: {self.explorer_failed_reprompt}")
-                    stdout_logger.info(f"Image for Explorer: {self.explorer_image}")
-                    stdout_logger.info(f"Resetting reprompt_fail flag")
-                    self.reprompt_fail = False
+                    self.log_image(self.explorer_image)
+                    events.info("explorer_reprompt", prompt=self.explorer_failed_reprompt, image=self.explorer_image)
                 else:
-                    move = splits[1].strip().lower()
-                    explorer_action = self.game_map._move_to_action[move]
-                    self.game_map.step(explorer_action) # Update Explorer state
-                    # Update explorer image
-                    self.explorer_image = self.game_instance["node_to_image"][str(tuple(self.game_map._agent_location))]
-                    next_moves = self.game_map.get_next_moves() # Update next possible moves
-                    stdout_logger.info(f"Next Moves: {next_moves}")
+                    # Explorer room was already updated by the simulator
+                    self.explorer_pos = self.simulator.node
+                    self.explorer_image = self.game_instance["node_to_image"][self.explorer_pos]
+                    next_moves = self.simulator.next_moves() # Update next possible moves
+                    events.debug("next_moves", moves=next_moves)
                     self.explorer_reprompt = self.explorer_base_reprompt.replace(self.directions_tag, next_moves)
                     # Pass the updated str
                     self.set_context_for(self.explorer, self.explorer_reprompt, image=[self.explorer_image])
-                    self.log_to_self("image", {"image": [self.explorer_image]})
-                    stdout_logger.info(f"Reprompt Explorer: {self.explorer_reprompt}")
-                    stdout_logger.info(f"Image for Explorer: {self.explorer_image}")
+                    self.log_image(self.explorer_image)
+                    events.info("explorer_reprompt", prompt=self.explorer_reprompt, image=self.explorer_image)
             if tag == "question":
                 self.set_context_for(self.guide, utterance, image=[self.guide_image])
-                self.log_to_self("image", {"image": [self.guide_image]})
-                stdout_logger.info(f"Set Prompt for Guide: {utterance}")
-                stdout_logger.info(f"Image for Guide: {self.guide_image}")
+                self.log_image(self.guide_image)
+                events.info("guide_prompt", prompt=utterance, image=self.guide_image)
 
     def _on_after_game(self):
         # record final results once game episode has ended:
@@ -435,6 +350,20 @@ class EscapeRoomBenchmark(GameBenchmark):
     def __init__(self, game_spec: GameSpec):
         super().__init__(game_spec)
 
+    def load_instances(self, instances_name):
+        # Instances can be a shards directory in in/ (escaperoom/instance_shards.py), read one instance at a time
+        shards_dir = os.path.join(self.game_path, "in", instances_name or "instances")
+        if is_shards_dir(shards_dir):
+            return ShardedInstances(shards_dir).as_instances()
+        # Instances files can be in the legacy or the compact format (escaperoom/instance_format.py)
+        return from_compact(super().load_instances(instances_name), lazy=False)
+
+    def load_results_json(self, file_name: str, results_dir: str, dialogue_pair: str) -> Dict:
+        # Read with the fastest available JSON backend (escaperoom/serialization.py)
+        if not file_name.endswith(".json"):
+            file_name = file_name + ".json"
+        return serialization.load(os.path.join(results_dir, dialogue_pair, self.game_name, file_name))
+
     def create_game_master(self, experiment: Dict, player_models: List[Model]) -> GameMaster:
         return EscapeRoom(self.game_name, self.game_path, experiment, player_models)
 
@@ -0,0 +1,312 @@
+"""
+Scripted policies for the programmatic (mock) Explorer and Guide players.
+
+Policies are plugged into Explorer._custom_response/Guide._custom_response and pick a response based on the game
+instance, without any model calls. They are used to load-test the game master, to check edge cases of the scorer and
+as cheap baselines for each experiment.
+
+Set the policies via the experiment config - {"explorer_policy": "dfs", "guide_policy": "protocol"}
+
+Explorer policies:
+    random: Random MOVE/ESCAPE (default)
+    dfs: Depth first exploration, backtracks when stuck
+    frontier: Moves towards the closest unvisited room
+    oracle: Follows the shortest path to the escape room
+    adversarial: Malformed responses
+
+Guide policies:
+    fixed: Always responds with a DESCRIPTION (default)
+    protocol: DESCRIPTION on the first turn, ANSWER to each QUESTION
+    adversarial: Malformed responses
+
+The exploring policies (dfs, frontier) ask questions_per_room questions in every room that matches the category of
+the escape room, and then ESCAPE if it is the escape room. This stands in for a perfect perception of the images.
+"""
+import ast
+from collections import deque
+from typing import Dict, List
+
+import numpy as np
+
+from engine.utils import get_next_node
+from escaperoom.solver import get_candidate_rooms
+
+DIRECTIONS = ["north", "south", "east", "west"]
+
+
+def get_moves(game_instance: Dict) -> Dict[str, Dict[str, str]]:
+    """
+    Map each room to its possible moves
+
+    Args:
+        game_instance: An instance from instances.json
+
+    Returns:
+        A dict - moves[node][direction] = next node, with nodes as str items
+    """
+    neighbors = {node: set() for node in game_instance["node_to_category"]}
+    for u, v in game_instance["unnamed_edges"]:
+        neighbors[str(u)].add(str(v))
+        neighbors[str(v)].add(str(u))
+
+    moves = {}
+    for node, nbrs in neighbors.items():
+        moves[node] = {}
+        position = ast.literal_eval(node)
+        for direction in DIRECTIONS:
+            next_node = str(tuple(get_next_node(position, direction)))
+            if next_node in nbrs:
+                moves[node][direction] = next_node
+    return moves
+
+
+class ScriptedPolicy:
+    """
+    Base class for all scripted policies. A policy is reset with a game instance before the game starts and then
+    called with the context of each turn
+    """
+
+    def __init__(self, seed: int = None):
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+
+    def reset(self, game_instance: Dict):
+        self.rng = np.random.default_rng(self.seed)
+
+    @property
+    def random(self):
+        """
+        np.random if no seed is given, so that runs can be reproduced with np.random.seed
+        """
+        return np.random if self.seed is None else self.rng
+
+    def __call__(self, context: Dict) -> str:
+        raise NotImplementedError()
+
+
+class ExplorerPolicy(ScriptedPolicy):
+    """
+    Keeps track of the Explorer's room. Only valid moves (along an edge) change the room, same as in the game master
+    """
+
+    def reset(self, game_instance: Dict):
+        super().reset(game_instance)
+        self.moves = get_moves(game_instance)
+        self.position = game_instance["start_node"]
+        self.target = game_instance["target_node"]
+        self.candidates = set(get_candidate_rooms(game_instance))
+        self.visited = {self.position}
+        self.questions_asked = 0
+
+    def move(self, direction: str) -> str:
+        next_node = self.moves[self.position].get(direction)
+        if next_node is not None:
+            self.position = next_node
+            self.visited.add(next_node)
+            self.questions_asked = 0
+        return f"MOVE: {direction}"
+
+    def move_to(self, node: str) -> str:
+        for direction, next_node in self.moves[self.position].items():
+            if next_node == node:
+                return self.move(direction)
+        raise ValueError(f"No edge from {self.position} to {node}")
+
+    def shortest_path(self, goals) -> List[str]:
+        """
+        BFS from the current room to the closest room in goals
+
+        Returns:
+            The rooms on the path, excluding the current room
+        """
+        parents = {self.position: None}
+        queue = deque([self.position])
+        while queue:
+            node = queue.popleft()
+            if node in goals:
+                path = []
+                while node != self.position:
+                    path.append(node)
+                    node = parents[node]
+                return path[::-1]
+            for next_node in self.moves[node].values():
+                if next_node not in parents:
+                    parents[next_node] = node
+                    queue.append(next_node)
+        return []
+
+
+class RandomExplorer(ScriptedPolicy):
+    """
+    Random MOVE/ESCAPE, uses np.random if no seed is given. Does not need to keep track of the Explorer's room
+    """
+
+    def __call__(self, context: Dict) -> str:
+        random_move = self.random.choice(["north", "south", "east", "west", "escape"])
+        if random_move == "escape":
+            return "ESCAPE"
+        else:
+            return f"MOVE: {random_move}"
+
+
+class ExploringExplorer(ExplorerPolicy):
+    """
+    Base class for dfs and frontier exploration. Checks each candidate room with questions before moving on
+    """
+
+    def __init__(self, seed: int = None, questions_per_room: int = 1):
+        super().__init__(seed)
+        self.questions_per_room = questions_per_room
+
+    def __call__(self, context: Dict) -> str:
+        if self.position in self.candidates:
+            if self.questions_asked < self.questions_per_room:
+                self.questions_asked += 1
+                return "QUESTION: Is there anything else in the room you can describe?"
+            if self.position == self.target:
+                return "ESCAPE"
+        return self.explore()
+
+    def explore(self) -> str:
+        raise NotImplementedError()
+
+
+class DFSExplorer(ExploringExplorer):
+
+    def reset(self, game_instance: Dict):
+        super().reset(game_instance)
+        self.stack = [self.position]
+
+    def explore(self) -> str:
+        for direction in DIRECTIONS:
+            next_node = self.moves[self.position].get(direction)
+            if next_node is not None and next_node not in self.visited:
+                self.stack.append(next_node)
+                return self.move(direction)
+        # Backtrack
+        if len(self.stack) > 1:
+            self.stack.pop()
+            return self.move_to(self.stack[-1])
+        return "ESCAPE"
+
+
+class GreedyFrontierExplorer(ExploringExplorer):
+
+    def explore(self) -> str:
+        frontier = set(self.moves) - self.visited
+        path = self.shortest_path(frontier)
+        if not path:
+            return "ESCAPE"
+        return self.move_to(path[0])
+
+
+class OracleExplorer(ExplorerPolicy):
+    """
+    Follows the shortest path to the escape room, asks questions_per_room questions there and escapes
+    """
+
+    def __init__(self, seed: int = None, questions_per_room: int = 0):
+        super().__init__(seed)
+        self.questions_per_room = questions_per_room
+
+    def __call__(self, context: Dict) -> str:
+        if self.position == self.target:
+            if self.questions_asked < self.questions_per_room:
+                self.questions_asked += 1
+                return "QUESTION: Is there anything else in the room you can describe?"
+            return "ESCAPE"
+        return self.move_to(self.shortest_path({self.target})[0])
+
+
+MALFORMED_EXPLORER_RESPONSES = [
+    "",
+    "   ",
+    "MOVE:",
+    "MOVE: up",
+    "MOVE north",
+    "GO: north",
+    "DESCRIPTION: I see a room",
+    "```json\n{\"move\": \"north\"}\n```",
+    "I think I should move north.",
+    "MOVE: north and then east",
+]
+
+MALFORMED_GUIDE_RESPONSES = [
+    "",
+    "   ",
+    "DESCRIPTION: a room. ANSWER: yes",
+    "MOVE: north",
+    "The room has a bed.",
+    "```\nANSWER - yes\n```",
+]
+
+
+class AdversarialPolicy(ScriptedPolicy):
+
+    responses: List[str] = []
+
+    def __call__(self, context: Dict) -> str:
+        return self.random.choice(self.responses)
+
+
+class AdversarialExplorer(AdversarialPolicy):
+    responses = MALFORMED_EXPLORER_RESPONSES
+
+
+class AdversarialGuide(AdversarialPolicy):
+    responses = MALFORMED_GUIDE_RESPONSES
+
+
+class FixedGuide(ScriptedPolicy):
+
+    def __call__(self, context: Dict) -> str:
+        return "DESCRIPTION: This is a sample description"
+
+
+class ProtocolGuide(ScriptedPolicy):
+    """
+    Responds with a DESCRIPTION first, and with an ANSWER to every QUESTION
+    """
+
+    def __call__(self, context: Dict) -> str:
+        if context["content"].strip().lower().startswith("question"):
+            return "ANSWER: This is a sample answer"
+        return "DESCRIPTION: This is a sample description"
+
+
+EXPLORER_POLICIES = {
+    "random": RandomExplorer,
+    "dfs": DFSExplorer,
+    "frontier": GreedyFrontierExplorer,
+    "oracle": OracleExplorer,
+    "adversarial": AdversarialExplorer,
+}
+
+GUIDE_POLICIES = {
+    "fixed": FixedGuide,
+    "protocol": ProtocolGuide,
+    "adversarial": AdversarialGuide,
+}
+
+
+def get_policy(role: str, name: str, game_instance: Dict, **kwargs) -> ScriptedPolicy:
+    """
+    Create a policy and reset it for the given game instance
+
+    Args:
+        role: "explorer" or "guide"
+        name: Name of the policy, see EXPLORER_POLICIES/GUIDE_POLICIES
+        game_instance: An instance from instances.json
+        kwargs: Passed to the policy, e.g. seed, questions_per_room
+
+    Raises:
+        ValueError: For an unknown role or policy
+    """
+    policies = {"explorer": EXPLORER_POLICIES, "guide": GUIDE_POLICIES}.get(role)
+    if policies is None:
+        raise ValueError(f"Unknown role {role}, expected explorer or guide")
+    if name not in policies:
+        raise ValueError(f"Unknown {role} policy {name}, expected one of {list(policies.keys())}")
+    policy = policies[name](**kwargs)
+    policy.reset(game_instance)
+    return policy
@@ -0,0 +1,248 @@
+"""
+Opt-in profiling of the generation, play and scoring entry points.
+
+The entry points are wrapped with @profiled(stage):
+    generate: EscapeRoomInstanceGenerator.generate
+    play: EscapeRoom.play, one episode
+    score: EscapeRoomScorer.compute_scores, one episode
+
+Profiling is off unless enabled through the environment, so nothing has to be patched to profile a run:
+    ESCAPEROOM_PROFILE: Comma separated stages to profile, or "all"
+    ESCAPEROOM_PROFILE_DIR: Output directory, defaults to profiles/
+    ESCAPEROOM_PROFILE_MEMORY: Set to 1 to also trace allocations with tracemalloc (slower)
+    ESCAPEROOM_PROFILE_SAMPLE: Profile every n-th call of a stage, defaults to 1 (every call)
+
+Every profiled call writes to <dir>/<stage>/<label>-<pid>-<call>:
+    .prof: cProfile stats (snakeviz, pstats)
+    .txt: Top functions by cumulative and by own time, and the top allocating lines with ESCAPEROOM_PROFILE_MEMORY
+    .snapshot: tracemalloc snapshot, with ESCAPEROOM_PROFILE_MEMORY
+
+tracemalloc is process-wide, so when episodes run in threads (escaperoom/async_runner.py) only one call at a time
+traces allocations, concurrent calls are profiled with cProfile only.
+
+Profile scripted episodes and their scores, then summarise the hot spots per stage:
+python escaperoom/profiling.py run --stages play score --memory -m escaperoom.utils.scripted_baselines -- --explorer dfs
+python escaperoom/profiling.py summarize profiles
+"""
+import argparse
+import cProfile
+import functools
+import glob
+import io
+import itertools
+import logging
+import os
+import pstats
+import re
+import runpy
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("generate", "play", "score")
+ENV_STAGES = "ESCAPEROOM_PROFILE"
+ENV_DIR = "ESCAPEROOM_PROFILE_DIR"
+ENV_MEMORY = "ESCAPEROOM_PROFILE_MEMORY"
+ENV_SAMPLE = "ESCAPEROOM_PROFILE_SAMPLE"
+DEFAULT_DIR = "profiles"
+TOP_N = 30
+
+_counters: Dict[str, itertools.count] = defaultdict(itertools.count)
+_active = threading.local()  # No nested profiles within a thread
+_memory_lock = threading.Lock()
+
+
+def enabled_stages() -> List[str]:
+    value = os.environ.get(ENV_STAGES, "").strip()
+    if value.lower() in ("all", "1", "true"):
+        return list(STAGES)
+    return [stage.strip() for stage in value.split(",") if stage.strip()]
+
+
+def is_enabled(stage: str) -> bool:
+    return stage in enabled_stages()
+
+
+def _sample_rate() -> int:
+    try:
+        return max(1, int(os.environ.get(ENV_SAMPLE, "1")))
+    except ValueError:
+        return 1
+
+
+def _safe(label: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.=-]+", "_", str(label))[:80]
+
+
+def format_stats(profile: pstats.Stats, top_n: int = TOP_N) -> str:
+    text = io.StringIO()
+    profile.files = []  # Do not list every profile file in the header
+    for sort_key in ("cumulative", "tottime"):
+        profile.stream = text
+        text.write(f"Top {top_n} by {sort_key}\n")
+        profile.sort_stats(sort_key).print_stats(top_n)
+    return text.getvalue()
+
+
+def format_snapshot(snapshot: tracemalloc.Snapshot, peak: int = None, top_n: int = TOP_N) -> str:
+    lines = [f"Top {top_n} allocating lines"]
+    if peak is not None:
+        lines[0] += f", peak traced memory {peak / 1024:.0f} KiB"
+    for stat in snapshot.statistics("lineno")[:top_n]:
+        lines.append(f"{stat.size / 1024:10.1f} KiB {stat.count:8d} blocks  {stat.traceback}")
+    return "\n".join(lines) + "\n"
+
+
+def _write(stage: str, label: str, profile: cProfile.Profile, seconds: float,
+           snapshot: Optional[tracemalloc.Snapshot], peak: Optional[int], call: int) -> str:
+    out_dir = os.path.join(os.environ.get(ENV_DIR, DEFAULT_DIR), stage)
+    os.makedirs(out_dir, exist_ok=True)
+    base = os.path.join(out_dir, f"{_safe(label)}-{os.getpid()}-{call:05d}")
+    profile.dump_stats(base + ".prof")
+    with open(base + ".txt", "w") as f:
+        f.write(f"{stage} {label}: {seconds:.4f}s\n\n")
+        f.write(format_stats(pstats.Stats(base + ".prof")))
+        if snapshot is not None:
+            snapshot.dump(base + ".snapshot")
+            f.write("\n" + format_snapshot(snapshot, peak))
+    return base
+
+
+def profiled(stage: str, label: Callable[..., str] = None):
+    """
+    Decorator that profiles the wrapped function when `stage` is enabled in ESCAPEROOM_PROFILE
+
+    Args:
+        stage: One of STAGES
+        label: Called with the arguments of the wrapped function, names the output files (e.g. experiment and
+               game id), defaults to the stage
+    """
+    if stage not in STAGES:
+        raise ValueError(f"Unknown profiling stage {stage}, expected one of {STAGES}")
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not is_enabled(stage) or getattr(_active, "stage", None) is not None:
+                return fn(*args, **kwargs)
+            call = next(_counters[stage])
+            if call % _sample_rate() != 0:
+                return fn(*args, **kwargs)
+
+            try:
+                name = label(*args, **kwargs) if label is not None else stage
+            except Exception:
+                name = stage
+            trace_memory = (os.environ.get(ENV_MEMORY, "") not in ("", "0") and not tracemalloc.is_tracing()
+                            and _memory_lock.acquire(blocking=False))
+            snapshot, peak = None, None
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:  # Another profiler is active (e.g. python -m cProfile)
+                if trace_memory:
+                    _memory_lock.release()
+                return fn(*args, **kwargs)
+            _active.stage = stage
+            if trace_memory:
+                tracemalloc.start()
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profile.disable()
+                seconds = time.perf_counter() - start
+                if trace_memory:
+                    snapshot = tracemalloc.take_snapshot()
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+                    _memory_lock.release()
+                _active.stage = None
+                try:
+                    path = _write(stage, name, profile, seconds, snapshot, peak, call)
+                    logger.info(f"Profile of {stage} {name} written to {path}.*")
+                except OSError as error:
+                    logger.warning(f"Could not write the profile of {stage} {name}: {error}")
+        return wrapper
+    return decorator
+
+
+def summarize(profile_dir: str, top_n: int = TOP_N) -> str:
+    """
+    Combine all profiles of each stage in profile_dir
+
+    Returns:
+        Top functions per stage over all profiled calls, and the top allocating lines over all snapshots
+    """
+    text = []
+    for stage_dir in sorted(glob.glob(os.path.join(profile_dir, "*"))):
+        stage = os.path.basename(stage_dir)
+        profiles = sorted(glob.glob(os.path.join(stage_dir, "*.prof")))
+        if not profiles:
+            continue
+        stats = pstats.Stats(profiles[0])
+        for path in profiles[1:]:
+            stats.add(path)
+        text.append(f"===== {stage}: {len(profiles)} profiled calls, {stats.total_tt:.3f}s =====\n")
+        text.append(format_stats(stats, top_n))
+
+        allocations = defaultdict(lambda: [0, 0])
+        snapshots = glob.glob(os.path.join(stage_dir, "*.snapshot"))
+        for path in snapshots:
+            for stat in tracemalloc.Snapshot.load(path).statistics("lineno"):
+                allocations[str(stat.traceback)][0] += stat.size
+                allocations[str(stat.traceback)][1] += stat.count
+        if allocations:
+            text.append(f"Top {top_n} allocating lines over {len(snapshots)} snapshots (memory held at the end "
+                        f"of each call)")
+            for line, (size, count) in sorted(allocations.items(), key=lambda item: -item[1][0])[:top_n]:
+                text.append(f"{size / 1024:10.1f} KiB {count:8d} blocks  {line}")
+            text.append("")
+    return "\n".join(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the generation, play and scoring entry points")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run a module or script with profiling enabled")
+    run_parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=list(STAGES))
+    run_parser.add_argument("--out_dir", default=DEFAULT_DIR)
+    run_parser.add_argument("--memory", action="store_true", help="Also trace allocations")
+    run_parser.add_argument("--sample", type=int, default=1, help="Profile every n-th call of a stage")
+    run_parser.add_argument("-m", dest="module", default=None, help="Module to run, e.g. escaperoom.instancegenerator")
+    run_parser.add_argument("args", nargs=argparse.REMAINDER, help="Script path (without -m) and arguments, after --")
+
+    summary_parser = subparsers.add_parser("summarize", help="Summarise the hot spots of all profiles per stage")
+    summary_parser.add_argument("profile_dir", nargs="?", default=DEFAULT_DIR)
+    summary_parser.add_argument("--top", type=int, default=TOP_N)
+    args = parser.parse_args()
+
+    if args.command == "summarize":
+        print(summarize(args.profile_dir, args.top))
+        return
+
+    if args.args and args.args[0] == "--":
+        args.args = args.args[1:]
+    if args.module is None and not args.args:
+        run_parser.error("Give a module with -m or a script path")
+    # Through the environment, so that worker processes are profiled as well
+    os.environ[ENV_STAGES] = ",".join(args.stages)
+    os.environ[ENV_DIR] = args.out_dir
+    os.environ[ENV_MEMORY] = "1" if args.memory else "0"
+    os.environ[ENV_SAMPLE] = str(args.sample)
+    if args.module is not None:
+        sys.argv = [args.module] + args.args
+        runpy.run_module(args.module, run_name="__main__", alter_sys=True)
+    else:
+        sys.argv = args.args
+        runpy.run_path(args.args[0], run_name="__main__")
+
+
+if __name__ == '__main__':
+    main()
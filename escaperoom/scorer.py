@@ -1,14 +1,16 @@
-import json
 from typing import Tuple, Dict, List
 from collections import deque
 import logging
-import os
 import ast
 
 import numpy as np
 from clemcore.clemgame import GameScorer
 from clemcore.clemgame import metrics as ms
 
+from escaperoom.instance_shards import InstanceShard
+from escaperoom.profiling import profiled
+from escaperoom.solver import solve_instance
+
 logger = logging.getLogger(__name__)
 
 # Define min_q for ambiguous rooms
@@ -21,6 +23,10 @@ min_q_mapping = {
     "high_dual_ambiguity": 8,
 }
 
+# Reference exploration costs, see escaperoom/solver.py
+METRIC_REFERENCE_MOVES = "Reference Moves"
+METRIC_EXPLORATION_EFFICIENCY = "Exploration Efficiency"
+
 def get_neighbors(current_node, edges):
     neighbors = []
     for edge in edges:
@@ -158,6 +164,9 @@ def get_metadata(instances, exp_name, game_id):
     for exp in instances["experiments"]:
         if exp["name"] == exp_name:
             all_instances = exp["game_instances"]
+            if isinstance(all_instances, InstanceShard):
+                # Random access through the shard index (escaperoom/instance_shards.py)
+                return all_instances.get(game_id)
             for inst in all_instances:
                 if inst["game_id"] == game_id:
                     metadata = inst
@@ -189,8 +198,12 @@ def get_next_node(current_node, edges, move):
 
 
 def get_efficient_moves(instances, exp_name, game_id, moves_made):
-    aborted = False
     metadata = get_metadata(instances, exp_name, game_id)
+    return count_efficient_moves(metadata, moves_made, exp_name, game_id)
+
+
+def count_efficient_moves(metadata, moves_made, exp_name=None, game_id=None):
+    aborted = False
     unnamed_edges = metadata["unnamed_edges"]
     start_node = ast.literal_eval(metadata["start_node"])
     current_node = start_node
@@ -229,6 +242,8 @@ class EscapeRoomScorer(GameScorer):
     def __init__(self, game_name:str, experiment:Dict, game_instance: Dict):
         super().__init__(game_name, experiment, game_instance)
 
+    @profiled("score", label=lambda self, episode_interactions: f"{episode_interactions['meta']['experiment_name']}-"
+                                                               f"{episode_interactions['meta']['game_id']}")
     def compute_scores(self, episode_interactions: Dict) -> None:
         """
         Method to compute scores for Escape Room Game
@@ -236,6 +251,7 @@ class EscapeRoomScorer(GameScorer):
         Move_Efficiency = (efficient moves * 100) / (total number of moves)
         Question_Efficiency = 100 / Total Questions
         QualityScore = HarmonicMean(Move_Efficiency, Question_Efficiency)
+        Exploration_Efficiency = (reference moves * 100) / (total number of moves), capped at 100
 
         """
         total_moves = 0
@@ -246,10 +262,6 @@ class EscapeRoomScorer(GameScorer):
 
         exp_name = episode_interactions['meta']["experiment_name"]
         game_id = episode_interactions['meta']["game_id"]
-        instance_file = os.path.join("escaperoom", "in", "instances.json")
-        with open(instance_file, "r") as f:
-            instances = json.load(f)
-
         model_name = episode_interactions['meta']["dialogue_pair"]
         # print(f"Computing scores for {model_name}")
         if exp_name in min_q_mapping:
@@ -315,14 +327,19 @@ class EscapeRoomScorer(GameScorer):
         self.log_episode_score(ms.METRIC_REQUEST_COUNT_VIOLATED, ep_violated_request_count)
         self.log_episode_score(ms.METRIC_REQUEST_COUNT_PARSED, ep_parsed_request_count)
 
-        total_moves, efficient_moves, aborted_temp = get_efficient_moves(instances, exp_name, game_id, moves_made)
+        total_moves, efficient_moves, aborted_temp = count_efficient_moves(self.game_instance, moves_made, exp_name,
+                                                                            game_id)
         if aborted_temp and not aborted:
             aborted = True
+
+        reference_moves = solve_instance(self.game_instance)["reference_moves"]
+        self.log_episode_score(METRIC_REFERENCE_MOVES, reference_moves)
         if aborted:
             self.log_episode_score(ms.METRIC_ABORTED, 1)
             self.log_episode_score(ms.METRIC_SUCCESS, 0)
             self.log_episode_score(ms.METRIC_LOSE, 0)
             self.log_episode_score(ms.BENCH_SCORE, np.nan)
+            self.log_episode_score(METRIC_EXPLORATION_EFFICIENCY, np.nan)
         else:
             self.log_episode_score(ms.METRIC_ABORTED, 0)
 
@@ -331,6 +348,12 @@ class EscapeRoomScorer(GameScorer):
                 self.log_episode_score(ms.METRIC_LOSE, 0)
 
 
+                if total_moves:
+                    exploration_efficiency = min(100, (reference_moves * 100) / total_moves)
+                else:
+                    exploration_efficiency = 100
+                self.log_episode_score(METRIC_EXPLORATION_EFFICIENCY, exploration_efficiency)
+
                 total_questions = max(min_q, total_questions) # Set to min_q, if no questions asked
                 if not total_moves:
                     self.log_episode_score(ms.BENCH_SCORE, 0)
@@ -350,3 +373,4 @@ class EscapeRoomScorer(GameScorer):
                 self.log_episode_score(ms.METRIC_LOSE, 1)
 
                 self.log_episode_score(ms.BENCH_SCORE, 0)
+                self.log_episode_score(METRIC_EXPLORATION_EFFICIENCY, 0)
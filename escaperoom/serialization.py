@@ -0,0 +1,159 @@
+"""
+Serializers for instances and the result files owned by the game.
+
+    json: Standard library, pretty printed (indent=4) as written by clemcore
+    orjson: Fast JSON backend, compact output (pip install orjson)
+    msgpack: Binary format, .msgpack files (pip install msgpack)
+
+Reading is transparent: load() picks the backend from the file extension (and the fastest available JSON backend
+for .json files), and falls back to the .msgpack sibling of a missing .json file.
+
+The default serializer for writing can be set with ESCAPEROOM_SERIALIZER. It applies to the instances files in in/
+and to the result files the game writes itself (metrics.json, escaperoom/instrumentation.py). The files clemcore
+writes and reads back - instance.json, interactions.json, requests.json, the scores and the experiment configs - are
+always JSON, see is_clemcore_file().
+
+Convert the game owned files of a result tree to msgpack:
+python utils/clean_interactions.py --results results --serializer msgpack
+"""
+import json
+import os
+import tempfile
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+DEFAULT_SERIALIZER = os.environ.get("ESCAPEROOM_SERIALIZER", "json")
+MSGPACK_EXTENSION = ".msgpack"
+INTERACTIONS_FILES = ("interactions.json",)
+# Episode files written by clemcore, read back by `clem score`, `clem eval` and `clem transcribe`
+CLEMCORE_FILES = ("instance.json", "interactions.json", "requests.json")
+
+
+class Serializer(NamedTuple):
+    name: str
+    extension: str
+    dumps: Callable[[Any], bytes]
+    loads: Callable[[bytes], Any]
+    module: Optional[str] = None  # Optional dependency, None for the standard library
+
+
+def _json_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, indent=4, ensure_ascii=False).encode("utf-8")
+
+
+def _orjson_dumps(obj: Any) -> bytes:
+    return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def _msgpack_dumps(obj: Any) -> bytes:
+    return msgpack.packb(obj, use_bin_type=True)
+
+
+def _msgpack_loads(data: bytes) -> Any:
+    # Keys of the game dicts are strings, except for a few int keys in scores
+    return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+SERIALIZERS: Dict[str, Serializer] = {
+    "json": Serializer("json", ".json", _json_dumps, json.loads),
+    "orjson": Serializer("orjson", ".json", _orjson_dumps, lambda data: orjson.loads(data), "orjson"),
+    "msgpack": Serializer("msgpack", MSGPACK_EXTENSION, _msgpack_dumps, _msgpack_loads, "msgpack"),
+}
+
+
+def is_available(name: str) -> bool:
+    module = SERIALIZERS[name].module
+    return module is None or globals()[module] is not None
+
+
+def is_clemcore_file(filename: str) -> bool:
+    """
+    True for the result files clemcore writes and reads as JSON: CLEMCORE_FILES, experiment_*.json and *scores.json
+    """
+    filename = os.path.basename(filename)
+    return (filename in CLEMCORE_FILES or filename.endswith("scores.json")
+            or (filename.startswith("experiment_") and filename.endswith(".json")))
+
+
+def get_serializer(name: str = None) -> Serializer:
+    """
+    Args:
+        name: One of SERIALIZERS, defaults to DEFAULT_SERIALIZER
+
+    Raises:
+        ValueError: For an unknown serializer
+        ImportError: If the serializer needs a package that is not installed
+    """
+    name = name or DEFAULT_SERIALIZER
+    if name not in SERIALIZERS:
+        raise ValueError(f"Unknown serializer {name}, expected one of {list(SERIALIZERS)}")
+    if not is_available(name):
+        raise ImportError(f"The {name} serializer needs the {SERIALIZERS[name].module} package: "
+                          f"pip install {SERIALIZERS[name].module}")
+    return SERIALIZERS[name]
+
+
+def _reader_for(path: str) -> Serializer:
+    if path.endswith(MSGPACK_EXTENSION):
+        return get_serializer("msgpack")
+    return SERIALIZERS["orjson"] if is_available("orjson") else SERIALIZERS["json"]
+
+
+def resolve(path: str) -> str:
+    """
+    Existing file for path, the .msgpack sibling of a missing .json file. Returns path if neither exists
+    """
+    if not os.path.exists(path) and path.endswith(".json"):
+        sibling = path[:-len(".json")] + MSGPACK_EXTENSION
+        if os.path.exists(sibling):
+            return sibling
+    return path
+
+
+def loads(data: bytes, path: str = ".json") -> Any:
+    return _reader_for(path).loads(data)
+
+
+def load(path: str) -> Any:
+    """
+    Load a .json or .msgpack file, see resolve()
+    """
+    path = resolve(path)
+    with open(path, "rb") as f:
+        return _reader_for(path).loads(f.read())
+
+
+def output_path(path: str, serializer: str = None) -> str:
+    """
+    path with the extension of the serializer
+    """
+    extension = get_serializer(serializer).extension
+    root, ext = os.path.splitext(path)
+    return path if ext == extension else root + extension
+
+
+def dump(obj: Any, path: str, serializer: str = None) -> str:
+    """
+    Write obj atomically. The extension of path is replaced by the one of the serializer (.json or .msgpack)
+
+    Returns:
+        The path written to
+    """
+    serializer = get_serializer(serializer)
+    path = output_path(path, serializer.name)
+    data = serializer.dumps(obj)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".part")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,309 @@
+"""
+Simulation core for the Escape Room rules.
+
+EscapeRoomSimulator implements the rules on integer state - rooms are indexed and moves are looked up in a
+neighbor table - without any clemcore/gym overhead:
+    - Explorer responds with MOVE: <direction>, QUESTION: ... or ESCAPE, Guide with DESCRIPTION: ... or ANSWER: ...
+      Any other tag, or an empty response, aborts the game
+    - The game fails when the Explorer makes MAX_EXPLORER_MOVES moves, makes MAX_EXPLORER_RETRIES consecutive moves
+      into a wall, escapes from a wrong room, or when the Guide does not follow the question/answer protocol
+    - The game succeeds when the Explorer escapes from the escape room
+    - The game ends after MAX_ROUNDS rounds
+
+The EscapeRoom game master delegates all rule outcomes to the simulator, and only builds prompts and logs the
+events collected by the simulator. simulate() plays a full episode between two scripted policies
+(escaperoom/policies.py) in a tight loop.
+"""
+import ast
+from typing import Dict, List, Tuple
+
+MAX_EXPLORER_MOVES = 14
+MAX_EXPLORER_RETRIES = 1
+MAX_ROUNDS = 25
+
+EXPLORER_TAGS = ("move", "escape", "question")
+GUIDE_TAGS = ("description", "answer")
+DIRECTIONS = ("north", "east", "south", "west")
+_DIRECTION_INDEX = {direction: i for i, direction in enumerate(DIRECTIONS)}
+_DIRECTION_OFFSETS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+# Outcomes, same classification as EscapeRoomScorer
+OUTCOME_SUCCESS = "success"
+OUTCOME_LOSE = "lose"
+OUTCOME_ABORTED = "aborted"
+
+_MAP_CACHE: Dict[Tuple, "CompiledMap"] = {}
+
+
+def clean_agent_response(response: str) -> str:
+    """
+    Remove leading and trailing markdown wrappers from response
+    """
+    response = response.strip()
+    response = response.replace("```json", "")
+    response = response.replace("```", "")
+    if response.endswith("."):
+        response = response[:-1]
+    return response.lower()
+
+
+def _get_direction(start_pos: Tuple, next_pos: Tuple) -> str:
+    """
+    Same as MapWorldEnv._get_direction
+    """
+    for direction, (dx, dy) in zip(DIRECTIONS, _DIRECTION_OFFSETS):
+        if next_pos[0] == start_pos[0] + dx and next_pos[1] == start_pos[1] + dy:
+            return direction
+    raise ValueError("Invalid move! Check the node positions!")
+
+
+class CompiledMap:
+    """
+    Integer representation of a map layout
+
+    Attributes:
+        nodes: Rooms as str items - "(x, y)", index i is room i
+        index: Inverse of nodes
+        neighbors: neighbors[room][direction] = next room, -1 if there is no door in that direction
+                   (direction index as in DIRECTIONS)
+        next_moves: Possible moves from each room, formatted as in MapWorldEnv.get_next_moves()
+    """
+    __slots__ = ("nodes", "index", "neighbors", "next_moves")
+
+    def __init__(self, nodes: List[str], edges: List):
+        self.nodes = list(nodes)
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+        positions = [tuple(ast.literal_eval(node)) for node in self.nodes]
+        position_index = {pos: i for i, pos in enumerate(positions)}
+
+        self.neighbors = [[-1] * len(DIRECTIONS) for _ in self.nodes]
+        moves = [[] for _ in self.nodes]
+        # Keep the order of the edges for the possible moves, same as MapWorldEnv.get_next_moves()
+        for u, v in edges:
+            u = position_index[tuple(ast.literal_eval(str(u)))]
+            v = position_index[tuple(ast.literal_eval(str(v)))]
+            for start, end in ((u, v), (v, u)):
+                direction = _get_direction(positions[start], positions[end])
+                self.neighbors[start][_DIRECTION_INDEX[direction]] = end
+                moves[start].append(direction)
+        self.next_moves = [str(room_moves) for room_moves in moves]
+
+
+def compile_map(game_instance: Dict) -> CompiledMap:
+    """
+    Build the integer representation of the map of a game instance, cached per layout
+
+    Args:
+        game_instance: An instance from instances.json
+
+    Returns:
+        CompiledMap of the instance
+    """
+    nodes = tuple(game_instance["node_to_category"].keys())
+    edges = tuple((str(u), str(v)) for u, v in game_instance["unnamed_edges"])
+    key = (nodes, edges)
+    if key not in _MAP_CACHE:
+        _MAP_CACHE[key] = CompiledMap(nodes, edges)
+    return _MAP_CACHE[key]
+
+
+class EscapeRoomSimulator:
+    """
+    Rules of the Escape Room game. Each response is passed to explorer_step/guide_step, which update the state and
+    return True if the response is valid (same as DialogueGameMaster._validate_player_response)
+
+    If record_events is set, the game master events are collected as (action type, value) tuples in events,
+    in the order they should be logged.
+    """
+    __slots__ = ("map", "room", "target", "record_events", "events", "total_moves", "tries", "question_flag",
+                 "pass_turn", "reprompt_fail", "aborted", "fail", "success", "escape_failed")
+
+    def __init__(self, game_instance: Dict, record_events: bool = True):
+        self.map = compile_map(game_instance)
+        self.room = self.map.index[game_instance["start_node"]]
+        self.target = self.map.index[game_instance["target_node"]]
+        self.record_events = record_events
+        self.events: List[Tuple] = []
+
+        self.total_moves = 0  # All Explorer moves, valid+invalid
+        self.tries = 0  # Consecutive moves into a wall, reset after every move to another room
+        self.question_flag = 0  # Set when the Explorer asks a question, the Guide has to respond with an answer
+        self.pass_turn = True  # Explorer keeps the turn after a move
+        self.reprompt_fail = False  # Set when the last Explorer move was into a wall
+
+        self.aborted = False
+        self.fail = False
+        self.success = False
+        self.escape_failed = False
+
+    @property
+    def node(self) -> str:
+        """
+        Current room of the Explorer as a str item - "(x, y)"
+        """
+        return self.map.nodes[self.room]
+
+    def next_moves(self) -> str:
+        return self.map.next_moves[self.room]
+
+    def is_over(self, current_round: int) -> bool:
+        return self.aborted or current_round == MAX_ROUNDS or self.success or self.fail
+
+    @property
+    def outcome(self) -> str:
+        """
+        Only an escape (from the right or a wrong room) ends a game without aborting it
+        """
+        if self.success:
+            return OUTCOME_SUCCESS
+        if self.escape_failed:
+            return OUTCOME_LOSE
+        return OUTCOME_ABORTED
+
+    def _log(self, action_type: str, value: str):
+        if self.record_events:
+            self.events.append((action_type, value))
+
+    def _abort(self, value: str) -> bool:
+        self.aborted = True
+        self._log("invalid value", value)
+        return False
+
+    def explorer_step(self, utterance: str) -> bool:
+        """
+        Apply an Explorer response - MOVE: <direction>, ESCAPE or QUESTION: ...
+
+        Args:
+            utterance: Response from the Explorer
+
+        Returns:
+            True if the response is valid, False if the game was aborted
+        """
+        utterance = clean_agent_response(utterance)
+        if not utterance:
+            return self._abort("abort game: explorer")
+
+        splits = utterance.split(":")
+        tag = splits[0]
+        self.question_flag = 0
+        self.reprompt_fail = False
+
+        if tag not in EXPLORER_TAGS:
+            return self._abort("abort game: explorer")
+
+        if tag == "move":
+            self.total_moves += 1
+            if self.total_moves >= MAX_EXPLORER_MOVES:
+                self.fail = True
+                self._log("turns exceeded", "failed game: explorer")
+            self.pass_turn = False
+
+            move = splits[1].strip() if len(splits) > 1 else ""
+            direction = _DIRECTION_INDEX.get(move)
+            if direction is None:
+                return self._abort("abort game: explorer")
+
+            next_room = self.map.neighbors[self.room][direction]
+            if next_room < 0:
+                self._log("move", "invalid")
+                self.reprompt_fail = True
+                self.tries += 1
+                if self.tries == MAX_EXPLORER_RETRIES:
+                    self.fail = True
+                    self._log("turns exceeded", "failed game: explorer")
+            else:
+                self.tries = 0
+                if not self.fail:
+                    self.room = next_room
+            return True
+
+        if tag == "escape":
+            if self.room == self.target:
+                self._log("escape", "success")
+                self.success = True
+            else:
+                self._log("escape", "failed")
+                self.escape_failed = True
+                self.fail = True
+            return True
+
+        self.question_flag = 1
+        self.pass_turn = True
+        self._log("question", "explorer")
+        return True
+
+    def guide_step(self, utterance: str) -> bool:
+        """
+        Apply a Guide response - DESCRIPTION: ... or ANSWER: ...
+
+        Args:
+            utterance: Response from the Guide
+
+        Returns:
+            True if the response is valid, False if the game was aborted
+        """
+        utterance = clean_agent_response(utterance)
+        if not utterance:
+            return self._abort("abort game: explorer")
+
+        tag = utterance.split(":")[0]
+        if "description:" in utterance and "answer:" in utterance:
+            return self._abort("abort game: guide")
+        if tag not in GUIDE_TAGS:
+            return self._abort("abort game: guide")
+
+        if tag == "description":
+            if self.question_flag == 1:
+                self.fail = True
+                self._log("description", "wrong response")
+            else:
+                self._log("description", "guide")
+        else:
+            if self.question_flag != 1:
+                self.fail = True
+                self._log("answer", "wrong response")
+            else:
+                self._log("answer", "guide")
+        return True
+
+
+def simulate(game_instance: Dict, explorer, guide, record_events: bool = False) -> Tuple[EscapeRoomSimulator, int]:
+    """
+    Play a full episode between two scripted policies, with the same turn order as the EscapeRoom game master -
+    the Guide starts, the Explorer keeps the turn after each move and passes it with a question.
+    Contexts only carry what the scripted policies need, no prompts are built.
+
+    Args:
+        game_instance: An instance from instances.json
+        explorer: Explorer policy, see escaperoom/policies.py
+        guide: Guide policy
+        record_events: Collect the game master events in simulator.events
+
+    Returns:
+        The simulator at the end of the episode and the number of rounds played
+    """
+    explorer.reset(game_instance)
+    guide.reset(game_instance)
+    simulator = EscapeRoomSimulator(game_instance, record_events=record_events)
+
+    current_round = 0
+    explorer_turn = False
+    content = game_instance["guide_prompt"]
+    while True:
+        if explorer_turn:
+            utterance = explorer({"role": "user", "content": content})
+            if simulator.explorer_step(utterance):
+                # Only a question is forwarded, to the Guide
+                content = clean_agent_response(utterance)
+        else:
+            utterance = guide({"role": "user", "content": content})
+            if simulator.guide_step(utterance):
+                content = clean_agent_response(utterance)
+
+        if simulator.pass_turn:
+            explorer_turn = not explorer_turn
+            if not explorer_turn:
+                current_round += 1
+
+        if simulator.is_over(current_round):
+            return simulator, current_round
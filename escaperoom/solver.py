@@ -0,0 +1,199 @@
+"""
+Reference exploration costs for Escape Room instances.
+
+The Explorer has to reach the escape room and confirm it before escaping. If other rooms share the category of the
+escape room (ambiguous rooms), the Explorer cannot tell these candidates apart from the description alone and has to
+visit them one after another until the escape room is confirmed.
+
+Given the map layout, the best order to visit the candidates is found with a bitmask DP over visited candidate sets:
+    - optimal_moves: Shortest path from start to target (oracle that knows the escape room)
+    - expected_moves: Minimum expected number of moves, target placed uniformly among the candidates
+    - worst_case_moves: Minimum number of moves to visit every candidate (target is the last candidate visited)
+    - reference_moves: Moves needed to reach the actual escape room, when visiting candidates in the order that
+                       minimises expected_moves. Used as the reference for the exploration efficiency in the scorer
+
+NOTE: The layout is assumed to be known, so these values are lower bounds for an Explorer that also has to discover
+      the map.
+"""
+import logging
+import os
+from typing import Dict, List, Tuple
+
+from engine.map_utils import find_distance
+from escaperoom.instance_format import load_instances
+
+logger = logging.getLogger(__name__)
+
+# graph_id only encodes the rooms (position + first letter of the category), not the doors between them,
+# so the edges are part of the key for the distance cache
+_DISTANCE_CACHE: Dict[Tuple, Dict] = {}
+_SOLUTION_CACHE: Dict[Tuple, Dict] = {}
+
+
+def _base_category(room_name: str) -> str:
+    """
+    Remove the numbering of ambiguous rooms, if any - "Playroom 2" -> "Playroom"
+    """
+    splits = room_name.rsplit(" ", 1)
+    if len(splits) == 2 and splits[1].isdigit():
+        return splits[0]
+    return room_name
+
+
+def _edge_key(edges: List) -> Tuple:
+    return tuple((str(u), str(v)) for u, v in edges)
+
+
+def get_candidate_rooms(game_instance: Dict) -> List[str]:
+    """
+    Get all rooms that match the category of the escape room (incl. the escape room itself)
+
+    Args:
+        game_instance: An instance from instances.json
+
+    Returns:
+        A list of nodes (as str) that the Explorer cannot tell apart from the escape room
+    """
+    node_to_category = game_instance["node_to_category"]
+    target_category = _base_category(node_to_category[game_instance["target_node"]])
+    return [node for node, category in node_to_category.items() if _base_category(category) == target_category]
+
+
+def get_distances(game_instance: Dict) -> Dict:
+    """
+    All pair shortest distances between the rooms of a map, cached per graph_id
+
+    Args:
+        game_instance: An instance from instances.json
+
+    Returns:
+        A dictionary where distances[start][end] gives the shortest distance from start to end.
+    """
+    edges = [(str(u), str(v)) for u, v in game_instance["unnamed_edges"]]
+    key = (game_instance.get("graph_id"), _edge_key(edges))
+    if key not in _DISTANCE_CACHE:
+        nodes = list(game_instance["node_to_category"].keys())
+        _DISTANCE_CACHE[key] = find_distance(edges, nodes)
+    return _DISTANCE_CACHE[key]
+
+
+def _visiting_costs(dist: List[List[int]], k: int) -> Tuple[int, int, List[int]]:
+    """
+    Bitmask DP over the visited candidates. Index 0 of dist is the start room, indices 1..k are the candidates.
+
+    Returns:
+        latency: Minimum sum of arrival times over all candidates (expected moves * k)
+        tour: Minimum number of moves to visit all candidates
+        order: Candidate indices (1..k) in the order that achieves the minimum latency
+    """
+    full = (1 << k) - 1
+    inf = float("inf")
+    # latency[mask][j] - minimal sum of arrival times for the visited candidates in mask, ending at candidate j
+    latency = [[inf] * k for _ in range(full + 1)]
+    tour = [[inf] * k for _ in range(full + 1)]
+    parent = [[-1] * k for _ in range(full + 1)]
+
+    for j in range(k):
+        latency[1 << j][j] = k * dist[0][j + 1]
+        tour[1 << j][j] = dist[0][j + 1]
+
+    for mask in range(1, full + 1):
+        # Every step into a new candidate delays all candidates that are still to be visited
+        remaining = k - bin(mask).count("1")
+        if not remaining:
+            continue
+        for i in range(k):
+            if latency[mask][i] == inf:
+                continue
+            for j in range(k):
+                if mask & (1 << j):
+                    continue
+                next_mask = mask | (1 << j)
+                step = dist[i + 1][j + 1]
+                cost = latency[mask][i] + remaining * step
+                if cost < latency[next_mask][j]:
+                    latency[next_mask][j] = cost
+                    parent[next_mask][j] = i
+                if tour[mask][i] + step < tour[next_mask][j]:
+                    tour[next_mask][j] = tour[mask][i] + step
+
+    last = min(range(k), key=lambda j: latency[full][j])
+    best_latency = latency[full][last]
+    order = []
+    mask = full
+    while last != -1:
+        order.append(last + 1)
+        previous = parent[mask][last]
+        mask ^= 1 << last
+        last = previous
+    order.reverse()
+
+    return best_latency, min(tour[full]), order
+
+
+def solve_instance(game_instance: Dict) -> Dict:
+    """
+    Compute the reference exploration costs for a game instance, cached per (graph_id, start, target)
+
+    Args:
+        game_instance: An instance from instances.json
+
+    Returns:
+        A dict with optimal_moves, expected_moves, worst_case_moves, reference_moves, num_candidates and
+        visit_order (list of nodes in the order that minimises the expected number of moves)
+    """
+    start = game_instance["start_node"]
+    target = game_instance["target_node"]
+    edges = _edge_key(game_instance["unnamed_edges"])
+    key = (game_instance.get("graph_id"), edges, start, target)
+    if key in _SOLUTION_CACHE:
+        return _SOLUTION_CACHE[key]
+
+    distances = get_distances(game_instance)
+    candidates = get_candidate_rooms(game_instance)
+    nodes = [start] + candidates
+    dist = [[distances[u][v] for v in nodes] for u in nodes]
+
+    latency, worst_case, order = _visiting_costs(dist, len(candidates))
+    visit_order = [nodes[i] for i in order]
+
+    # Follow the visiting order until the actual escape room is reached
+    reference_moves = 0
+    current = start
+    for node in visit_order:
+        reference_moves += distances[current][node]
+        current = node
+        if node == target:
+            break
+
+    solution = {
+        "optimal_moves": distances[start][target],
+        "expected_moves": latency / len(candidates),
+        "worst_case_moves": worst_case,
+        "reference_moves": reference_moves,
+        "num_candidates": len(candidates),
+        "visit_order": visit_order,
+    }
+    logger.debug("Reference costs for graph %s: %s", game_instance.get("graph_id"), solution)
+    _SOLUTION_CACHE[key] = solution
+
+    return solution
+
+
+def main():
+    """
+    Print the average reference costs for each experiment in instances.json
+    """
+    instances = load_instances(os.path.join("escaperoom", "in", "instances.json"))
+
+    for exp in instances["experiments"]:
+        solutions = [solve_instance(inst) for inst in exp["game_instances"]]
+        n = len(solutions)
+        print(f"{exp['name']:<24} optimal: {sum(s['optimal_moves'] for s in solutions) / n:.2f} "
+              f"expected: {sum(s['expected_moves'] for s in solutions) / n:.2f} "
+              f"worst case: {sum(s['worst_case_moves'] for s in solutions) / n:.2f} "
+              f"reference: {sum(s['reference_moves'] for s in solutions) / n:.2f}")
+
+
+if __name__ == '__main__':
+    main()
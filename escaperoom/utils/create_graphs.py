@@ -1,168 +1,145 @@
+import argparse
 import os
 import ast
-import json
 from collections import defaultdict, Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-import requests
-from io import BytesIO
-from PIL import Image
-import matplotlib.pyplot as plt
-import networkx as nx
-from matplotlib.offsetbox import OffsetImage, AnnotationBbox
+from PIL import Image, ImageDraw, ImageFont
+
+from escaperoom.instance_format import load_instances
+from escaperoom.utils.image_store import get_image_store
+from escaperoom.utils.image_variants import VariantSpec, get_image_variants
 
 
 def fetch_and_resize_image(url, size=(200, 200)):
-    """Fetches an image from a URL, resizes it to 'size', and returns a PIL Image."""
-    response = requests.get(url)
-    response.raise_for_status()
-    img = Image.open(BytesIO(response.content)).convert("RGBA")
-    return img.resize(size, resample=Image.LANCZOS)
+    """Returns the image at 'url' resized to 'size' as a PIL Image, served from the image variant cache."""
+    return get_image_variants().get(url, VariantSpec(size, "raw"))
+
+
+def _load_font(size):
+    try:
+        return ImageFont.truetype("DejaVuSans.ttf", size)
+    except IOError:
+        return ImageFont.load_default(size=size)
 
 
-def draw_graph(metadata, output_path, base_img_size=200, img_zoom=0.6, margin=0.1):
+def compose_graph(metadata, tile_size=200, margin=0.1):
     """
-    Draws and saves a graph based on metadata, with dynamic sizing and tight layout.
+    Lays out the node images (tiles) and edges of an instance on a PIL canvas, using the grid coordinates.
 
     - metadata: dict containing node_to_image, node_to_category, unnamed_edges, start_node, target_node
-    - output_path: path to save the generated figure
-    - base_img_size: the pixel size for image resizing (increases node size)
-    - img_zoom: scaling factor when placing images
-    - margin: fraction of extra space around the extents
+    - tile_size: the pixel size of each node image
+    - margin: fraction of a cell added as padding around the grid
+    Returns an RGB PIL Image.
     """
-    # Build graph and positions
-    G = nx.Graph()
-    positions = {}
-    xs, ys = [], []
-    for coord_str, url in metadata['node_to_image'].items():
-        x, y = ast.literal_eval(coord_str)
-        positions[coord_str] = (x, -y)
-        xs.append(x)
-        ys.append(-y)
-        G.add_node(coord_str)
-
-    # Edges
-    for src, dst in metadata.get('unnamed_edges', []):
-        src_s = str(ast.literal_eval(src))
-        dst_s = str(ast.literal_eval(dst))
-        if src_s in G and dst_s in G:
-            G.add_edge(src_s, dst_s)
+    coords = {node: ast.literal_eval(node) for node in metadata['node_to_image']}
+    min_x = min(x for x, _ in coords.values())
+    min_y = min(y for _, y in coords.values())
+    num_cols = max(x for x, _ in coords.values()) - min_x + 1
+    num_rows = max(y for _, y in coords.values()) - min_y + 1
+
+    # Each cell holds a tile, its label above it and the edges between tiles
+    cell = int(tile_size * 1.6)
+    pad = int(cell * margin)
+    line_width = max(2, tile_size // 25)
+    font = _load_font(max(10, tile_size // 7))
 
-    # Compute grid extents and counts
-    x_vals = sorted(set(xs))
-    y_vals = sorted(set(ys))
-    num_cols = len(x_vals)
-    num_rows = len(y_vals)
+    def center(node):
+        x, y = coords[node]
+        return pad + (x - min_x) * cell + cell // 2, pad + (y - min_y) * cell + cell // 2 + tile_size // 8
 
-    cell_size = 6
-    fig_w = num_cols * cell_size
-    fig_h = num_rows * cell_size
-    fig, ax = plt.subplots(figsize=(fig_w, fig_h))
-    ax.set_axis_off()
+    canvas = Image.new("RGB", (2 * pad + num_cols * cell, 2 * pad + num_rows * cell), "white")
+    draw = ImageDraw.Draw(canvas)
 
     # Draw edges
-    for u, v in G.edges():
-        x1, y1 = positions[u]
-        x2, y2 = positions[v]
-        ax.plot([x1, x2], [y1, y2], lw=7.0, color='gray')
+    for src, dst in metadata.get('unnamed_edges', []):
+        src_s = str(ast.literal_eval(src))
+        dst_s = str(ast.literal_eval(dst))
+        if src_s in coords and dst_s in coords:
+            draw.line([center(src_s), center(dst_s)], fill="gray", width=line_width)
 
     # Prepare labels
-    categories = list(metadata.get('node_to_category', {}).values())
-    total_per_cat = Counter(categories)
+    total_per_cat = Counter(metadata.get('node_to_category', {}).values())
     inst_counter = defaultdict(int)
 
     start = metadata.get('start_node')
     target = metadata.get('target_node')
 
-    # Place nodes
-    for node, (x, y) in positions.items():
-        url = metadata['node_to_image'][node]
+    # Place tiles
+    for node, url in metadata['node_to_image'].items():
+        cx, cy = center(node)
+        left, top = cx - tile_size // 2, cy - tile_size // 2
         try:
-            img = fetch_and_resize_image(url, size=(base_img_size, base_img_size))
-            im = OffsetImage(img, zoom=img_zoom)
-            # Highlight start/target
-            boxprops = None
-            if node == start:
-                boxprops = dict(edgecolor='blue', linewidth=10, facecolor='none')
-            elif node == target:
-                boxprops = dict(edgecolor='yellow', linewidth=10, facecolor='none')
-
-            ab = AnnotationBbox(
-                im,
-                (x, y),
-                frameon=bool(boxprops),
-                bboxprops=boxprops,
-                box_alignment=(0.5, 0.5)
-            )
-            ax.add_artist(ab)
-
-            # Labeling
-            cat = metadata['node_to_category'].get(node, 'Unknown')
-            inst_counter[cat] += 1
-            cnt = inst_counter[cat]
-            label = f"{cat}{cnt}" if total_per_cat[cat] > 1 else cat
-            # y-offset above or below
-            yspan = max(ys) - min(ys)
-            if num_rows == 3:
-                offset = yspan * 0.235
-            elif num_rows == 2:
-                offset = yspan * 0.48
-            elif num_rows == 4:
-                offset = yspan * 0.170
-            elif num_rows == 5:
-                offset = yspan * 0.122
-            else:
-                offset = 0
-            # if near top, label below
-            # y_off = -offset if y > (min(ys) + 0.8 * yspan) else offset
-            y_off = offset
-            ax.text(x, y + y_off, label, ha='center', va='center', fontsize=42)
-
+            tile = fetch_and_resize_image(url, size=(tile_size, tile_size))
+            canvas.paste(tile, (left, top), tile)
         except Exception as e:
             print(f"Error loading image {url}: {e}")
+            continue
 
-    # Tight layout: set limits with margin
-    x_min, x_max = min(xs), max(xs)
-    y_min, y_max = min(ys), max(ys)
-    x_margin = (x_max - x_min) * margin
-    y_margin = (y_max - y_min) * margin
-    ax.set_xlim(x_min - x_margin, x_max + x_margin)
-    ax.set_ylim(y_min - y_margin, y_max + y_margin)
-    plt.tight_layout()
-
-    # Ensure output dir
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    # fig.savefig(output_path, bbox_inches='tight', pad_inches=0)
-    fig.savefig(
-        output_path,
-        format='pdf',
-        dpi=1200,
-        bbox_inches='tight',
-        pad_inches=0
-    )
-    plt.close(fig)
+        # Highlight start/target
+        border = {start: "blue", target: "yellow"}.get(node)
+        if border is not None:
+            width = 2 * line_width
+            draw.rectangle([left - width, top - width, left + tile_size + width - 1, top + tile_size + width - 1],
+                           outline=border, width=width)
 
+        # Labeling
+        cat = metadata.get('node_to_category', {}).get(node, 'Unknown')
+        inst_counter[cat] += 1
+        label = f"{cat}{inst_counter[cat]}" if total_per_cat[cat] > 1 else cat
+        draw.text((cx, top - 3 * line_width), label, fill="black", font=font, anchor="mb")
 
-def main():
-    base_dir = os.path.join('escaperoom', 'in')
-    instances_file = os.path.join(base_dir, 'instances.json')
-    out_dir = os.path.join(base_dir, 'output_graphs')
-    os.makedirs(out_dir, exist_ok=True)
+    return canvas
 
-    with open(instances_file) as f:
-        data = json.load(f)
 
+def draw_graph(metadata, output_path, base_img_size=200, margin=0.1):
+    """
+    Draws and saves a graph based on metadata (see compose_graph). The format follows the extension of
+    output_path, e.g. .pdf or .png
+    """
+    canvas = compose_graph(metadata, tile_size=base_img_size, margin=margin)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    if output_path.endswith(".pdf"):
+        canvas.save(output_path, resolution=150.0)
+    else:
+        canvas.save(output_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Draw the map of every instance of every experiment")
+    parser.add_argument("--instances", default=os.path.join('escaperoom', 'in', 'instances.json'))
+    parser.add_argument("--out_dir", default=os.path.join('escaperoom', 'in', 'output_graphs'))
+    parser.add_argument("--tile_size", type=int, default=500)
+    parser.add_argument("--format", default="pdf", choices=["pdf", "png"])
+    parser.add_argument("--workers", type=int, default=None, help="Number of processes, defaults to all cores")
+    parser.add_argument("--force", action="store_true", help="Redraw graphs that already exist")
+    args = parser.parse_args()
+
+    data = load_instances(args.instances)
+
+    jobs = []
     for exp in data['experiments']:
-        exp_name = exp['name']
-        print(exp_name)
         for meta in exp['game_instances']:
-            gid = meta['game_id']
-            subdir = os.path.join(out_dir, exp_name)
-            os.makedirs(subdir, exist_ok=True)
-            out_path = os.path.join(subdir, f"{gid}.pdf")
-            if not os.path.exists(out_path):
-                draw_graph(meta, out_path, base_img_size=500)
-
+            out_path = os.path.join(args.out_dir, exp['name'], f"{meta['game_id']}.{args.format}")
+            if args.force or not os.path.exists(out_path):
+                jobs.append((meta, out_path))
+    print(f"Drawing {len(jobs)} graphs")
+    if not jobs:
+        return
+
+    # Generate the tiles once in this process, the workers only read them
+    sources = [url for meta, _ in jobs for url in meta['node_to_image'].values()]
+    get_image_variants().generate_all(sources, [VariantSpec((args.tile_size, args.tile_size), "raw")])
+    get_image_store().save()
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(draw_graph, meta, out_path, args.tile_size): out_path for meta, out_path in jobs}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as error:
+                print(f"Failed to draw {futures[future]}: {error}")
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
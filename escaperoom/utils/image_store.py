@@ -0,0 +1,226 @@
+"""
+Content-addressed store for the images used by the tools (instance localisation, transcripts, graph drawing).
+
+Every image is stored once as a blob named by the sha256 of its content - blobs/ab/abcdef....jpg - and an index maps
+keys (image URLs or legacy relative paths) to blobs. Identical images under different URLs or paths share one blob,
+and a cache hit is a single index lookup + file check.
+
+Legacy paths (images/ADE/..., escaperoom/in/instance_images/...) are materialised as hard links to the blobs
+(symlinks or copies as fallback), so existing readers keep working without extra disk usage.
+
+The store root defaults to images/store and can be set with ESCAPEROOM_IMAGE_STORE.
+
+python escaperoom/utils/image_store.py ingest escaperoom/in/instance_images escaperoom/in/instance_images_no_labels --link
+python escaperoom/utils/image_store.py stats
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from typing import Dict, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_ROOT = os.environ.get("ESCAPEROOM_IMAGE_STORE", os.path.join("images", "store"))
+INDEX_NAME = "index.json"
+TIMEOUT = 30
+
+
+def _extension(key: str) -> str:
+    ext = os.path.splitext(key.split("?")[0])[1].lower()
+    return ext if ext in (".jpg", ".jpeg", ".png", ".gif", ".webp") else ".bin"
+
+
+class ImageStore:
+    """
+    Blobs named by sha256 of their content, and an index of keys -> {"sha256", "size", "ext"}
+    """
+
+    def __init__(self, root: str = DEFAULT_STORE_ROOT):
+        self.root = root
+        self.blobs_dir = os.path.join(root, "blobs")
+        self.index_path = os.path.join(root, INDEX_NAME)
+        self._lock = threading.Lock()
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        self.index: Dict[str, Dict] = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r") as f:
+                self.index = json.load(f)
+
+    def blob_path(self, sha256: str, ext: str) -> str:
+        return os.path.join(self.blobs_dir, sha256[:2], f"{sha256}{ext}")
+
+    def path(self, key: str) -> Optional[str]:
+        """
+        Returns:
+            Path of the blob for key, None if key is not in the store
+        """
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+        path = self.blob_path(entry["sha256"], entry["ext"])
+        return path if os.path.exists(path) else None
+
+    def __contains__(self, key: str) -> bool:
+        return self.path(key) is not None
+
+    def put_bytes(self, data: bytes, key: str) -> str:
+        """
+        Add an image to the store, the blob is only written if the content is new
+
+        Returns:
+            Path of the blob
+        """
+        sha256 = hashlib.sha256(data).hexdigest()
+        ext = _extension(key)
+        path = self.blob_path(sha256, ext)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        with self._lock:
+            self.index[key] = {"sha256": sha256, "size": len(data), "ext": ext}
+        return path
+
+    def put_file(self, file_path: str, key: str = None, link: bool = False) -> str:
+        """
+        Add a local file to the store
+
+        Args:
+            file_path: Path of the image
+            key: Index key, defaults to file_path
+            link: Replace file_path with a link to the blob (removes the duplicate from disk)
+
+        Returns:
+            Path of the blob
+        """
+        with open(file_path, "rb") as f:
+            path = self.put_bytes(f.read(), key or file_path)
+        if link:
+            self.materialize(key or file_path, file_path)
+        return path
+
+    def fetch(self, source: str) -> str:
+        """
+        Path of the blob for an image URL or local path, added to the store on a miss
+
+        Args:
+            source: URL or local path of the image
+        """
+        path = self.path(source)
+        if path is not None:
+            return path
+        if source.startswith("http"):
+            response = requests.get(source, timeout=TIMEOUT)
+            response.raise_for_status()
+            return self.put_bytes(response.content, source)
+        return self.put_file(source)
+
+    def materialize(self, key: str, dest: str, mode: str = "hardlink") -> str:
+        """
+        Create dest as a link to the blob of key
+
+        Args:
+            key: Index key
+            dest: Legacy path
+            mode: "hardlink", "symlink" or "copy". Falls back to a copy if the link cannot be created
+                  (e.g. the store is on another device)
+
+        Returns:
+            dest
+        """
+        blob = self.path(key)
+        if blob is None:
+            raise KeyError(f"{key} is not in the image store")
+        os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+        tmp_dest = dest + ".link"
+        if os.path.lexists(tmp_dest):
+            os.remove(tmp_dest)
+        try:
+            if mode == "hardlink":
+                os.link(blob, tmp_dest)
+            elif mode == "symlink":
+                os.symlink(os.path.abspath(blob), tmp_dest)
+            else:
+                shutil.copyfile(blob, tmp_dest)
+        except OSError:
+            shutil.copyfile(blob, tmp_dest)
+        os.replace(tmp_dest, dest)
+        return dest
+
+    def ingest_dir(self, directory: str, link: bool = False) -> int:
+        """
+        Add all files in directory, keyed by their path
+
+        Returns:
+            Number of files added
+        """
+        count = 0
+        for dir_path, _, file_names in os.walk(directory):
+            for file_name in sorted(file_names):
+                if _extension(file_name) == ".bin":
+                    continue
+                self.put_file(os.path.join(dir_path, file_name), link=link)
+                count += 1
+        return count
+
+    def save(self):
+        with self._lock:
+            fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".part")
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.index, f, indent=1)
+            os.replace(tmp_path, self.index_path)
+
+    def stats(self) -> Dict:
+        blobs = {(entry["sha256"], entry["ext"]): entry["size"] for entry in self.index.values()}
+        return {
+            "keys": len(self.index),
+            "blobs": len(blobs),
+            "key_bytes": sum(entry["size"] for entry in self.index.values()),
+            "blob_bytes": sum(blobs.values()),
+        }
+
+
+_STORES: Dict[str, ImageStore] = {}
+
+
+def get_image_store(root: str = DEFAULT_STORE_ROOT) -> ImageStore:
+    """
+    Shared store per root, so that the index is loaded only once per process
+    """
+    if root not in _STORES:
+        _STORES[root] = ImageStore(root)
+    return _STORES[root]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Content-addressed image store")
+    parser.add_argument("--root", default=DEFAULT_STORE_ROOT)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    ingest = subparsers.add_parser("ingest", help="Add all images in directories, keyed by their path")
+    ingest.add_argument("directories", nargs="+")
+    ingest.add_argument("--link", action="store_true", help="Replace the files with hard links to the blobs")
+    subparsers.add_parser("stats", help="Number of keys and blobs, and the disk usage")
+    args = parser.parse_args()
+
+    store = get_image_store(args.root)
+    if args.command == "ingest":
+        for directory in args.directories:
+            count = store.ingest_dir(directory, link=args.link)
+            print(f"Added {count} images from {directory}")
+        store.save()
+    stats = store.stats()
+    print(f"{stats['keys']} keys, {stats['blobs']} blobs, "
+          f"{stats['blob_bytes'] / 1e6:.1f} MB stored for {stats['key_bytes'] / 1e6:.1f} MB of images")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+"""
+Cache of pre-resized variants of the room images, one per configured resolution and format.
+
+The transcript and graph tools used to decode and LANCZOS-resize every image each time it was drawn. The variant
+cache decodes each source image once, generates all requested variants from it and stores them on disk:
+    raw: Uncompressed RGBA pixels (.npy), read back with a memory-mapped np.load - no decode, no resize
+    jpeg: Encoded JPEG (.jpg), for paths that pass a file on (e.g. model input)
+
+Variants are keyed by sha256(source) and live in <cache_dir>/<width>x<height>_<format>[_fit]/ab/abcdef....npy
+The cache directory defaults to ~/.cache/escaperoom/variants and can be set with ESCAPEROOM_IMAGE_VARIANTS.
+Source images are read through the image store (escaperoom/utils/image_store.py).
+
+Generate all presets for all instance images ahead of rendering:
+python escaperoom/utils/image_variants.py --presets transcript_node graph_tile --workers 16
+"""
+import argparse
+import hashlib
+import logging
+import os
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Union
+
+import numpy as np
+from PIL import Image
+
+from escaperoom.image_cache import get_instance_images
+from escaperoom.instance_format import load_instances
+from escaperoom.utils.image_store import ImageStore, get_image_store
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VARIANTS_DIR = os.environ.get("ESCAPEROOM_IMAGE_VARIANTS",
+                                      os.path.join(os.path.expanduser("~"), ".cache", "escaperoom", "variants"))
+JPEG_QUALITY = 90
+
+# size: (width, height), format: "raw" or "jpeg",
+# fit: keep the aspect ratio within size (never upscales) instead of resizing to exactly size
+VariantSpec = namedtuple("VariantSpec", ["size", "format", "fit"], defaults=[False])
+
+PRESETS = {
+    "model_input": VariantSpec((768, 768), "jpeg", fit=True),  # Same resolution as escaperoom/image_cache.py
+    "graph_tile": VariantSpec((500, 500), "raw"),  # create_graphs.py
+    "graph_tile_small": VariantSpec((200, 200), "raw"),  # create_graphs.py default
+    "transcript_node": VariantSpec((125, 125), "raw"),  # make_transcripts.py
+}
+
+
+def get_spec(spec: Union[str, VariantSpec]) -> VariantSpec:
+    """
+    Raises:
+        ValueError: For an unknown preset or format
+    """
+    if isinstance(spec, str):
+        if spec not in PRESETS:
+            raise ValueError(f"Unknown image variant preset {spec}, expected one of {list(PRESETS)}")
+        return PRESETS[spec]
+    if spec.format not in ("raw", "jpeg"):
+        raise ValueError(f"Unknown image variant format {spec.format}, expected raw or jpeg")
+    return VariantSpec(tuple(spec.size), spec.format, spec.fit)
+
+
+def _resize(image: Image.Image, spec: VariantSpec) -> Image.Image:
+    if spec.fit:
+        image = image.copy()
+        image.thumbnail(spec.size, resample=Image.LANCZOS)
+        return image
+    return image.resize(spec.size, resample=Image.LANCZOS)
+
+
+def _write_atomic(path: str, write_fn):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+    with os.fdopen(fd, "wb") as f:
+        write_fn(f)
+    os.replace(tmp_path, path)
+
+
+class ImageVariants:
+    """
+    Disk cache of resized images, one file per (source, variant)
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_VARIANTS_DIR, store: ImageStore = None):
+        self.cache_dir = cache_dir
+        self.store = store or get_image_store()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def path_for(self, source: str, spec: Union[str, VariantSpec]) -> str:
+        spec = get_spec(spec)
+        key = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        variant_dir = f"{spec.size[0]}x{spec.size[1]}_{spec.format}" + ("_fit" if spec.fit else "")
+        ext = ".npy" if spec.format == "raw" else ".jpg"
+        return os.path.join(self.cache_dir, variant_dir, key[:2], f"{key}{ext}")
+
+    def generate(self, source: str, specs: Iterable[Union[str, VariantSpec]]) -> List[str]:
+        """
+        Generate the missing variants of an image, the source is decoded at most once
+
+        Args:
+            source: URL or local path of the image
+            specs: Preset names or VariantSpecs
+
+        Returns:
+            Paths of the variants, in the order of specs
+        """
+        specs = [get_spec(spec) for spec in specs]
+        paths = [self.path_for(source, spec) for spec in specs]
+        missing = [(spec, path) for spec, path in zip(specs, paths) if not os.path.exists(path)]
+        if not missing:
+            return paths
+
+        with Image.open(self.store.fetch(source)) as image:
+            image = image.convert("RGBA")
+        for spec, path in missing:
+            variant = _resize(image, spec)
+            if spec.format == "raw":
+                _write_atomic(path, lambda f: np.save(f, np.asarray(variant)))
+            else:
+                _write_atomic(path, lambda f: variant.convert("RGB").save(f, format="JPEG", quality=JPEG_QUALITY))
+            logger.info(f"Generated {path} for {source}")
+        return paths
+
+    def get_path(self, source: str, spec: Union[str, VariantSpec]) -> str:
+        """
+        Path of a variant, generated on a miss
+        """
+        path = self.path_for(source, spec)
+        if not os.path.exists(path):
+            self.generate(source, [spec])
+        return path
+
+    def get(self, source: str, spec: Union[str, VariantSpec]) -> Image.Image:
+        """
+        A variant as RGBA PIL Image, generated on a miss. Raw variants are read memory-mapped
+
+        Args:
+            source: URL or local path of the image
+            spec: Preset name or VariantSpec
+        """
+        spec = get_spec(spec)
+        path = self.get_path(source, spec)
+        if spec.format == "raw":
+            return Image.fromarray(np.load(path, mmap_mode="r"), "RGBA")
+        with Image.open(path) as image:
+            return image.convert("RGBA")
+
+    def generate_all(self, sources: Iterable[str], specs: Iterable[Union[str, VariantSpec]],
+                     max_workers: int = 8) -> Dict[str, List[str]]:
+        """
+        Generate the missing variants of all images concurrently (PIL releases the GIL for decoding and resizing)
+
+        Returns:
+            A dict mapping each source to the paths of its variants, sources that failed are left out
+        """
+        sources = list(dict.fromkeys(sources))
+        specs = [get_spec(spec) for spec in specs]
+
+        def _generate(source):
+            try:
+                return self.generate(source, specs)
+            except Exception as error:
+                logger.warning(f"Could not generate variants for {source}: {error}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = dict(zip(sources, executor.map(_generate, sources)))
+        self.store.save()
+        return {source: paths for source, paths in results.items() if paths is not None}
+
+
+_VARIANTS: Dict[str, ImageVariants] = {}
+
+
+def get_image_variants(cache_dir: str = DEFAULT_VARIANTS_DIR) -> ImageVariants:
+    if cache_dir not in _VARIANTS:
+        _VARIANTS[cache_dir] = ImageVariants(cache_dir)
+    return _VARIANTS[cache_dir]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the image variants for all images of an instances file")
+    parser.add_argument("--instances", default=os.path.join("escaperoom", "in", "instances.json"))
+    parser.add_argument("--presets", nargs="+", default=list(PRESETS), choices=list(PRESETS))
+    parser.add_argument("--cache_dir", default=DEFAULT_VARIANTS_DIR)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    instances = load_instances(args.instances)
+    images = get_instance_images(instances)
+    generated = get_image_variants(args.cache_dir).generate_all(images, args.presets, max_workers=args.workers)
+    print(f"Generated {len(args.presets)} variants for {len(generated)}/{len(images)} images in {args.cache_dir}")
+
+
+if __name__ == '__main__':
+    main()
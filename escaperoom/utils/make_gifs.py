@@ -1,41 +1,199 @@
-import os
+"""
+Encode the transcript frames of every episode (combined_graphs/combined_<turn>.png, see make_transcripts.py) into
+an animation.
+
+Frames are streamed: they are read one at a time, quantized to one palette shared by all frames of the episode and
+appended to the GIF, only the region that changed since the previous frame is encoded. Memory use is bounded by
+a few frames, independent of the episode length. Folders are encoded in parallel across a process pool.
+
+MP4/WebM output is optional and needs imageio with the ffmpeg plugin (pip install imageio[ffmpeg]).
+
+python escaperoom/utils/make_gifs.py --root results --formats gif mp4 --workers 8
+"""
+import argparse
 import glob
-from PIL import Image
+import importlib.util
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from PIL import Image, GifImagePlugin
 
 # Frames per second for GIFs
 FPS = 1.0
 DURATION = int(1000 / FPS)  # duration per frame in milliseconds
+PALETTE_SAMPLES = 6  # Number of frames the shared palette is built from
+PALETTE_SAMPLE_WIDTH = 512
+VIDEO_CODECS = {"mp4": "libx264", "webm": "libvpx-vp9"}
+
+
+def frame_paths(folder_path):
+    """
+    PNG frames in `folder_path`, ordered by their turn number (combined_2.png before combined_10.png)
+    """
+    def turn(path):
+        match = re.search(r'(\d+)\.png$', path)
+        return (int(match.group(1)) if match else -1, path)
+    return sorted(glob.glob(os.path.join(folder_path, '*.png')), key=turn)
+
+
+def canvas_size(frames):
+    """
+    Size that fits every frame, only the image headers are read
+    """
+    sizes = []
+    for path in frames:
+        with Image.open(path) as image:
+            sizes.append(image.size)
+    return max(w for w, _ in sizes), max(h for _, h in sizes)
+
+
+def load_frame(path, size):
+    """
+    Frame as RGB image of `size`, smaller frames are placed top left on a white canvas
+    """
+    with Image.open(path) as image:
+        image = image.convert('RGB')
+    if image.size == size:
+        return image
+    canvas = Image.new('RGB', size, (255, 255, 255))
+    canvas.paste(image, (0, 0))
+    return canvas
+
+
+def build_palette(frames, size, samples=PALETTE_SAMPLES):
+    """
+    256 color palette image built from evenly spaced sample frames
+    """
+    idx = np.linspace(0, len(frames) - 1, min(samples, len(frames))).round().astype(int)
+    width = min(size[0], PALETTE_SAMPLE_WIDTH)
+    height = max(1, size[1] * width // size[0])
+    montage = Image.new('RGB', (width, height * len(idx)))
+    for i, frame_idx in enumerate(idx):
+        montage.paste(load_frame(frames[frame_idx], size).resize((width, height)), (0, i * height))
+    return montage.quantize(colors=256, method=Image.Quantize.MEDIANCUT)
+
+
+class GifStreamWriter:
+    """
+    Appends frames to a GIF file as they come, all frames share the palette of the global color table
+    """
+
+    def __init__(self, path, palette, duration=DURATION, loop=0):
+        self.path = path
+        self.palette = palette
+        self.duration = duration
+        self.loop = loop
+        self.frames = 0
+        self._file = None
+        self._previous = None
+
+    def __enter__(self):
+        self._file = open(self.path + '.part', 'wb')
+        return self
+
+    def write(self, frame):
+        """
+        Args:
+            frame: RGB image, of the same size as all other frames
+        """
+        frame = frame.quantize(palette=self.palette, dither=Image.Dither.NONE)
+        pixels = np.asarray(frame)
+        if self._previous is None:
+            header, _ = GifImagePlugin.getheader(frame, info={'loop': self.loop, 'optimize': False})
+            self._file.write(b''.join(header))
+            box = (0, 0) + frame.size
+        else:
+            # Only encode the bounding box of the pixels that changed
+            rows = np.flatnonzero((pixels != self._previous).any(axis=1))
+            cols = np.flatnonzero((pixels != self._previous).any(axis=0))
+            box = (cols[0], rows[0], cols[-1] + 1, rows[-1] + 1) if len(rows) else (0, 0, 1, 1)
+        region = frame.crop(box) if box != (0, 0) + frame.size else frame
+        self._file.write(b''.join(GifImagePlugin.getdata(region, offset=box[:2], duration=self.duration)))
+        self._previous = pixels
+        self.frames += 1
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._file.write(b';')  # trailer
+        self._file.close()
+        if exc_type is None:
+            os.replace(self.path + '.part', self.path)
+        else:
+            os.remove(self.path + '.part')
 
 
-def create_gif(folder_path, fps=FPS):
+def write_video(frames, size, output_path, fps=FPS):
     """
-    Reads all PNG frames in `folder_path`, stitches into a GIF named 'animation.gif'.
+    Encode the frames with ffmpeg, the codec follows the extension of `output_path` (mp4 or webm)
     """
-    pattern = os.path.join(folder_path, '*.png')
-    frames = sorted(glob.glob(pattern))
+    import imageio.v2 as imageio
+
+    # yuv420p needs even dimensions
+    even_size = (size[0] + size[0] % 2, size[1] + size[1] % 2)
+    codec = VIDEO_CODECS[os.path.splitext(output_path)[1].lstrip('.')]
+    with imageio.get_writer(output_path, fps=fps, codec=codec, macro_block_size=2) as writer:
+        for path in frames:
+            writer.append_data(np.asarray(load_frame(path, even_size)))
+
+
+def is_up_to_date(output_path, frames):
+    return os.path.exists(output_path) and os.path.getmtime(output_path) >= max(map(os.path.getmtime, frames))
+
+
+def create_gif(folder_path, fps=FPS, formats=('gif',), force=False):
+    """
+    Streams all PNG frames in `folder_path` into 'animation.gif' (and 'animation.mp4'/'animation.webm' if requested).
+
+    Returns:
+        Paths of the written animations
+    """
+    frames = frame_paths(folder_path)
     if not frames:
         print(f"No frames to process in {folder_path}")
-        return
+        return []
 
-    images = [Image.open(f).convert('RGB') for f in frames]
-    output_path = os.path.join(folder_path, 'animation.gif')
-    images[0].save(
-        output_path,
-        save_all=True,
-        append_images=images[1:],
-        duration=int(1000 / fps),
-        loop=0
-    )
-    print(f"Created GIF at: {output_path} ({len(images)} frames, {fps} fps)")
+    written = []
+    size = canvas_size(frames)
+    for fmt in formats:
+        output_path = os.path.join(folder_path, f'animation.{fmt}')
+        if not force and is_up_to_date(output_path, frames):
+            continue
+        if fmt == 'gif':
+            with GifStreamWriter(output_path, build_palette(frames, size), duration=int(1000 / fps)) as writer:
+                for path in frames:
+                    writer.write(load_frame(path, size))
+        else:
+            write_video(frames, size, output_path, fps)
+        written.append(output_path)
+        print(f"Created {fmt} at: {output_path} ({len(frames)} frames, {fps} fps)")
+    return written
 
 
-def main(root_dir='.'):
+def main():
     """
-    Finds all 'combined_graphs' directories under `root_dir` and generates a GIF in each.
+    Finds all 'combined_graphs' directories under --root and generates an animation in each.
     """
-    pattern = os.path.join(root_dir, '**', 'combined_graphs')
-    for folder in glob.glob(pattern, recursive=True):
-        create_gif(folder, FPS)
+    parser = argparse.ArgumentParser(description="Encode the transcript frames of every episode into animations")
+    parser.add_argument("--root", default='.')
+    parser.add_argument("--fps", type=float, default=FPS)
+    parser.add_argument("--formats", nargs="+", default=['gif'], choices=['gif'] + list(VIDEO_CODECS))
+    parser.add_argument("--workers", type=int, default=None, help="Number of processes, defaults to all cores")
+    parser.add_argument("--force", action="store_true", help="Re-encode animations that are up to date")
+    args = parser.parse_args()
+
+    if any(fmt in VIDEO_CODECS for fmt in args.formats) and importlib.util.find_spec("imageio_ffmpeg") is None:
+        parser.error("Video output needs the ffmpeg plugin of imageio: pip install imageio[ffmpeg]")
+
+    folders = glob.glob(os.path.join(args.root, '**', 'combined_graphs'), recursive=True)
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(create_gif, folder, args.fps, args.formats, args.force): folder
+                   for folder in folders}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as error:
+                print(f"Failed to encode {futures[future]}: {error}")
 
 
 if __name__ == '__main__':
@@ -1,17 +1,23 @@
+import argparse
 import ast
-import os
+import hashlib
 import json
+import os
 import glob
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from io import BytesIO
-import requests
 from PIL import Image, ImageDraw, ImageFont
 from tqdm import tqdm
 import matplotlib.pyplot as plt
 from matplotlib.offsetbox import OffsetImage, AnnotationBbox
 import textwrap
 
+from escaperoom import serialization
+from escaperoom.utils.image_store import get_image_store
+from escaperoom.utils.image_variants import VariantSpec, get_image_variants
+
 # Init Config
-DATA_ROOT = 'escaperoom/in/instances.json'
 INTERACTIONS_PATTERN = os.path.join(
     'results', '*', 'escape_room', '*', 'episode_*', 'interactions.json'
 )
@@ -21,6 +27,7 @@ NODE_IMG_SIZE = (125, 125)
 ROBOT_IMG_SIZE = (110, 110)      # increased explorer/robot size
 ORACLE_IMG_SIZE = (110, 110)     # increased guide/oracle size
 GRAPH_ZOOM = 0.75         # zoom in a bit
+DONE_MARKER = '.complete'  # written after all frames of an episode
 
 # To change the font, substitute a TTF path and size here:
 try:
@@ -40,10 +47,7 @@ dir_map = {
 
 
 def fetch_and_resize_image(url, size):
-    resp = requests.get(url)
-    resp.raise_for_status()
-    img = Image.open(BytesIO(resp.content)).convert('RGBA')
-    return img.resize(size, resample=Image.LANCZOS)
+    return get_image_variants().get(url, VariantSpec(size, 'raw'))
 
 
 def render_graph_image(positions, edges, node_imgs,
@@ -137,68 +141,164 @@ def create_combined(graph_img, oracle_img, robot_img,
     return combined
 
 
-def process_interactions():
-    with open(DATA_ROOT) as f:
-        data = json.load(f)
-    lookup = {
-        exp['name']: {inst['game_id']: inst for inst in exp['game_instances']}
-        for exp in data['experiments']
-    }
-    for path in tqdm(glob.glob(INTERACTIONS_PATTERN)):
-        with open(path) as f:
-            inter = json.load(f)
-        meta = inter['meta']
-        md = lookup[meta['experiment_name']][meta['game_id']]
-        positions, node_imgs, edges = {}, {}, []
-        for coord_str, url in md['node_to_image'].items():
-            coord = tuple(ast.literal_eval(coord_str))
-            positions[coord_str] = (coord[0], -coord[1])
-            node_imgs[coord_str] = fetch_and_resize_image(url, NODE_IMG_SIZE)
-        for src, dst in md.get('unnamed_edges', []):
-            edges.append((str(ast.literal_eval(src)), str(ast.literal_eval(dst))))
-        current = md['start_node']
-        target = md.get('target_node')
-        robot_img = Image.open(ROBOT_PATH).convert('RGBA')
-        robot_img = robot_img.resize(ROBOT_IMG_SIZE, resample=Image.LANCZOS)
-        oracle_img = Image.open(ORACLE_PATH).convert('RGBA')
-        oracle_img = oracle_img.resize(ORACLE_IMG_SIZE, resample=Image.LANCZOS)
-        last_guide, last_explorer = None, None
-        out_dir = os.path.join(os.path.dirname(path), 'combined_graphs')
-        if os.path.exists(out_dir):
+def load_instance(md):
+    """
+    Positions, edges and node images of a game instance, shared by all its episodes
+    """
+    positions, node_imgs, edges = {}, {}, []
+    for coord_str, url in md['node_to_image'].items():
+        coord = tuple(ast.literal_eval(coord_str))
+        positions[coord_str] = (coord[0], -coord[1])
+        node_imgs[coord_str] = fetch_and_resize_image(url, NODE_IMG_SIZE)
+    for src, dst in md.get('unnamed_edges', []):
+        edges.append((str(ast.literal_eval(src)), str(ast.literal_eval(dst))))
+    return positions, edges, node_imgs
+
+
+# Fields of an instance that the frames are drawn from
+RENDERED_FIELDS = ('node_to_image', 'unnamed_edges', 'start_node', 'target_node')
+
+
+def load_episode_instance(path):
+    """
+    Game instance of the episode at path, from the instance.json that is stored next to its interactions.json
+
+    Returns:
+        (experiment, game_id, digest), game instance - the experiment is the name of the directory above the episode,
+        digest is a hash of the RENDERED_FIELDS. Runs from different instance files reuse experiment names and game
+        ids, only episodes with the same digest are drawn with the same map
+    """
+    episode_dir = os.path.dirname(path)
+    instance = serialization.load(os.path.join(episode_dir, 'instance.json'))
+    content = json.dumps({field: instance.get(field) for field in RENDERED_FIELDS}, sort_keys=True)
+    digest = hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+    return (os.path.basename(os.path.dirname(episode_dir)), instance['game_id'], digest), instance
+
+
+def is_up_to_date(path):
+    """
+    True if the frames of the episode at path were completely rendered after its interactions.json was written
+    """
+    marker = os.path.join(os.path.dirname(path), 'combined_graphs', DONE_MARKER)
+    return os.path.exists(marker) and os.path.getmtime(marker) >= os.path.getmtime(path)
+
+
+def render_episode(path, md, positions, edges, node_imgs, robot_img, oracle_img):
+    """
+    Render the frames of one episode to combined_graphs/ next to its interactions.json. Frames are written as they
+    are rendered, the DONE_MARKER is written last
+
+    Returns:
+        Number of frames written
+    """
+    inter = serialization.load(path)
+    current = md['start_node']
+    target = md.get('target_node')
+    last_guide, last_explorer = None, None
+    out_dir = os.path.join(os.path.dirname(path), 'combined_graphs')
+    os.makedirs(out_dir, exist_ok=True)
+    frames = 0
+    for idx, turn in enumerate(inter['turns']):
+        updated = False
+        for i, act in enumerate(turn):
+            frm, to = act['from'], act['to']
+            typ = act['action']['type']
+            cnt = act['action']['content']
+            if frm.startswith('Player 2') and typ == 'get message' and cnt.startswith('MOVE:'):
+                if i + 1 < len(turn) and turn[i+1]['action']['type'] == 'move':
+                    res = turn[i+1]['action']['content']
+                    if res in ('valid', 'efficient', 'inefficient'):
+                        direction = cnt.split('MOVE:')[1].strip()
+                        dx, dy = dir_map.get(direction, (0, 0))
+                        x0, y0 = eval(current)
+                        new = (x0 + dx, y0 + dy)
+                        if str(new) in positions:
+                            current = str(new)
+                        updated = True
+            if frm.startswith('Player 1') and to == 'GM' and typ == 'get message':
+                last_guide = cnt; updated = True
+            if frm.startswith('Player 2') and to == 'GM' and typ == 'get message':
+                last_explorer = cnt; updated = True
+        if updated:
+            graph_img = render_graph_image(
+                positions, edges, node_imgs,
+                robot_img, current, target
+            )
+            combined = create_combined(
+                graph_img, oracle_img, robot_img,
+                last_guide, last_explorer
+            )
+            out = os.path.join(out_dir, f'combined_{idx}.png')
+            combined.save(out)
+            frames += 1
+    with open(os.path.join(out_dir, DONE_MARKER), 'w') as f:
+        f.write(str(frames))
+    return frames
+
+
+def render_instance(md, paths):
+    """
+    Render all episodes of one game instance, the node images are loaded once
+
+    Returns:
+        Number of frames written
+    """
+    positions, edges, node_imgs = load_instance(md)
+    robot_img = fetch_and_resize_image(ROBOT_PATH, ROBOT_IMG_SIZE)
+    oracle_img = fetch_and_resize_image(ORACLE_PATH, ORACLE_IMG_SIZE)
+    return sum(render_episode(path, md, positions, edges, node_imgs, robot_img, oracle_img) for path in paths)
+
+
+def process_interactions(pattern=INTERACTIONS_PATTERN, workers=None, force=False):
+    """
+    Render the transcripts of all episodes matching pattern, grouped by game instance across a process pool
+
+    Args:
+        pattern: Glob pattern of the interactions.json files
+        workers: Number of processes, defaults to the number of cores
+        force: Re-render episodes that are up to date
+    """
+    # Group the outdated episodes by game instance, from their instance.json - the interactions are only read
+    # when an episode is rendered
+    groups = defaultdict(list)
+    lookup = {}
+    paths = sorted(glob.glob(pattern))
+    for path in paths:
+        if not force and is_up_to_date(path):
             continue
-        os.makedirs(out_dir, exist_ok=True)
-        for idx, turn in enumerate(inter['turns']):
-            updated = False
-            for i, act in enumerate(turn):
-                frm, to = act['from'], act['to']
-                typ = act['action']['type']
-                cnt = act['action']['content']
-                if frm.startswith('Player 2') and typ == 'get message' and cnt.startswith('MOVE:'):
-                    if i + 1 < len(turn) and turn[i+1]['action']['type'] == 'move':
-                        res = turn[i+1]['action']['content']
-                        if res in ('valid', 'efficient', 'inefficient'):
-                            direction = cnt.split('MOVE:')[1].strip()
-                            dx, dy = dir_map.get(direction, (0, 0))
-                            x0, y0 = eval(current)
-                            new = (x0 + dx, y0 + dy)
-                            if str(new) in positions:
-                                current = str(new)
-                            updated = True
-                if frm.startswith('Player 1') and to == 'GM' and typ == 'get message':
-                    last_guide = cnt; updated = True
-                if frm.startswith('Player 2') and to == 'GM' and typ == 'get message':
-                    last_explorer = cnt; updated = True
-            if updated:
-                graph_img = render_graph_image(
-                    positions, edges, node_imgs,
-                    robot_img, current, target
-                )
-                combined = create_combined(
-                    graph_img, oracle_img, robot_img,
-                    last_guide, last_explorer
-                )
-                out = os.path.join(out_dir, f'combined_{idx}.png')
-                combined.save(out)
+        key, instance = load_episode_instance(path)
+        lookup[key] = instance
+        groups[key].append(path)
+    print(f"{len(paths) - sum(map(len, groups.values()))}/{len(paths)} episodes up to date, "
+          f"rendering {len(groups)} instances")
+    if not groups:
+        return
+
+    # Generate the image variants once in this process, the workers only read them
+    sources = [url for key in groups for url in lookup[key]['node_to_image'].values()]
+    get_image_variants().generate_all(sources, [VariantSpec(NODE_IMG_SIZE, 'raw')])
+    fetch_and_resize_image(ROBOT_PATH, ROBOT_IMG_SIZE)
+    fetch_and_resize_image(ORACLE_PATH, ORACLE_IMG_SIZE)
+    get_image_store().save()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(render_instance, lookup[key], group_paths): key
+                   for key, group_paths in groups.items()}
+        for future in tqdm(as_completed(futures), total=len(futures)):
+            try:
+                future.result()
+            except Exception as error:
+                print(f"Failed to render {futures[future]}: {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render transcript frames for all episodes in results/")
+    parser.add_argument("--pattern", default=INTERACTIONS_PATTERN)
+    parser.add_argument("--workers", type=int, default=None, help="Number of processes, defaults to all cores")
+    parser.add_argument("--force", action="store_true", help="Re-render episodes that are up to date")
+    args = parser.parse_args()
+    process_interactions(args.pattern, args.workers, args.force)
+
 
 if __name__ == '__main__':
-    process_interactions()
\ No newline at end of file
+    main()
@@ -0,0 +1,124 @@
+"""
+Play instances with scripted Explorer/Guide policies (escaperoom/policies.py) through the EscapeRoom game master.
+
+Used to load-test the game master, to check the scorer on a large number of episodes and as cheap baselines
+for every experiment.
+
+python escaperoom/utils/scripted_baselines.py --explorer dfs frontier oracle --guide protocol
+
+With --simulate, episodes are played on the simulation core (escaperoom/simulator.py) instead of the game master,
+without prompts, logs or scores (main score is reported as nan).
+"""
+import argparse
+import logging
+import os
+import time
+from collections import defaultdict
+from typing import Dict
+
+import numpy as np
+from clemcore.backends.model_registry import CustomResponseModel
+from clemcore.clemgame.recorder import DefaultGameRecorder
+from clemcore.clemgame import metrics as ms
+
+from escaperoom.instance_format import load_instances
+from escaperoom.master import EscapeRoom
+from escaperoom.scorer import EscapeRoomScorer
+from escaperoom.policies import EXPLORER_POLICIES, get_policy
+from escaperoom.simulator import simulate, OUTCOME_SUCCESS, OUTCOME_ABORTED
+
+GAME_NAME = "escape_room"
+GAME_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INSTANCES_PATH = os.path.join("escaperoom", "in", "instances.json")
+
+
+def play_episode(experiment: Dict, game_instance: Dict, explorer_policy: str = "random",
+                 guide_policy: str = "fixed") -> Dict:
+    """
+    Play a single episode with scripted players
+
+    Args:
+        experiment: Experiment config, at least {"name": ...}
+        game_instance: An instance from instances.json
+        explorer_policy: Name of the Explorer policy
+        guide_policy: Name of the Guide policy
+
+    Returns:
+        The interactions logged by the game recorder
+    """
+    experiment = {**experiment, "explorer_policy": explorer_policy, "guide_policy": guide_policy}
+    game_master = EscapeRoom(GAME_NAME, GAME_PATH, experiment, [CustomResponseModel(), CustomResponseModel()])
+    game_master.game_recorder = DefaultGameRecorder(GAME_NAME, experiment["name"], game_instance["game_id"],
+                                                    f"{explorer_policy}--{guide_policy}")
+    game_master.setup(**game_instance)
+    game_master.play()
+    return game_master.game_recorder.interactions
+
+
+def score_episode(experiment: Dict, game_instance: Dict, interactions: Dict) -> Dict:
+    """
+    Returns:
+        The episode scores computed by EscapeRoomScorer
+    """
+    game_scorer = EscapeRoomScorer(GAME_NAME, experiment, game_instance)
+    game_scorer.compute_scores(interactions)
+    return game_scorer.scores["episode scores"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scripted baselines for EscapeRoom")
+    parser.add_argument("--instances", default=INSTANCES_PATH)
+    parser.add_argument("--explorer", nargs="+", default=list(EXPLORER_POLICIES.keys()))
+    parser.add_argument("--guide", nargs="+", default=["protocol"])
+    parser.add_argument("--repeats", type=int, default=1, help="Episodes per instance")
+    parser.add_argument("--no_scores", action="store_true", help="Only play, skip the scorer")
+    parser.add_argument("--simulate", action="store_true", help="Play on the simulation core, skips the scorer")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    np.random.seed(args.seed)  # random Explorer policy
+
+    instances = load_instances(args.instances)
+
+    for explorer_policy in args.explorer:
+        for guide_policy in args.guide:
+            results = defaultdict(lambda: defaultdict(list))
+            n_games = 0
+            start = time.perf_counter()
+            for exp in instances["experiments"]:
+                experiment = {k: v for k, v in exp.items() if k != "game_instances"}
+                for game_instance in exp["game_instances"]:
+                    if args.simulate:
+                        explorer = get_policy("explorer", explorer_policy, game_instance)
+                        guide = get_policy("guide", guide_policy, game_instance)
+                    for _ in range(args.repeats):
+                        if args.simulate:
+                            simulator, _ = simulate(game_instance, explorer, guide)
+                            n_games += 1
+                            results[exp["name"]][ms.METRIC_SUCCESS].append(int(simulator.outcome == OUTCOME_SUCCESS))
+                            results[exp["name"]][ms.METRIC_ABORTED].append(int(simulator.outcome == OUTCOME_ABORTED))
+                            results[exp["name"]][ms.BENCH_SCORE].append(np.nan)
+                            continue
+                        interactions = play_episode(experiment, game_instance, explorer_policy, guide_policy)
+                        n_games += 1
+                        if args.no_scores:
+                            continue
+                        scores = score_episode(experiment, game_instance, interactions)
+                        for key in (ms.METRIC_SUCCESS, ms.METRIC_ABORTED, ms.BENCH_SCORE):
+                            results[exp["name"]][key].append(scores[key])
+            duration = time.perf_counter() - start
+
+            print(f"\nExplorer: {explorer_policy}, Guide: {guide_policy} - "
+                  f"{n_games} games in {duration:.2f}s ({n_games / duration:.1f} games/s)")
+            for exp_name, exp_scores in results.items():
+                # Main score is nan for aborted episodes
+                bench_scores = [s for s in exp_scores[ms.BENCH_SCORE] if not np.isnan(s)]
+                main_score = np.mean(bench_scores) if bench_scores else np.nan
+                print(f"{exp_name:<24} success: {np.mean(exp_scores[ms.METRIC_SUCCESS]):.2f} "
+                      f"aborted: {np.mean(exp_scores[ms.METRIC_ABORTED]):.2f} "
+                      f"main score: {main_score:.2f}")
+
+
+if __name__ == '__main__':
+    main()
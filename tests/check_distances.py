@@ -1,9 +1,9 @@
 import os
-import json
 import ast
 
-with open(os.path.join("escaperoom", "in", "instances.json"), "r") as f:
-    json_data = json.load(f)
+from escaperoom.instance_shards import open_instances
+
+json_data = open_instances(os.path.join("escaperoom", "in", "instances.json"))
 
 
 exps = json_data["experiments"]
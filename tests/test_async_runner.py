@@ -0,0 +1,185 @@
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from clemcore.backends import Model, ModelSpec
+from clemcore.clemgame import GameSpec
+
+from escaperoom.async_runner import run, wrap_models, RateLimitError, RateLimitedModel
+from escaperoom.master import EscapeRoomBenchmark
+
+GAME_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "escaperoom")
+
+
+class InFlightCounter:
+    """
+    Calls in flight across several stand-in models, and the peak
+    """
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def enter(self):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def exit(self):
+        with self.lock:
+            self.active -= 1
+
+
+class StandInModel(Model):
+    """
+    Local stand-in for an API backend. Responses only depend on the messages of the player, so that episodes are
+    deterministic when played concurrently
+    """
+
+    def __init__(self, model_name: str, delay: float = 0.01, rate_limited_calls: int = 0,
+                 in_flight: InFlightCounter = None):
+        super().__init__(ModelSpec(model_name=model_name, backend="standin"))
+        self.set_gen_args(temperature=0.0, max_tokens=100)
+        self.delay = delay
+        self.rate_limited_calls = rate_limited_calls
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        self.in_flight = in_flight
+
+    def generate_response(self, messages):
+        with self.lock:
+            if self.rate_limited_calls:
+                self.rate_limited_calls -= 1
+                raise RateLimitError("429")
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        if self.in_flight is not None:
+            self.in_flight.enter()
+        time.sleep(self.delay)
+        if self.in_flight is not None:
+            self.in_flight.exit()
+        with self.lock:
+            self.active -= 1
+        content = messages[-1]["content"].lower()
+        if self.get_name() == "standin-guide":
+            response = "ANSWER: There is a bed" if content.startswith("question") else "DESCRIPTION: A bedroom"
+        else:
+            turn = sum(1 for message in messages if message["role"] == "assistant")
+            response = "QUESTION: Is there a bed?" if turn < 2 else "ESCAPE"
+        return messages, {"response": response}, response
+
+
+class BlockingModel(StandInModel):
+    """
+    The first gate.parties calls block until that many calls are waiting - they can only pass if as many episodes
+    run at the same time
+    """
+
+    def __init__(self, model_name: str, gate: threading.Barrier, in_flight: InFlightCounter):
+        super().__init__(model_name, in_flight=in_flight)
+        self.gate = gate
+        self.gated_calls = 0
+
+    def generate_response(self, messages):
+        with self.lock:
+            gated = self.gated_calls < self.gate.parties
+            self.gated_calls += gated
+        if gated:
+            self.in_flight.enter()
+            try:
+                self.gate.wait()
+            finally:
+                self.in_flight.exit()
+        return super().generate_response(messages)
+
+
+def _load_interactions(results_dir):
+    interactions = {}
+    for path in sorted(glob.glob(os.path.join(results_dir, "**", "interactions.json"), recursive=True)):
+        with open(path) as f:
+            data = json.load(f)
+        events = [(event["from"], event["to"], event["action"]) for turn in data["turns"] for event in turn]
+        interactions[os.path.relpath(path, results_dir)] = events
+    return interactions
+
+
+class AsyncRunnerTest(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.WARNING)
+        self.benchmark = EscapeRoomBenchmark(GameSpec(game_name="escape_room", game_path=GAME_PATH, players="two"))
+        with open(os.path.join(GAME_PATH, "in", "instances.json")) as f:
+            instances = json.load(f)
+        experiments = instances["experiments"][:3]
+        for experiment in experiments:
+            experiment["game_instances"] = experiment["game_instances"][:4]
+        self.benchmark.instances = {"experiments": experiments}
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def test_same_records_as_sequential_run(self):
+        with tempfile.TemporaryDirectory() as sequential_dir, tempfile.TemporaryDirectory() as async_dir:
+            self.benchmark.run([StandInModel("standin-explorer"), StandInModel("standin-guide")], sequential_dir)
+            errors = run(self.benchmark, [StandInModel("standin-explorer"), StandInModel("standin-guide")],
+                         async_dir, max_episodes=6)
+            self.assertEqual(errors, 0)
+            sequential, concurrent = _load_interactions(sequential_dir), _load_interactions(async_dir)
+            self.assertEqual(len(concurrent), 12)
+            self.assertEqual(sequential, concurrent)
+            escapes = [event for events in concurrent.values() for event in events if event[2]["type"] == "escape"]
+            self.assertEqual(len(escapes), 12)
+
+    def test_backend_concurrency_limit(self):
+        in_flight = InFlightCounter()
+        guide = StandInModel("standin-guide", delay=0.02, in_flight=in_flight)
+        explorer = StandInModel("standin-explorer", delay=0.02, in_flight=in_flight)
+        with tempfile.TemporaryDirectory() as results_dir:
+            run(self.benchmark, [explorer, guide], results_dir, max_episodes=12, max_concurrent={"standin": 3})
+        # Both models share the limit of the standin backend - at most 3 calls in flight across both of them
+        self.assertLessEqual(in_flight.peak, 3)
+        self.assertGreater(in_flight.peak, 1)
+        self.assertGreater(guide.peak, 0)
+        self.assertGreater(explorer.peak, 0)
+
+    def test_max_episodes_above_default_executor(self):
+        # More episodes in flight than the default executor of asyncio has threads
+        max_episodes = min(32, (os.cpu_count() or 1) + 4) + 2
+        with open(os.path.join(GAME_PATH, "in", "instances.json")) as f:
+            pool = [g for experiment in json.load(f)["experiments"] for g in experiment["game_instances"]]
+        game_instances = [dict(g, game_id=i) for i, g in enumerate(pool[:max_episodes + 4])]
+        self.benchmark.instances = {"experiments": [{"name": "small", "game_instances": game_instances}]}
+
+        in_flight = InFlightCounter()
+        guide = BlockingModel("standin-guide", threading.Barrier(max_episodes, timeout=10), in_flight)
+        explorer = StandInModel("standin-explorer", in_flight=in_flight)
+        with tempfile.TemporaryDirectory() as results_dir:
+            errors = run(self.benchmark, [explorer, guide], results_dir, max_episodes=max_episodes,
+                         max_concurrent={"standin": 2 * max_episodes})
+        self.assertEqual(errors, 0)
+        # Every episode has at most one call in flight
+        self.assertEqual(in_flight.peak, max_episodes)
+
+    def test_rate_limit_retry(self):
+        model = StandInModel("standin-guide", rate_limited_calls=2)
+        wrapped = wrap_models([model], backoff=0.001)[0]
+        self.assertIsInstance(wrapped, RateLimitedModel)
+        self.assertEqual(wrapped.get_temperature(), 0.0)
+        _, _, response = wrapped.generate_response([{"role": "user", "content": "Describe the room"}])
+        self.assertEqual(response, "DESCRIPTION: A bedroom")
+
+        model.rate_limited_calls = 3
+        wrapped = wrap_models([model], max_retries=1, backoff=0.001)[0]
+        with self.assertRaises(RateLimitError):
+            wrapped.generate_response([{"role": "user", "content": "Describe the room"}])
+
+
+if __name__ == '__main__':
+    unittest.main()
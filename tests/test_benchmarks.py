@@ -0,0 +1,63 @@
+import logging
+import unittest
+
+from benchmarks.imports import MODULES, measure, parse_importtime
+from benchmarks.micro import BENCHMARKS, compare, run, select, time_callable
+
+
+class MicroBenchmarkTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.INFO)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def test_all_benchmarks_run(self):
+        for name, setup in BENCHMARKS.items():
+            with self.subTest(name=name):
+                setup()()
+
+    def test_time_callable(self):
+        timing = time_callable(lambda: sum(range(100)), min_time=0.001, repeat=3)
+        self.assertEqual(timing["repeat"], 3)
+        self.assertGreaterEqual(timing["number"], 1)
+        self.assertLessEqual(timing["min_us"], timing["median_us"])
+        self.assertLessEqual(timing["median_us"], timing["max_us"])
+
+    def test_select_and_run(self):
+        names = select(["graphs.cycle[5x5"])
+        self.assertEqual(names, ["graphs.cycle[5x5,8]"])
+        results = run(names, min_time=0.001, repeat=2, verbose=False)
+        self.assertEqual(list(results), names)
+
+    def test_compare(self):
+        baseline = {"a": {"min_us": 10.0}, "b": {"min_us": 10.0}, "c": {"min_us": 10.0}}
+        results = {"a": {"min_us": 11.0}, "b": {"min_us": 13.0}, "d": {"min_us": 1.0}}
+        rows = {row["name"]: row for row in compare(results, baseline, threshold=0.2)}
+        self.assertEqual(set(rows), {"a", "b"})
+        self.assertFalse(rows["a"]["regression"])
+        self.assertTrue(rows["b"]["regression"])
+        self.assertAlmostEqual(rows["b"]["ratio"], 1.3)
+
+
+class ImportBenchmarkTest(unittest.TestCase):
+
+    def test_parse_importtime(self):
+        stderr = ("import time: self [us] | cumulative | imported package\n"
+                  "import time:       120 |        120 |   engine.utils\n"
+                  "import time:      4000 |       5000 | engine.graphs\n")
+        self.assertEqual(parse_importtime(stderr), {"engine.utils": 120, "engine.graphs": 5000})
+
+    def test_no_heavy_imports(self):
+        for module in ("escaperoom.master", "engine.graphs", "engine.environment", "benchmarks.imports"):
+            with self.subTest(module=module):
+                result = measure(module, MODULES[module], repeat=1)
+                self.assertEqual(result["heavy"], [])
+                self.assertGreater(result["min_us"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
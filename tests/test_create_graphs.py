@@ -0,0 +1,74 @@
+import os
+import re
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from escaperoom.utils import image_store, image_variants
+from escaperoom.utils.create_graphs import compose_graph, draw_graph
+from escaperoom.utils.image_store import ImageStore
+from escaperoom.utils.image_variants import ImageVariants
+
+
+class CreateGraphsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        root = self.tmp_dir.name
+        # Keep the shared image store and variant cache out of the repository and the home directory
+        store = ImageStore(os.path.join(root, "store"))
+        self._patched = [(image_store._STORES, image_store.DEFAULT_STORE_ROOT, store),
+                         (image_variants._VARIANTS, image_variants.DEFAULT_VARIANTS_DIR,
+                          ImageVariants(os.path.join(root, "variants"), store=store))]
+        for cache, key, value in self._patched:
+            cache[key] = value
+
+        # (1, 2) - (2, 2) - (2, 3), two Bedrooms
+        node_to_image = {}
+        for i, node in enumerate(["(1, 2)", "(2, 2)", "(2, 3)"]):
+            node_to_image[node] = os.path.join(root, f"room_{i}.png")
+            Image.fromarray(np.full((30, 50, 3), 60 * (i + 1), dtype=np.uint8), "RGB").save(node_to_image[node])
+        self.metadata = {
+            "node_to_image": node_to_image,
+            "node_to_category": {"(1, 2)": "Bedroom", "(2, 2)": "Kitchen", "(2, 3)": "Bedroom"},
+            "unnamed_edges": [["(1, 2)", "(2, 2)"], ["(2, 2)", "(2, 3)"]],
+            "start_node": "(1, 2)",
+            "target_node": "(2, 3)",
+        }
+
+    def tearDown(self):
+        for cache, key, _ in self._patched:
+            cache.pop(key, None)
+        self.tmp_dir.cleanup()
+
+    def test_compose_graph(self):
+        # 2 x 2 cells of 64 pixels (1.6 tiles), with a margin of 6 pixels (10% of a cell) on every side
+        canvas = compose_graph(self.metadata, tile_size=40)
+        self.assertEqual((canvas.mode, canvas.size), ("RGB", (140, 140)))
+        # The start tile is centered at (38, 43) in the first cell, with a blue border of 4 pixels around it
+        pixels = np.asarray(canvas)
+        self.assertEqual(tuple(pixels[43, 38]), (60, 60, 60))
+        self.assertEqual(tuple(pixels[43, 38 - 20 - 2]), (0, 0, 255))
+        self.assertEqual(tuple(pixels[43 + 64, 38 + 64]), (180, 180, 180))
+
+    def test_draw_graph_formats(self):
+        for ext, image_format in (("png", "PNG"), ("pdf", "PDF")):
+            path = os.path.join(self.tmp_dir.name, "out", f"graph.{ext}")
+            draw_graph(self.metadata, path, base_img_size=40)
+            if image_format == "PNG":
+                with Image.open(path) as image:
+                    self.assertEqual((image.format, image.size), (image_format, (140, 140)))
+            else:
+                with open(path, "rb") as f:
+                    data = f.read()
+                self.assertTrue(data.startswith(b"%PDF"))
+                # 140 pixels at 150 dpi, in points
+                media_box = [float(v) for v in re.search(rb"/MediaBox \[([^\]]+)\]", data).group(1).split()]
+                self.assertAlmostEqual(media_box[2], 140 * 72 / 150, places=1)
+                self.assertAlmostEqual(media_box[3], 140 * 72 / 150, places=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
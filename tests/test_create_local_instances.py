@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+
+from utils.create_local_instances import collect_urls, replace_urls, mirror_images, download_image, MANIFEST_NAME
+
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+    """
+    Serves files from the test directory, with support for Range requests and a request counter
+    """
+    requests_served = []
+
+    def __init__(self, *args, directory=None, **kwargs):
+        super().__init__(*args, directory=RangeRequestHandler.directory, **kwargs)
+
+    def do_GET(self):
+        RangeRequestHandler.requests_served.append((self.path, self.headers.get("Range")))
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+        with open(path, "rb") as f:
+            data = f.read()
+        start = 0
+        if self.headers.get("Range"):
+            start = int(self.headers["Range"].split("=")[1].split("-")[0])
+            self.send_response(206)
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(data) - start))
+        self.end_headers()
+        self.wfile.write(data[start:])
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CreateLocalInstancesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.server_dir = os.path.join(self.tmp_dir.name, "server", "images", "ADE", "kitchen")
+        os.makedirs(self.server_dir)
+        self.files = {}
+        for i in range(5):
+            data = os.urandom(10000 + i)
+            with open(os.path.join(self.server_dir, f"ADE_{i}.jpg"), "wb") as f:
+                f.write(data)
+            self.files[f"ADE_{i}.jpg"] = data
+
+        RangeRequestHandler.directory = os.path.join(self.tmp_dir.name, "server")
+        RangeRequestHandler.requests_served = []
+        self.server = HTTPServer(("127.0.0.1", 0), RangeRequestHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{self.server.server_port}/images/ADE/kitchen"
+        self.urls = [f"{base_url}/{name}" for name in self.files]
+        self.images_dir = os.path.join(self.tmp_dir.name, "mirror")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp_dir.cleanup()
+
+    def test_collect_and_replace_urls(self):
+        data = {"experiments": [{"game_instances": [{"node_to_image": {"(0, 0)": self.urls[0], "(1, 0)": self.urls[1]},
+                                                     "category_to_image": {"Kitchen": self.urls[0]}}]}]}
+        self.assertEqual(collect_urls(data), self.urls[:2])
+        replaced = replace_urls(data, {self.urls[0]: "a.jpg", self.urls[1]: "b.jpg"})
+        self.assertEqual(replaced["experiments"][0]["game_instances"][0]["category_to_image"]["Kitchen"], "a.jpg")
+        self.assertEqual(data["experiments"][0]["game_instances"][0]["category_to_image"]["Kitchen"], self.urls[0])
+
+    def test_mirror_and_rerun(self):
+        url_to_path = mirror_images(self.urls, self.images_dir, workers=3)
+        self.assertEqual(len(url_to_path), len(self.urls))
+        for url, path in url_to_path.items():
+            self.assertEqual(path, os.path.join(self.images_dir, "ADE", "kitchen", os.path.basename(url)))
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), self.files[os.path.basename(url)])
+        with open(os.path.join(self.images_dir, MANIFEST_NAME)) as f:
+            manifest = json.load(f)
+        self.assertEqual(manifest[self.urls[0]]["sha256"], hashlib.sha256(self.files["ADE_0.jpg"]).hexdigest())
+
+        # Re-run only fetches missing or changed images
+        RangeRequestHandler.requests_served = []
+        os.remove(url_to_path[self.urls[1]])
+        with open(url_to_path[self.urls[2]], "ab") as f:
+            f.write(b"corrupt")
+        mirror_images(self.urls, self.images_dir, workers=3)
+        self.assertEqual(sorted(path for path, _ in RangeRequestHandler.requests_served),
+                         sorted(["/images/ADE/kitchen/ADE_1.jpg", "/images/ADE/kitchen/ADE_2.jpg"]))
+
+    def test_resume_partial_download(self):
+        local_path = os.path.join(self.images_dir, "ADE_3.jpg")
+        os.makedirs(self.images_dir)
+        with open(local_path + ".part", "wb") as f:
+            f.write(self.files["ADE_3.jpg"][:4000])
+        entry = download_image(self.urls[3], local_path)
+        self.assertEqual(RangeRequestHandler.requests_served[-1][1], "bytes=4000-")
+        self.assertEqual(entry["size"], len(self.files["ADE_3.jpg"]))
+        with open(local_path, "rb") as f:
+            self.assertEqual(f.read(), self.files["ADE_3.jpg"])
+        self.assertFalse(os.path.exists(local_path + ".part"))
+
+    def test_missing_image(self):
+        url_to_path = mirror_images(self.urls + [self.urls[0].replace("ADE_0", "missing")], self.images_dir)
+        self.assertEqual(len(url_to_path), len(self.urls))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+
+from escaperoom import serialization
+from escaperoom.difficulty import (DifficultyIndex, FEATURES, build_index, instance_features, make_experiment,
+                                   parse_where)
+from escaperoom.instance_shards import open_instances
+
+INSTANCES = os.path.join("escaperoom", "in", "instances.json")
+
+
+class DifficultyTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.instances = open_instances(INSTANCES)
+        cls.index = DifficultyIndex(build_index(cls.instances))
+
+    def test_path_map_features(self):
+        # (0, 0) - (1, 0) - (2, 0) - (3, 0), with two Bedrooms
+        game_instance = {
+            "graph_id": "difficulty-path",
+            "unnamed_nodes": ["(0, 0)", "(1, 0)", "(2, 0)", "(3, 0)"],
+            "node_to_category": {"(0, 0)": "Kitchen", "(1, 0)": "Bedroom",
+                                 "(2, 0)": "Closet", "(3, 0)": "Bedroom"},
+            "unnamed_edges": [["(0, 0)", "(1, 0)"], ["(1, 0)", "(2, 0)"], ["(2, 0)", "(3, 0)"]],
+            "start_node": "(0, 0)",
+            "target_node": "(3, 0)",
+        }
+        features = instance_features(game_instance)
+        self.assertEqual(set(features), set(FEATURES))
+        self.assertEqual((features["rooms"], features["doors"], features["diameter"]), (4, 3, 3))
+        self.assertEqual((features["mean_degree"], features["max_degree"], features["dead_ends"]), (1.5, 2, 2))
+        self.assertEqual((features["ambiguous_rooms"], features["num_candidates"]), (2, 2))
+        self.assertEqual((features["decoy_start_distance"], features["decoy_target_distance"]), (1, 2))
+        self.assertEqual(features["optimal_moves"], 3)
+
+    def test_index_round_trip(self):
+        n_instances = sum(len(experiment["game_instances"]) for experiment in self.instances["experiments"])
+        self.assertEqual(len(self.index), n_instances)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = serialization.dump(build_index(self.instances), os.path.join(tmp_dir, "difficulty.json"))
+            loaded = DifficultyIndex.load(path)
+        self.assertEqual(loaded.keys, self.index.keys)
+        self.assertEqual(list(loaded["optimal_moves"]), list(self.index["optimal_moves"]))
+
+    def test_stratified_sample(self):
+        by = ["optimal_moves", "num_candidates"]
+        strata = self.index.strata(by)
+        keys = self.index.stratified_sample(12, by, seed=1)
+        self.assertEqual(len(keys), 12)
+        self.assertEqual(len(set(keys)), 12)
+        self.assertEqual(keys, self.index.stratified_sample(12, by, seed=1))
+
+        # Every stratum is represented equally, unless it has fewer instances
+        drawn = [sum(self.index.keys[row] in keys for row in rows) for rows in strata.values()]
+        share = 12 // len(strata)
+        for rows, n_drawn in zip(strata.values(), drawn):
+            self.assertGreaterEqual(n_drawn, min(share, len(rows)))
+
+    def test_where_and_experiment(self):
+        where = parse_where(["optimal_moves=3:", "rooms=8:8"])
+        rows = self.index.select(where)
+        self.assertTrue(all(self.index["optimal_moves"][rows] >= 3))
+        keys = self.index.stratified_sample(len(rows) + 5, ["num_candidates"], where=where)
+        self.assertEqual(len(keys), len(rows))
+
+        instances = make_experiment(self.instances, keys[:3], "hard")
+        game_instances = instances["experiments"][0]["game_instances"]
+        self.assertEqual([g["game_id"] for g in game_instances], [0, 1, 2])
+        self.assertEqual([(g["source_experiment"], g["source_game_id"]) for g in game_instances], keys[:3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import json
+import logging
+import os
+import tempfile
+import unittest
+
+from PIL import Image
+from clemcore.backends.model_registry import CustomResponseModel
+from clemcore.clemgame.recorder import DefaultGameRecorder
+
+from escaperoom.image_cache import ImageCache
+from escaperoom.master import EscapeRoom
+
+GAME_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "escaperoom")
+
+
+class ImageCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.images = []
+        for i, color in enumerate(["red", "green", "blue"]):
+            path = os.path.join(self.tmp_dir.name, f"room_{i}.png")
+            Image.new("RGB", (1200, 900), color).save(path)
+            self.images.append(path)
+        self.cache = ImageCache(os.path.join(self.tmp_dir.name, "cache"), size=256)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_resized_jpeg(self):
+        path = self.cache.get(self.images[0])
+        self.assertNotEqual(path, self.images[0])
+        with Image.open(path) as image:
+            self.assertEqual(image.format, "JPEG")
+            self.assertEqual(image.size, (256, 192))
+        # Same source and size - same file, other size - other file
+        self.assertEqual(ImageCache(self.cache.cache_dir, size=256).get(self.images[0]), path)
+        self.assertNotEqual(ImageCache(self.cache.cache_dir, size=128).get(self.images[0]), path)
+
+    def test_prefetch(self):
+        cached = self.cache.prefetch(self.images + self.images[:1])
+        self.assertEqual(list(cached.keys()), self.images)
+        self.assertTrue(all(os.path.exists(path) for path in cached.values()))
+
+    def test_missing_image_falls_back_to_source(self):
+        logging.disable(logging.WARNING)
+        missing = os.path.join(self.tmp_dir.name, "missing.png")
+        self.assertEqual(self.cache.get(missing), missing)
+        logging.disable(logging.NOTSET)
+
+    def test_game_master(self):
+        logging.disable(logging.INFO)
+        with open(os.path.join(GAME_PATH, "in", "instances.json")) as f:
+            experiment = json.load(f)["experiments"][0]
+        game_instance = experiment["game_instances"][0]
+        # Local images instead of URLs, there is no network access in the tests
+        nodes = list(game_instance["node_to_image"].keys())
+        game_instance = {**game_instance, "node_to_image": {node: self.images[i % len(self.images)]
+                                                            for i, node in enumerate(nodes)}}
+        experiment = {"name": experiment["name"], "image_cache": True, "image_size": 256}
+        game_master = EscapeRoom("escape_room", GAME_PATH, experiment, [CustomResponseModel(), CustomResponseModel()])
+        game_master.image_cache = self.cache
+        game_master.game_recorder = DefaultGameRecorder("escape_room", experiment["name"], game_instance["game_id"],
+                                                        "programmatic--programmatic")
+        game_master.setup(**game_instance)
+        game_master.play()
+        logging.disable(logging.NOTSET)
+
+        guide_images = [image for message in game_master.guide._messages for image in message.get("image", [])]
+        self.assertEqual(guide_images, [self.cache.path_for(game_instance["node_to_image"][game_instance["target_node"]])])
+        logged = [event["action"]["content"]["image"][0] for turn in game_master.game_recorder.interactions["turns"]
+                  for event in turn if event["action"]["type"] == "image"]
+        self.assertTrue(all(image in self.images for image in logged))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import copy
+import json
+import logging
+import os
+import unittest
+
+from clemcore.backends import Model, ModelSpec
+from clemcore.backends.model_registry import CustomResponseModel
+from clemcore.clemgame.recorder import DefaultGameRecorder
+
+from escaperoom.image_history import apply_image_history
+from escaperoom.master import EscapeRoom, Guide, player_history
+
+GAME_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "escaperoom")
+
+
+def _history(*images):
+    messages = []
+    for image in images:
+        messages.append({"role": "user", "content": "prompt", "image": [image]})
+        messages.append({"role": "assistant", "content": "response"})
+    return messages
+
+
+def _images(messages):
+    return [image for message in messages for image in message.get("image", [])]
+
+
+class RecordingModel(Model):
+    """
+    Keeps a copy of the messages of every call
+    """
+
+    def __init__(self):
+        super().__init__(ModelSpec(model_name="recording", backend="recording"))
+        self.set_gen_args(temperature=0.0, max_tokens=100)
+        self.calls = []
+
+    def generate_response(self, messages):
+        self.calls.append(copy.deepcopy(messages))
+        return messages, {}, "DESCRIPTION: A bedroom"
+
+
+class ImageHistoryTest(unittest.TestCase):
+
+    def test_all(self):
+        messages = _history("a", "b", "a")
+        self.assertEqual(apply_image_history(messages, {"image": ["c"]}, "all"), 4)
+        self.assertEqual(_images(messages), ["a", "b", "a"])
+
+    def test_last_k(self):
+        messages = _history("a", "b", "c")
+        self.assertEqual(apply_image_history(messages, {"image": ["d"]}, "last_k", k=2), 2)
+        self.assertEqual(_images(messages), ["c"])
+        self.assertNotIn("image", messages[0])
+        self.assertEqual(messages[0]["content"], "prompt")
+
+    def test_first_last(self):
+        messages = _history("a", "b", "c")
+        self.assertEqual(apply_image_history(messages, {"image": ["d"]}, "first_last"), 2)
+        self.assertEqual(_images(messages), ["a"])
+
+    def test_dedupe(self):
+        messages = _history("a", "b", "a")
+        self.assertEqual(apply_image_history(messages, {"image": ["b"]}, "dedupe"), 2)
+        self.assertEqual(_images(messages), ["a"])
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            apply_image_history([], {}, "none")
+
+    def test_invalid_k(self):
+        for k in (0, -1):
+            with self.assertRaises(ValueError):
+                apply_image_history(_history("a"), {"image": ["b"]}, "last_k", k=k)
+        # k only applies to last_k
+        self.assertEqual(apply_image_history(_history("a"), {"image": ["b"]}, "first_last", k=0), 2)
+        with self.assertRaises(ValueError):
+            EscapeRoom("escape_room", GAME_PATH, {"name": "small", "image_history": "last_k", "image_history_k": 0},
+                       [CustomResponseModel(), CustomResponseModel()])
+
+    def test_player_history(self):
+        # The policy edits the private clemcore Player._messages - fails if clemcore renames or copies the history
+        model = RecordingModel()
+        guide = Guide(model)
+        guide({"role": "user", "content": "first", "image": ["a"]})
+        history = player_history(guide)
+        self.assertEqual(_images(history), ["a"])
+        apply_image_history(history, {"image": ["b"]}, "last_k", k=1)
+        guide({"role": "user", "content": "second", "image": ["b"]})
+        self.assertEqual(_images(model.calls[-1]), ["b"])
+
+        with self.assertRaises(RuntimeError):
+            player_history(object())
+
+    def test_game_master(self):
+        logging.disable(logging.INFO)
+        with open(os.path.join(GAME_PATH, "in", "instances.json")) as f:
+            experiment = json.load(f)["experiments"][0]
+        game_instance = experiment["game_instances"][0]
+        experiment = {"name": experiment["name"], "explorer_policy": "dfs", "guide_policy": "protocol",
+                      "image_history": "last_k", "image_history_k": 1}
+        game_master = EscapeRoom("escape_room", GAME_PATH, experiment, [CustomResponseModel(), CustomResponseModel()])
+        game_master.game_recorder = DefaultGameRecorder("escape_room", experiment["name"], game_instance["game_id"],
+                                                        "programmatic--programmatic")
+        game_master.setup(**game_instance)
+        game_master.play()
+        logging.disable(logging.NOTSET)
+
+        self.assertLessEqual(len(_images(game_master.explorer._messages)), 1)
+        self.assertLessEqual(len(_images(game_master.guide._messages)), 1)
+        image_events = [event["action"]["content"] for turn in game_master.game_recorder.interactions["turns"]
+                        for event in turn if event["action"]["type"] == "image"]
+        self.assertGreater(len(image_events), 2)
+        self.assertTrue(all(event["retained_images"] == 1 for event in image_events))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+
+from escaperoom.utils.image_store import ImageStore
+
+
+class ImageStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = ImageStore(os.path.join(self.tmp_dir.name, "store"))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _write(self, rel_path, data):
+        path = os.path.join(self.tmp_dir.name, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_deduplication(self):
+        blob_a = self.store.put_bytes(b"kitchen", "https://host/images/ADE/kitchen/1.jpg")
+        blob_b = self.store.put_bytes(b"kitchen", "https://host/images/ADE/kitchen/copy.jpg")
+        self.assertEqual(blob_a, blob_b)
+        self.assertIn("https://host/images/ADE/kitchen/copy.jpg", self.store)
+        self.assertNotIn("https://host/images/ADE/kitchen/2.jpg", self.store)
+        stats = self.store.stats()
+        self.assertEqual((stats["keys"], stats["blobs"]), (2, 1))
+
+    def test_ingest_and_link(self):
+        paths = [self._write("renders/small/1.png", b"render"), self._write("renders/large/1.png", b"render"),
+                 self._write("renders/large/2.png", b"other")]
+        self.assertEqual(self.store.ingest_dir(os.path.join(self.tmp_dir.name, "renders"), link=True), 3)
+        # Legacy paths are hard links to the blobs
+        self.assertEqual(os.stat(paths[0]).st_ino, os.stat(paths[1]).st_ino)
+        self.assertEqual(os.stat(paths[0]).st_ino, os.stat(self.store.path(paths[0])).st_ino)
+        with open(paths[1], "rb") as f:
+            self.assertEqual(f.read(), b"render")
+        self.assertEqual(self.store.stats()["blobs"], 2)
+
+    def test_materialize_and_reload(self):
+        source = self._write("source.jpg", b"bedroom")
+        blob = self.store.fetch(source)
+        self.store.save()
+
+        store = ImageStore(self.store.root)
+        self.assertEqual(store.fetch(source), blob)
+        for mode in ("hardlink", "symlink", "copy"):
+            dest = store.materialize(source, os.path.join(self.tmp_dir.name, "legacy", f"{mode}.jpg"), mode=mode)
+            with open(dest, "rb") as f:
+                self.assertEqual(f.read(), b"bedroom")
+        with self.assertRaises(KeyError):
+            store.materialize("missing", os.path.join(self.tmp_dir.name, "missing.jpg"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from escaperoom.utils.image_store import ImageStore
+from escaperoom.utils.image_variants import ImageVariants, VariantSpec, get_spec
+
+
+class ImageVariantsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.variants = ImageVariants(os.path.join(self.tmp_dir.name, "variants"),
+                                      store=ImageStore(os.path.join(self.tmp_dir.name, "store")))
+        self.source = os.path.join(self.tmp_dir.name, "room.png")
+        pixels = np.random.default_rng(0).integers(0, 256, (60, 80, 3), dtype=np.uint8)
+        Image.fromarray(pixels, "RGB").save(self.source)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_raw_variant_matches_resize(self):
+        expected = Image.open(self.source).convert("RGBA").resize((25, 25), resample=Image.LANCZOS)
+        image = self.variants.get(self.source, VariantSpec((25, 25), "raw"))
+        self.assertEqual(image.mode, "RGBA")
+        np.testing.assert_array_equal(np.asarray(image), np.asarray(expected))
+        # Second read is served from disk
+        os.remove(self.source)
+        np.testing.assert_array_equal(np.asarray(self.variants.get(self.source, VariantSpec((25, 25), "raw"))),
+                                      np.asarray(expected))
+
+    def test_generate_all(self):
+        specs = ["transcript_node", VariantSpec((40, 40), "jpeg", fit=True)]
+        generated = self.variants.generate_all([self.source, self.source, "missing.png"], specs, max_workers=2)
+        self.assertEqual(list(generated), [self.source])
+        self.assertTrue(all(os.path.exists(path) for path in generated[self.source]))
+        with Image.open(generated[self.source][1]) as image:
+            self.assertEqual(image.size, (40, 30))
+
+    def test_unknown_preset(self):
+        with self.assertRaises(ValueError):
+            get_spec("thumbnail")
+        with self.assertRaises(ValueError):
+            get_spec(VariantSpec((10, 10), "webp"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import copy
+import json
+import os
+import tempfile
+import unittest
+
+from escaperoom.instance_format import LazyInstance, from_compact, load_instances, to_compact
+from escaperoom.simulator import simulate
+from escaperoom.policies import get_policy
+
+INSTANCES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "escaperoom", "in", "instances.json")
+
+
+class InstanceFormatTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with open(INSTANCES_PATH, "r") as f:
+            cls.instances = json.load(f)
+
+    def test_round_trip(self):
+        compact = to_compact(self.instances)
+        self.assertLess(len(json.dumps(compact)), len(json.dumps(self.instances)) / 4)
+        self.assertEqual(from_compact(compact, lazy=False), self.instances)
+        # Legacy files pass through unchanged
+        self.assertIs(from_compact(self.instances), self.instances)
+
+    def test_lazy_view(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "instances_compact.json")
+            with open(path, "w") as f:
+                json.dump(to_compact(self.instances), f)
+            instances = load_instances(path)
+        game_instance = instances["experiments"][2]["game_instances"][3]
+        original = self.instances["experiments"][2]["game_instances"][3]
+        self.assertIsInstance(game_instance, LazyInstance)
+        self.assertEqual(list(game_instance), list(original))
+        self.assertEqual(game_instance["category_to_node"], original["category_to_node"])
+        self.assertEqual(dict(game_instance), original)
+        with self.assertRaises(KeyError):
+            game_instance["missing"]
+        explorer = get_policy("explorer", "dfs", game_instance)
+        guide = get_policy("guide", "protocol", game_instance)
+        self.assertEqual(simulate(game_instance, explorer, guide)[0].outcome,
+                         simulate(original, get_policy("explorer", "dfs", original),
+                                  get_policy("guide", "protocol", original))[0].outcome)
+
+    def test_non_derivable_fields(self):
+        instances = copy.deepcopy(self.instances)
+        game_instance = instances["experiments"][0]["game_instances"][0]
+        game_instance["category_to_node"] = {}
+        del game_instance["named_edges"]
+        game_instance["extra"] = [1, 2]
+        self.assertEqual(from_compact(to_compact(instances), lazy=False), instances)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import json
+import os
+import unittest
+
+from engine.map_hashing import find_duplicates
+from escaperoom.instancegenerator import EscapeRoomInstanceGenerator
+
+INSTANCES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "escaperoom", "in", "instances.json")
+
+
+def _native(instances):
+    return json.loads(json.dumps(instances))
+
+
+class InstanceGeneratorTest(unittest.TestCase):
+
+    def test_reproduces_published_instances(self):
+        generator = EscapeRoomInstanceGenerator()
+        generator.on_generate()
+        with open(INSTANCES_PATH, "r") as f:
+            self.assertEqual(_native(generator.instances), json.load(f))
+
+    def test_dedup(self):
+        generator = EscapeRoomInstanceGenerator()
+        generator.on_generate(dedup=True)
+        instances = _native(generator.instances)
+        game_instances = [g for experiment in instances["experiments"] for g in experiment["game_instances"]]
+        self.assertTrue(all("map_hash" in g for g in game_instances))
+        # Only the few maps without a distinct alternative are kept as duplicates
+        self.assertLessEqual(len(find_duplicates(instances)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
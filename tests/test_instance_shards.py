@@ -0,0 +1,47 @@
+import json
+import os
+import tempfile
+import unittest
+
+from escaperoom.instance_shards import InstanceShard, ShardedInstances, open_instances, write_shards
+from escaperoom.scorer import get_metadata
+
+INSTANCES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "escaperoom", "in", "instances.json")
+
+
+class InstanceShardsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with open(INSTANCES_PATH, "r") as f:
+            cls.instances = json.load(f)
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.shards_dir = os.path.join(self.tmp_dir.name, "instances_shards")
+        write_shards(self.instances, self.shards_dir)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_streaming(self):
+        sharded = ShardedInstances(self.shards_dir)
+        expected = [(exp["name"], inst) for exp in self.instances["experiments"] for inst in exp["game_instances"]]
+        self.assertEqual(len(sharded), len(expected))
+        self.assertEqual([(config["name"], inst) for config, inst in sharded.iter_instances()], expected)
+
+    def test_random_access(self):
+        instances = open_instances(self.shards_dir)
+        experiment = instances["experiments"][4]
+        original = self.instances["experiments"][4]
+        self.assertIsInstance(experiment["game_instances"], InstanceShard)
+        self.assertEqual(experiment["game_instances"][-1], original["game_instances"][-1])
+        self.assertEqual(experiment["game_instances"][2:4], original["game_instances"][2:4])
+        self.assertEqual(get_metadata(instances, original["name"], 7), original["game_instances"][7])
+        with self.assertRaises(KeyError):
+            ShardedInstances(self.shards_dir).get(original["name"], 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
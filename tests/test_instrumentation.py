@@ -0,0 +1,103 @@
+import json
+import logging
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from clemcore.backends.model_registry import CustomResponseModel
+from clemcore.clemgame.recorder import DefaultGameRecorder
+
+from escaperoom import serialization
+from escaperoom.instrumentation import METRICS_FILE, TURN_PHASES, aggregate, find_metrics
+from escaperoom.master import EscapeRoom
+from escaperoom.utils.scripted_baselines import GAME_NAME, GAME_PATH
+
+INSTANCES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "escaperoom", "in", "instances.json")
+
+
+class InstrumentationTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.INFO)
+        with open(INSTANCES_PATH, "r") as f:
+            exp = json.load(f)["experiments"][0]
+        cls.experiment = {k: v for k, v in exp.items() if k != "game_instances"}
+        cls.experiment.update({"explorer_policy": "dfs", "guide_policy": "protocol"})
+        cls.game_instance = exp["game_instances"][0]
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def play(self, experiment=None):
+        np.random.seed(0)
+        game_master = EscapeRoom(GAME_NAME, GAME_PATH, experiment or self.experiment,
+                                 [CustomResponseModel(), CustomResponseModel()])
+        game_master.game_recorder = DefaultGameRecorder(GAME_NAME, self.experiment["name"],
+                                                        self.game_instance["game_id"], "dfs--protocol")
+        game_master.setup(**self.game_instance)
+        game_master.play()
+        return game_master
+
+    def test_turns(self):
+        game_master = self.play()
+        interactions = game_master.game_recorder.interactions
+        responses = [event for turn in interactions["turns"] for event in turn
+                     if event["action"]["type"] == "get message"]
+        turns = game_master.metrics.turns
+        self.assertEqual([turn["player"] for turn in turns],
+                         ["Guide" if "Guide" in event["from"] else "Explorer" for event in responses])
+        for turn in turns:
+            self.assertGreater(turn["phases"]["player"], 0)
+            self.assertGreaterEqual(turn["phases"]["step"], turn["phases"]["validate"])
+            self.assertGreaterEqual(turn["images"], 1)
+        # No image history policy - every request sends all images the player has seen
+        explorer_images = [turn["images"] for turn in turns if turn["player"] == "Explorer"]
+        self.assertEqual(explorer_images, sorted(explorer_images))
+        self.assertGreater(game_master.metrics.setup["setup"], 0)
+        # Metrics are not logged as game master events
+        self.assertFalse(any(event["action"]["type"] == "metrics" for turn in interactions["turns"] for event in turn))
+
+    def test_image_history_reduces_images(self):
+        all_images = self.play().metrics.summary()["images"]
+        last_images = self.play({**self.experiment, "image_history": "last_k", "image_history_k": 1})
+        self.assertLess(last_images.metrics.summary()["images"], all_images)
+
+    def test_store_and_aggregate(self):
+        game_master = self.play()
+        with tempfile.TemporaryDirectory() as results_dir:
+            game_master.store_records(results_dir, "dfs--protocol", "small/episode_0")
+            paths = list(find_metrics(results_dir))
+            self.assertEqual(len(paths), 1)
+            self.assertTrue(os.path.exists(os.path.join(os.path.dirname(paths[0]), "interactions.json")))
+            with open(paths[0], "r") as f:
+                metrics = json.load(f)
+        self.assertEqual(metrics["meta"]["dialogue_pair"], "dfs--protocol")
+        self.assertEqual(set(metrics["summary"]["phase_seconds"]), set(TURN_PHASES))
+        rows = aggregate([metrics, metrics])
+        self.assertEqual({row["player"] for row in rows}, {"Guide", "Explorer"})
+        self.assertEqual(rows[0]["episodes"], 2)
+        self.assertEqual(sum(row["calls"] for row in rows), 2 * len(metrics["turns"]))
+
+    @unittest.skipUnless(serialization.is_available("msgpack"), "msgpack is not installed")
+    def test_store_msgpack(self):
+        game_master = self.play()
+        with tempfile.TemporaryDirectory() as results_dir, \
+                mock.patch.object(serialization, "DEFAULT_SERIALIZER", "msgpack"):
+            game_master.store_records(results_dir, "dfs--protocol", "small/episode_0")
+            paths = list(find_metrics(results_dir))
+            episode_dir = os.path.dirname(paths[0])
+            # Only the game owned metrics are msgpack, clemcore's files stay JSON
+            self.assertEqual([os.path.basename(path) for path in paths], ["metrics.msgpack"])
+            self.assertFalse(os.path.exists(os.path.join(episode_dir, METRICS_FILE)))
+            with open(os.path.join(episode_dir, "interactions.json"), "r") as f:
+                self.assertIn("turns", json.load(f))
+            self.assertEqual(serialization.load(paths[0])["meta"]["dialogue_pair"], "dfs--protocol")
+
+
+if __name__ == '__main__':
+    unittest.main()
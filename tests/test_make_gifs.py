@@ -0,0 +1,37 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image, ImageSequence
+
+from escaperoom.utils.make_gifs import create_gif, frame_paths
+
+
+class MakeGifsTest(unittest.TestCase):
+
+    def test_streamed_gif(self):
+        colors = [(255, 0, 0), (0, 128, 0), (0, 0, 255), (255, 255, 0), (0, 0, 0), (255, 255, 255),
+                  (128, 0, 128), (0, 255, 255), (255, 128, 0), (64, 64, 64), (200, 200, 200), (0, 64, 128)]
+        with tempfile.TemporaryDirectory() as folder:
+            for turn in range(len(colors)):
+                # Frames grow over the episode, each one adds a block
+                image = Image.new("RGB", (40 + turn, 30), (255, 255, 255))
+                for i in range(turn + 1):
+                    image.paste(colors[i], (i * 3, 0, i * 3 + 3, 30))
+                image.save(os.path.join(folder, f"combined_{turn}.png"))
+            self.assertEqual(os.path.basename(frame_paths(folder)[2]), "combined_2.png")
+
+            self.assertEqual(create_gif(folder, fps=2.0), [os.path.join(folder, "animation.gif")])
+            with Image.open(os.path.join(folder, "animation.gif")) as gif:
+                self.assertEqual((gif.n_frames, gif.size, gif.info["duration"]), (len(colors), (51, 30), 500))
+                for turn, frame in enumerate(ImageSequence.Iterator(gif)):
+                    pixels = np.asarray(frame.convert("RGB"))
+                    np.testing.assert_array_equal(pixels[0, turn * 3], colors[turn])
+                    np.testing.assert_array_equal(pixels[0, 50], (255, 255, 255))
+            # Up to date
+            self.assertEqual(create_gif(folder), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
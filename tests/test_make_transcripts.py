@@ -0,0 +1,116 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from escaperoom.utils import image_store, image_variants
+from escaperoom.utils.image_store import ImageStore
+from escaperoom.utils.image_variants import ImageVariants
+from escaperoom.utils.make_transcripts import DONE_MARKER, process_interactions
+
+
+def _turns():
+    guide = "Player 1 (Guide)"
+    explorer = "Player 2 (Explorer)"
+    return [
+        [{"from": explorer, "to": "GM", "action": {"type": "get message", "content": "QUESTION: Is there a bed?"}},
+         {"from": guide, "to": "GM", "action": {"type": "get message", "content": "ANSWER: Yes"}}],
+        [{"from": explorer, "to": "GM", "action": {"type": "get message", "content": "MOVE: east"}},
+         {"from": "GM", "to": "GM", "action": {"type": "move", "content": "valid"}}],
+    ]
+
+
+class MakeTranscriptsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        root = self.tmp_dir.name
+        # Keep the shared image store and variant cache out of the repository and the home directory
+        store = ImageStore(os.path.join(root, "store"))
+        self._patched = [(image_store._STORES, image_store.DEFAULT_STORE_ROOT, store),
+                         (image_variants._VARIANTS, image_variants.DEFAULT_VARIANTS_DIR,
+                          ImageVariants(os.path.join(root, "variants"), store=store))]
+        for cache, key, value in self._patched:
+            cache[key] = value
+
+        self.paths = [self._write_episode("pair", 0, self._instance([(200, 30, 30), (30, 30, 200)])),
+                      self._write_episode("pair", 1, self._instance([(200, 30, 30), (30, 30, 200)]))]
+        self.pattern = os.path.join(root, "results", "*", "escape_room", "*", "episode_*", "interactions.json")
+
+    def _instance(self, colors):
+        """
+        Two room instance, game 3, with single color room images
+        """
+        images = []
+        for color in colors:
+            images.append(os.path.join(self.tmp_dir.name, "room_{}_{}_{}.png".format(*color)))
+            Image.fromarray(np.full((40, 40, 3), color, dtype=np.uint8), "RGB").save(images[-1])
+        return {"game_id": 3, "node_to_image": {"(0, 0)": images[0], "(1, 0)": images[1]},
+                "unnamed_edges": [["(0, 0)", "(1, 0)"]], "start_node": "(0, 0)", "target_node": "(1, 0)"}
+
+    def _write_episode(self, pair, episode, instance):
+        episode_dir = os.path.join(self.tmp_dir.name, "results", pair, "escape_room", "0_small", f"episode_{episode}")
+        os.makedirs(episode_dir)
+        with open(os.path.join(episode_dir, "instance.json"), "w") as f:
+            json.dump(instance, f)
+        path = os.path.join(episode_dir, "interactions.json")
+        with open(path, "w") as f:
+            json.dump({"meta": {}, "turns": _turns()}, f)
+        return path
+
+    def tearDown(self):
+        for cache, key, _ in self._patched:
+            cache.pop(key, None)
+        self.tmp_dir.cleanup()
+
+    def _markers(self):
+        return [os.path.join(os.path.dirname(path), "combined_graphs", DONE_MARKER) for path in self.paths]
+
+    def _process(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            process_interactions(self.pattern, workers=2)
+        return output.getvalue()
+
+    def test_render_and_resume(self):
+        self.assertIn("0/2 episodes up to date, rendering 1 instances", self._process())
+        for marker in self._markers():
+            with open(marker) as f:
+                self.assertEqual(f.read(), "2")
+            frames_dir = os.path.dirname(marker)
+            self.assertEqual(sorted(os.listdir(frames_dir)), [DONE_MARKER, "combined_0.png", "combined_1.png"])
+            with Image.open(os.path.join(frames_dir, "combined_1.png")) as frame:
+                self.assertEqual(frame.format, "PNG")
+
+        # Up to date episodes are skipped, an episode with newer interactions is rendered again
+        first_marker, second_marker = self._markers()
+        os.utime(first_marker, (1000, 1000))
+        os.utime(self.paths[0], (2000, 2000))
+        second_mtime = os.path.getmtime(second_marker)
+        self.assertIn("1/2 episodes up to date, rendering 1 instances", self._process())
+        self.assertGreater(os.path.getmtime(first_marker), 2000)
+        self.assertEqual(os.path.getmtime(second_marker), second_mtime)
+        self.assertIn("2/2 episodes up to date, rendering 0 instances", self._process())
+
+    def test_same_game_id_other_instance(self):
+        # Another pair played game 3 of an experiment with the same name, from another instances file
+        other = self._write_episode("other_pair", 0, self._instance([(30, 200, 30), (230, 230, 30)]))
+        self.assertIn("0/3 episodes up to date, rendering 2 instances", self._process())
+
+        def colors(path):
+            with Image.open(os.path.join(os.path.dirname(path), "combined_graphs", "combined_0.png")) as frame:
+                return {color for _, color in frame.convert("RGB").getcolors(1 << 20)}
+
+        self.assertIn((30, 200, 30), colors(other))
+        self.assertNotIn((200, 30, 30), colors(other))
+        self.assertIn((200, 30, 30), colors(self.paths[0]))
+        self.assertNotIn((30, 200, 30), colors(self.paths[0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
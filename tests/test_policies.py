@@ -0,0 +1,64 @@
+import json
+import logging
+import os
+import unittest
+
+from clemcore.clemgame import metrics as ms
+
+from escaperoom.policies import get_policy, get_moves
+from escaperoom.utils.scripted_baselines import play_episode, score_episode
+
+INSTANCES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "escaperoom", "in", "instances.json")
+
+
+class PoliciesTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.INFO)
+        with open(INSTANCES_PATH, "r") as f:
+            instances = json.load(f)
+        cls.experiments = [({k: v for k, v in exp.items() if k != "game_instances"}, exp["game_instances"][:3])
+                           for exp in instances["experiments"]]
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def _play(self, explorer_policy, guide_policy):
+        for experiment, game_instances in self.experiments:
+            for game_instance in game_instances:
+                interactions = play_episode(experiment, game_instance, explorer_policy, guide_policy)
+                yield score_episode(experiment, game_instance, interactions)
+
+    def test_get_moves(self):
+        game_instance = self.experiments[0][1][0]
+        moves = get_moves(game_instance)
+        num_moves = sum(len(m) for m in moves.values())
+        self.assertEqual(num_moves, 2 * len(game_instance["unnamed_edges"]))
+
+    def test_oracle(self):
+        for scores in self._play("oracle", "protocol"):
+            self.assertEqual(scores[ms.METRIC_SUCCESS], 1)
+
+    def test_exploring_policies(self):
+        for explorer_policy in ("dfs", "frontier"):
+            for scores in self._play(explorer_policy, "protocol"):
+                self.assertEqual(scores[ms.METRIC_ABORTED], 0)
+
+    def test_adversarial(self):
+        for scores in self._play("adversarial", "fixed"):
+            self.assertEqual(scores[ms.METRIC_ABORTED], 1)
+
+    def test_default_policies(self):
+        for scores in self._play("random", "fixed"):
+            self.assertEqual(scores[ms.METRIC_SUCCESS] + scores[ms.METRIC_LOSE] + scores[ms.METRIC_ABORTED], 1)
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            get_policy("explorer", "unknown", self.experiments[0][1][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
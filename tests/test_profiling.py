@@ -0,0 +1,66 @@
+import glob
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from escaperoom import profiling
+from escaperoom.profiling import ENV_DIR, ENV_MEMORY, ENV_SAMPLE, ENV_STAGES, profiled, summarize
+
+
+@profiled("score", label=lambda n: f"sum-{n}")
+def work(n):
+    return sum(list(range(n)))
+
+
+class ProfilingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        profiling._counters.clear()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def files(self, pattern="*"):
+        return sorted(glob.glob(os.path.join(self.tmp_dir.name, "*", pattern)))
+
+    def test_disabled_by_default(self):
+        with mock.patch.dict(os.environ, {ENV_STAGES: "", ENV_DIR: self.tmp_dir.name}):
+            self.assertEqual(work(10), 45)
+        self.assertEqual(self.files(), [])
+
+    def test_only_enabled_stages(self):
+        with mock.patch.dict(os.environ, {ENV_STAGES: "generate,play", ENV_DIR: self.tmp_dir.name}):
+            work(10)
+        self.assertEqual(self.files(), [])
+
+    def test_profile_and_snapshot(self):
+        env = {ENV_STAGES: "all", ENV_DIR: self.tmp_dir.name, ENV_MEMORY: "1"}
+        with mock.patch.dict(os.environ, env):
+            self.assertEqual(work(1000), 499500)
+        self.assertEqual([os.path.splitext(os.path.basename(path))[1] for path in self.files()],
+                         [".prof", ".snapshot", ".txt"])
+        self.assertTrue(os.path.basename(self.files()[0]).startswith("sum-1000-"))
+        with open(self.files("*.txt")[0]) as f:
+            report = f.read()
+        self.assertIn("Top 30 by cumulative", report)
+        self.assertIn("allocating lines", report)
+
+    def test_sampling_and_summary(self):
+        env = {ENV_STAGES: "score", ENV_DIR: self.tmp_dir.name, ENV_SAMPLE: "3", ENV_MEMORY: "0"}
+        with mock.patch.dict(os.environ, env):
+            for n in range(7):
+                work(n)
+        # Calls 0, 3 and 6
+        self.assertEqual(len(self.files("*.prof")), 3)
+        self.assertEqual(self.files("*.snapshot"), [])
+        self.assertIn("score: 3 profiled calls", summarize(self.tmp_dir.name, top_n=5))
+
+    def test_unknown_stage(self):
+        with self.assertRaises(ValueError):
+            profiled("render")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import logging
+import unittest
+
+from benchmarks.scaling import STAGES, dfs_walk, fit_exponents, load_prompts, run_point, synthetic_metadata, \
+    to_instance
+from engine.graphs import BaseGraph
+from escaperoom.solver import get_candidate_rooms
+
+
+class ScalingTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.INFO)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def test_synthetic_instance(self):
+        nx_graph = BaseGraph(10, 10, 20, seed=1).create_tree_graph()
+        game_instance = to_instance(synthetic_metadata(nx_graph, 10, 10), load_prompts())
+        self.assertEqual(len(game_instance["unnamed_nodes"]), 20)
+        self.assertEqual(len(set(game_instance["named_nodes"])), 20)
+        # Every room has its own category, the target is the only candidate for the solver
+        self.assertEqual(get_candidate_rooms(game_instance), [game_instance["target_node"]])
+        # A depth-first walk crosses every edge of a tree twice
+        self.assertEqual(len(dfs_walk(game_instance)), 2 * 19)
+
+    def test_run_point(self):
+        records = run_point("cycle", 10, 8, list(STAGES), {"start_type": "indoor", "end_type": "ambiguous",
+                                                          "ambiguity": [2], "ambiguity_region": "indoor",
+                                                          "distance": 2}, load_prompts(), repeat=1)
+        self.assertEqual([record["stage"] for record in records], list(STAGES))
+        for record in records:
+            self.assertIsNone(record["error"], record)
+            self.assertGreater(record["seconds"], 0)
+        self.assertEqual(records[-1]["instance"], "metadata")
+
+    def test_infeasible_point(self):
+        # Cycles need an even number of rooms, the later stages are skipped with the same error
+        records = run_point("cycle", 10, 7, ["generate", "env"], {}, load_prompts(), repeat=1)
+        self.assertTrue(all(record["error"].startswith("ValueError") for record in records))
+
+    def test_fit_exponents(self):
+        records = [{"graph_type": "tree", "size": 10, "stage": "env", "rooms": rooms, "seconds": rooms ** 2 * 1e-6}
+                   for rooms in (4, 8, 16, 32)]
+        fits = fit_exponents(records)
+        self.assertEqual(len(fits), 1)
+        self.assertAlmostEqual(fits[0]["exponent"], 2.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
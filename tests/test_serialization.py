@@ -0,0 +1,76 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from escaperoom import serialization
+from utils.clean_interactions import convert_file
+
+DATA = {"meta": {"game_id": 3}, "turns": [[{"action": {"type": "move", "content": "efficient"}}]], "note": "Café"}
+
+
+class SerializationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def round_trip(self, name, obj=DATA):
+        path = serialization.dump(obj, os.path.join(self.tmp_dir.name, name, "metrics.json"), name)
+        self.assertEqual(path.endswith(".msgpack"), name == "msgpack")
+        # Transparent reading, also through the .json name of a .msgpack file
+        return serialization.load(os.path.join(self.tmp_dir.name, name, "metrics.json"))
+
+    def test_json(self):
+        self.assertEqual(self.round_trip("json"), DATA)
+
+    @unittest.skipUnless(serialization.is_available("orjson"), "orjson is not installed")
+    def test_orjson(self):
+        self.assertEqual(self.round_trip("orjson"), DATA)
+        loaded = self.round_trip("orjson", {"positions": np.arange(3), "score": np.float64(0.5)})
+        self.assertEqual(loaded, {"positions": [0, 1, 2], "score": 0.5})
+
+    @unittest.skipUnless(serialization.is_available("msgpack"), "msgpack is not installed")
+    def test_msgpack(self):
+        self.assertEqual(self.round_trip("msgpack"), DATA)
+        scores = {"turn scores": {0: {"moves": 1}}}
+        self.assertEqual(self.round_trip("msgpack", scores), scores)
+
+    def test_unknown_serializer(self):
+        with self.assertRaises(ValueError):
+            serialization.get_serializer("yaml")
+
+    def test_clemcore_files(self):
+        for filename in ("interactions.json", "instance.json", "requests.json", "scores.json",
+                         "experiment_small.json", "episode_0/scores.json"):
+            self.assertTrue(serialization.is_clemcore_file(filename), filename)
+        for filename in ("metrics.json", "instances.json", "difficulty.json"):
+            self.assertFalse(serialization.is_clemcore_file(filename), filename)
+
+    @unittest.skipUnless(serialization.is_available("msgpack"), "msgpack is not installed")
+    def test_convert_results(self):
+        episode_dir = os.path.join(self.tmp_dir.name, "pair", "escape_room", "0_small", "episode_0")
+        os.makedirs(episode_dir)
+        for filename in ("interactions.json", "scores.json", "metrics.json"):
+            with open(os.path.join(episode_dir, filename), "w") as f:
+                json.dump(DATA, f)
+        # Game owned files are converted, clemcore reads interactions.json and scores.json as they are
+        for filename in ("interactions.json", "scores.json", "metrics.json"):
+            convert_file(os.path.join(episode_dir, filename), "msgpack")
+        self.assertEqual(sorted(os.listdir(episode_dir)), ["interactions.json", "metrics.msgpack", "scores.json"])
+        for filename in ("interactions.json", "scores.json"):
+            with open(os.path.join(episode_dir, filename)) as f:
+                self.assertEqual(f.read(), json.dumps(DATA))
+        self.assertEqual(serialization.load(os.path.join(episode_dir, "metrics.json")), DATA)
+
+        # The json serializer pretty prints the clemcore files in place
+        self.assertTrue(convert_file(os.path.join(episode_dir, "scores.json"), "json"))
+        self.assertFalse(convert_file(os.path.join(episode_dir, "scores.json"), "json"))
+        with open(os.path.join(episode_dir, "scores.json")) as f:
+            self.assertEqual(json.load(f), DATA)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import json
+import logging
+import os
+import unittest
+
+import numpy as np
+
+from escaperoom.policies import get_policy
+from escaperoom.simulator import EscapeRoomSimulator, simulate, OUTCOME_SUCCESS, OUTCOME_LOSE, OUTCOME_ABORTED
+from escaperoom.utils.scripted_baselines import play_episode
+
+INSTANCES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "escaperoom", "in", "instances.json")
+# Events that are logged by the game master only (prompts/images), not by the simulator
+MASTER_EVENTS = ("image", "send message", "get message", "metadata")
+
+
+class SimulatorTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.INFO)
+        with open(INSTANCES_PATH, "r") as f:
+            instances = json.load(f)
+        cls.experiments = [({k: v for k, v in exp.items() if k != "game_instances"}, exp["game_instances"][:2])
+                           for exp in instances["experiments"]]
+        cls.game_instance = cls.experiments[0][1][0]
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def test_same_events_as_game_master(self):
+        policies = [("random", "fixed"), ("dfs", "protocol"), ("frontier", "fixed"), ("adversarial", "adversarial")]
+        for experiment, game_instances in self.experiments:
+            for game_instance in game_instances:
+                for explorer_policy, guide_policy in policies:
+                    np.random.seed(0)
+                    interactions = play_episode(experiment, game_instance, explorer_policy, guide_policy)
+                    master_events = [(event["action"]["type"], event["action"]["content"])
+                                     for turn in interactions["turns"] for event in turn
+                                     if event["action"]["type"] not in MASTER_EVENTS]
+                    np.random.seed(0)
+                    simulator, _ = simulate(game_instance, get_policy("explorer", explorer_policy, game_instance),
+                                            get_policy("guide", guide_policy, game_instance), record_events=True)
+                    self.assertEqual(simulator.events, master_events)
+
+    def test_outcomes(self):
+        protocol = get_policy("guide", "protocol", self.game_instance)
+        simulator, _ = simulate(self.game_instance, get_policy("explorer", "oracle", self.game_instance), protocol)
+        self.assertEqual(simulator.outcome, OUTCOME_SUCCESS)
+        simulator, _ = simulate(self.game_instance, get_policy("explorer", "adversarial", self.game_instance, seed=1),
+                                protocol)
+        self.assertEqual(simulator.outcome, OUTCOME_ABORTED)
+
+    def test_escape_from_wrong_room(self):
+        simulator = EscapeRoomSimulator(self.game_instance)
+        simulator.room = (simulator.target + 1) % len(simulator.map.nodes)
+        self.assertTrue(simulator.explorer_step("ESCAPE"))
+        self.assertEqual(simulator.outcome, OUTCOME_LOSE)
+
+    def test_move_limit(self):
+        simulator = EscapeRoomSimulator(self.game_instance)
+        direction = simulator.next_moves().strip("[]").split(",")[0].strip(" '")
+        for _ in range(13):
+            simulator.explorer_step(f"MOVE: {direction}")
+            simulator.room = simulator.map.index[self.game_instance["start_node"]]
+        self.assertFalse(simulator.fail)
+        simulator.explorer_step(f"MOVE: {direction}")
+        self.assertTrue(simulator.fail)
+        self.assertIn(("turns exceeded", "failed game: explorer"), simulator.events)
+
+    def test_question_protocol(self):
+        simulator = EscapeRoomSimulator(self.game_instance)
+        self.assertTrue(simulator.guide_step("DESCRIPTION: A room"))
+        self.assertTrue(simulator.explorer_step("QUESTION: Is there a bed?"))
+        self.assertTrue(simulator.pass_turn)
+        self.assertTrue(simulator.guide_step("DESCRIPTION: A room"))
+        self.assertTrue(simulator.fail)
+        self.assertEqual(simulator.events[-1], ("description", "wrong response"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import itertools
+import unittest
+
+from engine.maps import BaseMap
+from escaperoom.solver import solve_instance, get_candidate_rooms, get_distances
+
+
+def _brute_force(game_instance):
+    distances = get_distances(game_instance)
+    candidates = get_candidate_rooms(game_instance)
+    start = game_instance["start_node"]
+    best_expected, best_worst = float("inf"), float("inf")
+    for order in itertools.permutations(candidates):
+        arrivals = []
+        current, total = start, 0
+        for node in order:
+            total += distances[current][node]
+            arrivals.append(total)
+            current = node
+        best_expected = min(best_expected, sum(arrivals) / len(arrivals))
+        best_worst = min(best_worst, arrivals[-1])
+    return best_expected, best_worst
+
+
+class SolverTest(unittest.TestCase):
+
+    def setUp(self):
+        # (0, 0) - (1, 0) - (2, 0) - (3, 0), with two Bedrooms
+        self.game_instance = {
+            "graph_id": "00k10b20c30b",
+            "node_to_category": {"(0, 0)": "Kitchen", "(1, 0)": "Bedroom",
+                                 "(2, 0)": "Closet", "(3, 0)": "Bedroom"},
+            "unnamed_edges": [["(0, 0)", "(1, 0)"], ["(1, 0)", "(2, 0)"], ["(2, 0)", "(3, 0)"]],
+            "start_node": "(0, 0)",
+            "target_node": "(3, 0)",
+        }
+
+    def test_path_map(self):
+        solution = solve_instance(self.game_instance)
+        self.assertEqual(solution["optimal_moves"], 3)
+        self.assertEqual(solution["num_candidates"], 2)
+        self.assertEqual(solution["visit_order"], ["(1, 0)", "(3, 0)"])
+        self.assertEqual(solution["expected_moves"], 2)
+        self.assertEqual(solution["worst_case_moves"], 3)
+        self.assertEqual(solution["reference_moves"], 3)
+
+    def test_numbered_ambiguous_rooms(self):
+        self.game_instance["node_to_category"]["(1, 0)"] = "Bedroom 1"
+        self.game_instance["node_to_category"]["(3, 0)"] = "Bedroom 2"
+        self.game_instance["graph_id"] = "numbered"
+        self.assertEqual(get_candidate_rooms(self.game_instance), ["(1, 0)", "(3, 0)"])
+
+    def test_against_brute_force(self):
+        for seed in range(1, 11):
+            base_map = BaseMap(10, 10, n_rooms=8, graph_type="tree", seed=seed)
+            metadata = base_map.metadata(start_type="random", end_type="ambiguous", ambiguity=[4],
+                                         ambiguity_region="random", distance=2)
+            solution = solve_instance(metadata)
+            expected, worst_case = _brute_force(metadata)
+            self.assertAlmostEqual(solution["expected_moves"], expected)
+            self.assertEqual(solution["worst_case_moves"], worst_case)
+            self.assertGreaterEqual(solution["reference_moves"], solution["optimal_moves"])
+
+
+if __name__ == '__main__':
+    unittest.main()
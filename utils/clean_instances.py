@@ -1,8 +1,22 @@
-import json
+import argparse
 import os
 
-with open(os.path.join("escaperoom", "in", "instances.json"), 'r') as f:
-    json_data = json.load(f)
+from escaperoom import serialization
 
-with open(os.path.join("escaperoom", "in", "instances.json"), 'w') as f:
-    json.dump(json_data, f, ensure_ascii=False, indent=4)
\ No newline at end of file
+INSTANCES_PATH = os.path.join("escaperoom", "in", "instances.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rewrite an instances file with one serializer")
+    parser.add_argument("--instances", default=INSTANCES_PATH)
+    parser.add_argument("--serializer", default="json", choices=list(serialization.SERIALIZERS))
+    args = parser.parse_args()
+    if not serialization.is_available(args.serializer):
+        parser.error(f"The {args.serializer} serializer is not installed: pip install {args.serializer}")
+
+    path = serialization.dump(serialization.load(args.instances), args.instances, args.serializer)
+    print(f"Instances written to {path}")
+
+
+if __name__ == '__main__':
+    main()
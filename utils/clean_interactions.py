@@ -1,14 +1,57 @@
-import json
+"""
+Rewrite the result files of a results tree with one serializer.
+
+The files clemcore writes and reads back (instance.json, interactions.json, requests.json, the scores and the
+experiment configs, see serialization.is_clemcore_file) stay JSON: they are pretty printed with the json serializer
+and skipped by the others. Only the game owned files, like metrics.json, are converted to another format.
+
+Files that are already stored as requested are skipped, so re-runs only touch new results - the readers in
+escaperoom/serialization.py accept any of the formats, so the tree does not need to be reformatted to be read.
+
+python utils/clean_interactions.py --results results  # pretty printed JSON (indent=4)
+python utils/clean_interactions.py --results results --serializer msgpack  # binary, only the game owned files
+"""
+import argparse
 import os
 
-results_path = "results"
+from escaperoom import serialization
+
+
+def convert_file(filepath, serializer):
+    """
+    Returns:
+        True if the file was rewritten
+    """
+    target = serialization.output_path(filepath, serializer)
+    if serialization.is_clemcore_file(filepath) and (serializer != "json" or target != filepath):
+        return False
+    with open(filepath, 'rb') as f:
+        data = f.read()
+    obj = serialization.loads(data, filepath)
+    if target == filepath and serialization.get_serializer(serializer).dumps(obj) == data:
+        return False
+    serialization.dump(obj, target, serializer)
+    if target != filepath:
+        os.remove(filepath)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rewrite all result files with one serializer")
+    parser.add_argument("--results", default="results")
+    parser.add_argument("--serializer", default="json", choices=list(serialization.SERIALIZERS))
+    args = parser.parse_args()
+    if not serialization.is_available(args.serializer):
+        parser.error(f"The {args.serializer} serializer is not installed: pip install {args.serializer}")
+
+    converted, total = 0, 0
+    for dirname, _, filenames in os.walk(args.results):
+        for filename in filenames:
+            if filename.endswith((".json", serialization.MSGPACK_EXTENSION)):
+                total += 1
+                converted += convert_file(os.path.join(dirname, filename), args.serializer)
+    print(f"Rewrote {converted}/{total} files with {args.serializer}")
 
-for dirname, _, filenames in os.walk(results_path):
-    for filename in filenames:
-        if filename.endswith(".json"):
-            filepath = os.path.join(dirname, filename)
-            with open(filepath, 'r') as f:
-                json_data = json.load(f)
 
-            with open(filepath, 'w') as f:
-                json.dump(json_data, f, indent=4)
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -1,29 +1,75 @@
-import os
+"""
+Mirror all images referenced in instances.json and write instances_local.json with local image paths.
+
+Images are downloaded concurrently, with one connection pool (requests.Session) per worker thread. Downloads go to
+a .part file first and are resumed with an HTTP Range request if a previous run was interrupted. Every mirrored image
+is recorded in a manifest (IMAGES_DIR/manifest.json) with its size and sha256, so re-runs only fetch what is missing
+or does not match the manifest.
+
+python utils/create_local_instances.py --workers 16
+python utils/create_local_instances.py --verify  # re-hash all mirrored images
+python utils/create_local_instances.py --store  # keep the images in the image store, see escaperoom/utils/image_store.py
+"""
+import argparse
+import hashlib
 import json
-import shutil
-import requests
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List
 from urllib.parse import urlparse
 
+import requests
+
+from escaperoom.utils.image_store import get_image_store
+
 # Paths
 INPUT_JSON = os.path.join("escaperoom", "in", "instances.json")
 OUTPUT_JSON = os.path.join("escaperoom", "in", "instances_local.json")
 IMAGES_DIR = "images"
+MANIFEST_NAME = "manifest.json"
+
+CHUNK_SIZE = 1 << 16
+TIMEOUT = 30
+
+_local = threading.local()
 
-# Create base images directory if it doesn't exist
-os.makedirs(IMAGES_DIR, exist_ok=True)
 
 # Load the JSON data
 def load_json(path):
     with open(path, 'r', encoding='utf-8') as f:
         return json.load(f)
 
+
 # Save the updated JSON data
 def save_json(data, path):
-    with open(path, 'w', encoding='utf-8') as f:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=4, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def get_session() -> requests.Session:
+    """
+    One session per worker thread, so that connections are reused across downloads
+    """
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+    return _local.session
+
 
-# Given a URL, download the image preserving the URL's folder structure under IMAGES_DIR
-def download_image(url):
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_local_path(url: str, images_dir: str = IMAGES_DIR) -> str:
+    """
+    Local path of an image, preserving the URL's folder structure (after 'images') under images_dir
+    """
     parsed = urlparse(url)
     path_parts = parsed.path.split('/')
     try:
@@ -35,43 +81,152 @@ def download_image(url):
         # fallback: just use filename
         sub_dirs = []
         filename = os.path.basename(parsed.path)
+    return os.path.join(images_dir, *sub_dirs, filename)
+
+
+def collect_urls(obj) -> List[str]:
+    """
+    Collect all URL fields in the JSON structure, in order and without duplicates
+    """
+    urls = {}
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            stack.extend(reversed(list(item.values())))
+        elif isinstance(item, list):
+            stack.extend(reversed(item))
+        elif isinstance(item, str) and item.startswith("http"):
+            urls[item] = None
+    return list(urls)
 
-    # Construct local directory and file path
-    local_dir = os.path.join(IMAGES_DIR, *sub_dirs)
-    os.makedirs(local_dir, exist_ok=True)
-    local_path = os.path.join(local_dir, filename)
 
-    if not os.path.exists(local_path):
-        print(f"Downloading {url} -> {local_path}")
-        resp = requests.get(url, stream=True)
+def replace_urls(obj, url_to_path: Dict[str, str]):
+    """
+    Copy of the JSON structure with URL fields replaced by local paths
+    """
+    if isinstance(obj, dict):
+        return {key: replace_urls(val, url_to_path) for key, val in obj.items()}
+    if isinstance(obj, list):
+        return [replace_urls(item, url_to_path) for item in obj]
+    if isinstance(obj, str) and obj in url_to_path:
+        return url_to_path[obj]
+    return obj
+
+
+def is_mirrored(url: str, local_path: str, manifest: Dict, verify: bool = False) -> bool:
+    entry = manifest.get(url)
+    if entry is None or entry["path"] != local_path or not os.path.exists(local_path):
+        return False
+    if os.path.getsize(local_path) != entry["size"]:
+        return False
+    return not verify or sha256_file(local_path) == entry["sha256"]
+
+
+def download_image(url: str, local_path: str) -> Dict:
+    """
+    Download an image to local_path, resuming from local_path.part if it exists
+
+    Returns:
+        Manifest entry - path, size and sha256 of the image
+
+    Raises:
+        IOError: If the downloaded size does not match the size reported by the server
+    """
+    os.makedirs(os.path.dirname(local_path) or ".", exist_ok=True)
+    part_path = local_path + ".part"
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+    with get_session().get(url, headers=headers, stream=True, timeout=TIMEOUT) as resp:
+        if resp.status_code == 416:  # Range not satisfiable - .part is already complete or broken, start over
+            os.remove(part_path)
+            return download_image(url, local_path)
         resp.raise_for_status()
-        with open(local_path, 'wb') as f:
-            for chunk in resp.iter_content(1024):
+        if resp.status_code != 206:  # Server ignored the Range request
+            offset = 0
+        expected_size = resp.headers.get("Content-Length")
+        expected_size = offset + int(expected_size) if expected_size is not None else None
+        with open(part_path, "ab" if offset else "wb") as f:
+            for chunk in resp.iter_content(CHUNK_SIZE):
                 f.write(chunk)
-    else:
-        print(f"Already exists: {local_path}")
 
-    # Return the local path to be inserted into JSON
-    return local_path
+    size = os.path.getsize(part_path)
+    if expected_size is not None and size != expected_size:
+        raise IOError(f"Incomplete download for {url}: {size} of {expected_size} bytes")
+    os.replace(part_path, local_path)
+    return {"path": local_path, "size": size, "sha256": sha256_file(local_path)}
 
-# Recursively update any URL fields in the JSON structure
-def update_urls(obj):
-    if isinstance(obj, dict):
-        for key, val in obj.items():
-            if isinstance(val, str) and val.startswith("http"):
-                obj[key] = download_image(val)
-            else:
-                update_urls(val)
-    elif isinstance(obj, list):
-        for item in obj:
-            update_urls(item)
+
+def mirror_images(urls: List[str], images_dir: str = IMAGES_DIR, workers: int = 8,
+                  verify: bool = False) -> Dict[str, str]:
+    """
+    Mirror all images that are missing, or do not match the manifest
+
+    Args:
+        urls: Image URLs
+        images_dir: Root directory of the mirrored images, contains the manifest
+        workers: Number of download threads
+        verify: Re-hash mirrored images, instead of checking only their size
+
+    Returns:
+        A dict mapping each successfully mirrored URL to its local path
+    """
+    os.makedirs(images_dir, exist_ok=True)
+    manifest_path = os.path.join(images_dir, MANIFEST_NAME)
+    manifest = load_json(manifest_path) if os.path.exists(manifest_path) else {}
+
+    local_paths = {url: get_local_path(url, images_dir) for url in urls}
+    missing = [url for url in urls if not is_mirrored(url, local_paths[url], manifest, verify)]
+    print(f"{len(urls) - len(missing)}/{len(urls)} images already mirrored, downloading {len(missing)}")
+
+    failed = set()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(download_image, url, local_paths[url]): url for url in missing}
+            for i, future in enumerate(as_completed(futures)):
+                url = futures[future]
+                try:
+                    manifest[url] = future.result()
+                except Exception as error:
+                    print(f"Failed to download {url}: {error}")
+                    manifest.pop(url, None)
+                    failed.add(url)
+                if (i + 1) % 100 == 0:
+                    print(f"Downloaded {i + 1}/{len(missing)}")
+    finally:
+        # Keep the progress of interrupted runs
+        save_json(manifest, manifest_path)
+
+    return {url: local_paths[url] for url in urls if url not in failed}
 
 
 def main():
-    data = load_json(INPUT_JSON)
-    update_urls(data)
-    save_json(data, OUTPUT_JSON)
-    print(f"Updated JSON written to {OUTPUT_JSON}")
+    parser = argparse.ArgumentParser(description="Mirror the images of an instances file for offline runs")
+    parser.add_argument("--input", default=INPUT_JSON)
+    parser.add_argument("--output", default=OUTPUT_JSON)
+    parser.add_argument("--images_dir", default=IMAGES_DIR)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--verify", action="store_true", help="Verify the sha256 of mirrored images")
+    parser.add_argument("--store", action="store_true",
+                        help="Add the images to the image store, the mirrored paths become hard links to the blobs")
+    args = parser.parse_args()
+
+    data = load_json(args.input)
+    urls = collect_urls(data)
+    url_to_path = mirror_images(urls, args.images_dir, args.workers, args.verify)
+    if args.store:
+        store = get_image_store()
+        for url, path in url_to_path.items():
+            store.put_file(path, key=url, link=True)
+        store.save()
+    if len(url_to_path) < len(urls):
+        print(f"{len(urls) - len(url_to_path)} images could not be mirrored, re-run to retry. "
+              f"{args.output} not written")
+        return
+    save_json(replace_urls(data, url_to_path), args.output)
+    print(f"Updated JSON written to {args.output}")
+
 
 if __name__ == '__main__':
     main()